@@ -1,35 +1,229 @@
 import sys
 import os
 import json
+import queue
+import random
+import threading
 import requests
-import pdfplumber
+import requests.adapters
 import time
-from typing import List, Dict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Tuple
 
 # Adiciona o diretório 'src' ao path para importar as utilidades oficiais do projeto
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-from handlers.chunks import ChunkerRegulatorio
+from handlers.chunks import OPCOES_EXTRACAO_WORKER, chave_extracao_worker, obter_chunker
+from handlers.extraction_backends import BACKENDS, BACKEND_PADRAO, obter_backend
+from handlers.extraction_cache import CachePaginas, hash_arquivo
+from handlers.hierarchy_semantics import anotar_semantica
+from handlers.near_duplicates import marcar_quase_duplicados
+from utils.page_store import serializar_artefato
 
 # Configurações
 WORKER_BASE_URL = "https://agems-rag-api.dgeagems.workers.dev"
 FOLDER_PATH = "./documentos_para_processar"
 
-def extract_text_locally(filepath):
-    """ Extrai o texto do PDF localmente usando pdfplumber """
-    texto_paginas = []
-    with pdfplumber.open(filepath) as pdf:
-        for i, page in enumerate(pdf.pages, start=1):
-            t = page.extract_text(layout=True)
-            if t:
-                # Injeta marcador de página para o Chunker processar
-                texto_paginas.append(f"[[PAGINA:{i}]]\n{t}")
-    return "\n\n".join(texto_paginas)
+# Embeddings: textos por requisição, requisições simultâneas e cota padrão da conta
+EMBEDDING_BATCH_SIZE = 20
+EMBEDDING_WORKERS = 8
+DEFAULT_AI_RPM = 3000
+MAX_TENTATIVAS = 5
 
-def generate_embeddings_locally(chunks: List[Dict]):
+def iter_paginas_locais(filepath, cache: CachePaginas = None, backend: str = None,
+                        sha256: str = None) -> Iterator[Tuple[int, str]]:
+    """
+    Extrai o texto de cada página com o backend escolhido (padrão: pdfplumber-layout),
+    com as mesmas tolerâncias do Worker (OPCOES_EXTRACAO_WORKER): os artefatos
+    enviados e as páginas extraídas no Worker saem iguais.
+    Páginas já extraídas deste mesmo PDF (mesmo SHA-256 e backend) vêm do cache em disco.
+
+    Gera (numero, texto) uma página por vez, incluindo páginas sem texto.
+    """
+    cache = cache or CachePaginas()
+    backend = obter_backend(backend, **OPCOES_EXTRACAO_WORKER)
+    sha256, opcoes = sha256 or hash_arquivo(filepath), backend.chave()
+    pdf = None
+    try:
+        for i in range(1, _contar_paginas(filepath, backend) + 1):
+            t = cache.obter(sha256, i, opcoes)
+            if t is None:
+                pdf = pdf or backend.abrir(filepath)
+                t = pdf.extrair(i - 1)
+                cache.salvar(sha256, i, opcoes, t)
+            yield i, t
+    finally:
+        if pdf: pdf.fechar()
+
+def extrair_paginas_locais(filepath, cache: CachePaginas = None, backend: str = None):
+    """
+    Returns:
+        (sha256, lista de (numero, texto)), incluindo páginas sem texto (ver iter_paginas_locais)
+    """
+    sha256 = hash_arquivo(filepath)
+    return sha256, list(iter_paginas_locais(filepath, cache, backend, sha256))
+
+def _contar_paginas(filepath, backend):
+    pdf = backend.abrir(filepath)
+    try:
+        return pdf.total_paginas
+    finally:
+        pdf.fechar()
+
+def extract_text_locally(filepath, cache: CachePaginas = None, backend: str = None):
+    """Texto do PDF com marcadores [[PAGINA:n]] para o Chunker processar"""
+    _, paginas = extrair_paginas_locais(filepath, cache, backend)
+    return "\n\n".join(f"[[PAGINA:{i}]]\n{t}" for i, t in paginas if t)
+
+def montar_artefato(filepath: str, backend: str) -> bytes:
+    """Extrai o PDF aqui e serializa o texto por página no formato de utils/page_store.py"""
+    inicio = time.perf_counter()
+    sha256, paginas = extrair_paginas_locais(filepath, backend=backend)
+    corpo = serializar_artefato(sha256, backend, chave_extracao_worker(backend), len(paginas), paginas).encode('utf-8')
+    print(f"   -> {len(paginas)} páginas extraídas em {time.perf_counter() - inicio:.1f}s ({len(corpo)} bytes)")
+    return corpo
+
+def enviar_artefato(document_id: str, filepath: str, session: requests.Session, backend: str = None):
+    """
+    Extrai o PDF aqui e envia o texto por página ao Worker (POST /documents/{id}/artifact).
+    O Worker passa a usar esse artefato no /process em vez de rodar o pdfplumber.
+    O PDF precisa ser o mesmo do upload (o Worker confere o SHA-256) e o backend
+    o do documento (extraction_backend); as tolerâncias já são as do Worker.
+    """
+    corpo = montar_artefato(filepath, backend or BACKEND_PADRAO)
+    res = _post_com_retry(session, f"{WORKER_BASE_URL}/documents/{document_id}/artifact",
+                          data=corpo, headers={"Content-Type": "application/x-ndjson"})
+    if res.status_code != 200:
+        raise RuntimeError(f"Worker recusou o artefato ({res.status_code}): {res.text}")
+    print(f"   -> Artefato de {document_id} salvo no R2.")
+
+def enviar_pdf_com_artefato(filepath: str, session: requests.Session, backend: str = None,
+                            doc_type: str = "Documento", sector: str = "Geral") -> str:
+    """
+    Envia o PDF ao Worker (POST /documents/upload) já com o artefato pré-extraído:
+    o artefato é gravado antes de o documento entrar na fila, então a extração
+    no Worker nunca começa com o pdfplumber. Devolve o document_id.
+    """
+    backend = backend or BACKEND_PADRAO
+    corpo = montar_artefato(filepath, backend)
+    nome = os.path.basename(filepath)
+    with open(filepath, 'rb') as f:
+        arquivos = {"file": (nome, f.read(), "application/pdf"),
+                    "artifact": (f"{nome}.pages.jsonl", corpo, "application/x-ndjson")}
+    res = _post_com_retry(session, f"{WORKER_BASE_URL}/documents/upload", files=arquivos,
+                          data={"title": os.path.splitext(nome)[0], "type": doc_type, "sector": sector,
+                                "extraction_backend": backend})
+    if res.status_code != 201:
+        raise RuntimeError(f"Worker recusou o upload ({res.status_code}): {res.text}")
+    document_id = res.json()["document_id"]
+    print(f"   -> {nome} enviado com artefato como {document_id} (na fila: {res.json().get('queued')}).")
+    return document_id
+
+class LimitadorTaxa:
+    """
+    Token bucket thread-safe: libera até `taxa_por_segundo` requisições por segundo,
+    com rajadas de até `capacidade` requisições.
+    """
+    def __init__(self, taxa_por_segundo: float, capacidade: float = None):
+        self.taxa = taxa_por_segundo
+        self.capacidade = capacidade or max(1.0, taxa_por_segundo)
+        self.tokens = self.capacidade
+        self.ultimo = time.monotonic()
+        self.lock = threading.Lock()
+
+    def adquirir(self, n: float = 1.0):
+        while True:
+            with self.lock:
+                agora = time.monotonic()
+                self.tokens = min(self.capacidade, self.tokens + (agora - self.ultimo) * self.taxa)
+                self.ultimo = agora
+                if self.tokens >= n:
+                    self.tokens -= n
+                    return
+                espera = (n - self.tokens) / self.taxa
+            time.sleep(espera)
+
+
+class MedidorVazao:
+    """Conta itens concluídos e imprime a vazão periodicamente"""
+    def __init__(self, total: int, rotulo: str, intervalo: float = 2.0):
+        self.total, self.rotulo, self.intervalo = total, rotulo, intervalo
+        self.feitos = 0
+        self.inicio = self.ultimo_print = time.monotonic()
+        self.lock = threading.Lock()
+
+    def registrar(self, n: int):
+        with self.lock:
+            self.feitos += n
+            agora = time.monotonic()
+            if agora - self.ultimo_print >= self.intervalo or self.feitos >= self.total:
+                self.ultimo_print = agora
+                taxa = self.feitos / max(agora - self.inicio, 1e-9)
+                print(f"         -> {self.feitos}/{self.total} {self.rotulo} ({taxa:.1f}/s)")
+
+    def resumo(self) -> float:
+        return self.feitos / max(time.monotonic() - self.inicio, 1e-9)
+
+
+def criar_sessao_http(pool_size: int = EMBEDDING_WORKERS) -> requests.Session:
+    """Sessão com pool de conexões reutilizáveis (keep-alive) dimensionado para a concorrência"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _post_com_retry(session, url, limitador=None, max_tentativas=MAX_TENTATIVAS, **kwargs):
+    """POST com backoff exponencial (e Retry-After) em 429/5xx e erros de rede"""
+    for tentativa in range(max_tentativas):
+        if limitador:
+            limitador.adquirir()
+        try:
+            response = session.post(url, **kwargs)
+            if response.status_code != 429 and response.status_code < 500:
+                return response
+            retry_after = response.headers.get("Retry-After")
+            espera = float(retry_after) if retry_after and retry_after.isdigit() else 2 ** tentativa
+        except requests.RequestException as e:
+            if tentativa == max_tentativas - 1:
+                raise
+            espera = 2 ** tentativa
+        time.sleep(espera + random.uniform(0, 0.5))
+    return response
+
+
+def _montar_vetor(c: Dict, i: int, clean_text: str, emb: List[float]) -> Dict:
+    """Formato final para o Worker handle_add_chunks"""
+    return {
+        "id": c.get("chunk_id", f"chunk-{i}"),
+        "values": emb,  # O vectorize.py espera 'values' para o embedding
+        "text": clean_text,
+        "metadata": {
+            "tipo": c.get("tipo"),
+            "numero": str(c.get("numero", "")),
+            "pagina": c.get("pagina"),
+            "contexto": c.get("contexto_hierarquico", ""),
+            **({"aliases": ",".join(c["aliases"])} if c.get("aliases") else {}),
+            **c.get("semantica", {}),
+            # Metadados do chunker (ex.: 'linhas' dos chunks agrupados do Anexo IV), como em utils/vectorize.py
+            **{k: v for k, v in c.get("metadata", {}).items() if v is not None}
+        }
+    }
+
+
+def generate_embeddings_locally(chunks: List[Dict], ao_concluir: Callable[[List[Dict]], None] = None,
+                                session: requests.Session = None, max_workers: int = EMBEDDING_WORKERS,
+                                tamanho_lote: int = EMBEDDING_BATCH_SIZE):
     """
     Gera embeddings localmente usando a API da Cloudflare Workers AI.
     Adapta o formato do ChunkerRegulatorio para o formato do Vectorize.
+
+    Envia lotes de `tamanho_lote` textos por requisição, com até `max_workers`
+    requisições simultâneas numa sessão HTTP com pool de conexões, limitadas por
+    um token bucket dimensionado pela cota da conta (CLOUDFLARE_AI_RPM).
+    `ao_concluir`, se informado, recebe cada lote de vetores assim que fica pronto
+    (permite enviar ao Worker em paralelo à geração).
     """
     from dotenv import load_dotenv
     load_dotenv()
@@ -43,94 +237,215 @@ def generate_embeddings_locally(chunks: List[Dict]):
     
     url = f"https://api.cloudflare.com/client/v4/accounts/{ACCOUNT_ID}/ai/run/@cf/baai/bge-m3"
     headers = {"Authorization": f"Bearer {API_TOKEN}", "Content-Type": "application/json"}
+    rpm = float(os.getenv("CLOUDFLARE_AI_RPM", DEFAULT_AI_RPM))
+    limitador = LimitadorTaxa(rpm / 60.0, capacidade=max_workers)
+    session = session or criar_sessao_http(max_workers)
     
-    print(f"      -> Gerando {len(chunks)} embeddings via Cloudflare AI API...")
-    chunks_with_embeddings = []
-    
+    # Sanitizar e descartar textos muito curtos e quase duplicados (--quase-duplicados), preservando o índice original
+    itens = []
     for i, c in enumerate(chunks):
-        text = c.get("texto", "")
-        if len(text.strip()) < 10: continue
-        
+        clean_text = c.get("texto", "").replace('\x00', '').strip()
+        if len(clean_text) >= 10 and not c.get("representante"):
+            itens.append((i, c, clean_text))
+    lotes = [itens[k:k + tamanho_lote] for k in range(0, len(itens), tamanho_lote)]
+    
+    print(f"      -> Gerando {len(itens)} embeddings via Cloudflare AI API "
+          f"({len(lotes)} requisições, {max_workers} simultâneas, {rpm:.0f} req/min)...")
+    medidor = MedidorVazao(len(itens), "embeddings")
+    resultados = {}
+
+    def processar_lote(lote):
+        response = _post_com_retry(session, url, limitador, headers=headers,
+                                   json={"text": [t for _, _, t in lote]}, timeout=60)
+        if response.status_code != 200:
+            print(f"         ERRO lote iniciado no chunk {lote[0][0]}: {response.status_code}")
+            return []
+        embeddings = response.json()["result"]["data"]
+        return [_montar_vetor(c, i, t, emb) for (i, c, t), emb in zip(lote, embeddings)]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futuros = {executor.submit(processar_lote, lote): lote[0][0] for lote in lotes}
+        for futuro in as_completed(futuros):
+            try:
+                vetores = futuro.result()
+            except Exception as e:
+                print(f"         Falha no lote iniciado no chunk {futuros[futuro]}: {e}")
+                continue
+            resultados[futuros[futuro]] = vetores
+            medidor.registrar(len(vetores))
+            if ao_concluir and vetores:
+                ao_concluir(vetores)
+
+    print(f"      -> Embeddings concluídos: {medidor.resumo():.1f} chunks/s")
+    return [v for k in sorted(resultados) for v in resultados[k]]
+
+
+class EnviadorLotes:
+    """
+    Envia vetores ao Worker (POST /documents/{id}/chunks) em lotes, numa thread
+    própria, enquanto os embeddings ainda estão sendo gerados.
+    """
+    def __init__(self, worker_url: str, session: requests.Session, batch_size: int = 50):
+        self.worker_url = worker_url
+        self.session = session
+        self.batch_size = batch_size
+        self.fila = queue.Queue()
+        self.buffer = []
+        self.enviados = 0
+        self.lotes = 0
+        self.thread = threading.Thread(target=self._consumir, daemon=True)
+        self.thread.start()
+
+    def adicionar(self, vetores: List[Dict]):
+        self.fila.put(vetores)
+
+    def finalizar(self) -> int:
+        self.fila.put(None)
+        self.thread.join()
+        return self.enviados
+
+    def _consumir(self):
+        while True:
+            vetores = self.fila.get()
+            if vetores is None:
+                break
+            self.buffer.extend(vetores)
+            while len(self.buffer) >= self.batch_size:
+                self._enviar(self.buffer[:self.batch_size])
+                self.buffer = self.buffer[self.batch_size:]
+        if self.buffer:
+            self._enviar(self.buffer)
+
+    def _enviar(self, batch: List[Dict]):
+        self.lotes += 1
         try:
-            # Sanitizar
-            clean_text = text.replace('\x00', '').strip()
-            response = requests.post(url, headers=headers, json={"text": clean_text}, timeout=30)
-            
-            if response.status_code == 200:
-                emb = response.json()["result"]["data"][0]
-                
-                # Formato final para o Worker handle_add_chunks
-                chunks_with_embeddings.append({
-                    "id": c.get("chunk_id", f"chunk-{i}"),
-                    "values": emb,  # O vectorize.py espera 'values' para o embedding
-                    "text": clean_text,
-                    "metadata": {
-                        "tipo": c.get("tipo"),
-                        "numero": str(c.get("numero", "")),
-                        "pagina": c.get("pagina"),
-                        "contexto": c.get("contexto_hierarquico", ""),
-                        **c.get("semantica", {})
-                    }
-                })
-                
-                if (i + 1) % 50 == 0:
-                    print(f"         -> {i + 1}/{len(chunks)} embeddings gerados...")
+            res = _post_com_retry(self.session, self.worker_url, json={"chunks": batch}, timeout=60)
+            if res.status_code == 200:
+                self.enviados += len(batch)
+                print(f"      Lote {self.lotes} enviado com sucesso.")
             else:
-                print(f"         ERRO chunk {i}: {response.status_code}")
-            
-            time.sleep(0.1) # Rate limit friendly
+                print(f"      ERRO no lote {self.lotes}: {res.text}")
         except Exception as e:
-            print(f"         Falha no chunk {i}: {e}")
-            
-    return chunks_with_embeddings
+            print(f"      ERRO no lote {self.lotes}: {e}")
 
-def ingest_documents():
-    if not os.path.exists(FOLDER_PATH):
-        print(f"Erro: Pasta '{FOLDER_PATH}' não encontrada.")
+def extrair_e_chunkar(filepath: str, tamanho_max_chunk: int = 1000, backend: str = None,
+                      processos_semantica: int = 1, quase_duplicados: bool = False):
+    """
+    Extração + chunking + anotação semântica de um PDF (etapas CPU-bound).
+    O chunking acompanha a extração (criar_chunks_stream): cada divisão de topo
+    vira chunks assim que suas páginas são extraídas, sem montar o texto inteiro.
+    Roda num processo do pool; erros são devolvidos em vez de propagados,
+    para que a falha de um arquivo não derrube os demais.
+    A anotação semântica vai para os metadados dos vetores (_montar_vetor).
+    Com quase_duplicados, eles são marcados como no Worker com NEAR_DUPLICATES
+    (etapa_chunkar) e não geram embedding (generate_embeddings_locally).
+
+    Returns:
+        (chunks, segundos, erro)
+    """
+    inicio = time.perf_counter()
+    try:
+        chunker, substituicoes = obter_chunker(tamanho_max_chunk), []
+        blocos = (f"[[PAGINA:{i}]]\n{t}" for i, t in iter_paginas_locais(filepath, backend=backend) if t)
+        chunks = list(chunker.criar_chunks_stream(blocos, substituicoes))
+        if substituicoes:
+            # Nova redação de um elemento já produzido: refaz como criar_chunks (páginas no cache)
+            chunks = chunker.criar_chunks(extract_text_locally(filepath, backend=backend))
+        if quase_duplicados:
+            marcar_quase_duplicados(chunks)
+        anotar_semantica(chunks, processos=processos_semantica)
+        return chunks, time.perf_counter() - inicio, None
+    except Exception as e:
+        return [], time.perf_counter() - inicio, f"{type(e).__name__}: {e}"
+
+
+def enviar_documento(filename: str, chunks: List[Dict], session: requests.Session):
+    """Embeddings + envio para o Worker (etapas de I/O, executadas no processo principal)"""
+    # Extrair um ID de documento (por exemplo, nome do arquivo sanitizado)
+    doc_id = filename.replace(".pdf", "").replace(" ", "_").lower()
+    # Endpoint: POST /documents/{id}/chunks
+    worker_url = f"{WORKER_BASE_URL}/documents/{doc_id}/chunks"
+    
+    # 3. Embeddings + 4. Envio para o Worker em pipeline:
+    # cada lote de vetores pronto já segue para o enviador (lotes de 50 para não estourar o payload)
+    enviador = EnviadorLotes(worker_url, session, batch_size=50)
+    chunks_ready = generate_embeddings_locally(chunks, ao_concluir=enviador.adicionar, session=session)
+    enviados = enviador.finalizar()
+    print(f"   -> {enviados}/{len(chunks_ready)} vetores enviados ao Worker.")
+
+
+def ingest_documents(workers: int = 1, folder_path: str = FOLDER_PATH, backend: str = BACKEND_PADRAO,
+                     quase_duplicados: bool = False):
+    """
+    Processa todos os PDFs da pasta.
+
+    Com workers > 1, extração e chunking de cada PDF rodam num ProcessPoolExecutor
+    enquanto o processo principal cuida de embeddings e envio do documento anterior.
+    Com um único PDF, os processos vão para a anotação semântica dos chunks.
+    O progresso é impresso na ordem dos arquivos. backend escolhe o extrator de texto
+    (ver src/handlers/extraction_backends.py); quase_duplicados liga a detecção de
+    src/handlers/near_duplicates.py.
+    """
+    if not os.path.exists(folder_path):
+        print(f"Erro: Pasta '{folder_path}' não encontrada.")
         return
 
-    files = [f for f in os.listdir(FOLDER_PATH) if f.lower().endswith(".pdf")]
+    files = sorted(f for f in os.listdir(folder_path) if f.lower().endswith(".pdf"))
     if not files:
         print("Nenhum PDF encontrado.")
         return
 
-    chunker = ChunkerRegulatorio(tamanho_max_chunk=1000)
+    session = criar_sessao_http(EMBEDDING_WORKERS + 2)
+    paths = [os.path.join(folder_path, f) for f in files]
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(files) > 1 else None
+    processos_semantica = workers if workers > 1 and not executor else 1
+    if executor:
+        print(f"Extração e chunking em {workers} processos para {len(files)} arquivos.")
+        futuros = [executor.submit(extrair_e_chunkar, p, 1000, backend, 1, quase_duplicados) for p in paths]
 
-    for filename in files:
-        filepath = os.path.join(FOLDER_PATH, filename)
-        print(f"\n--- Processando: {filename} ---")
-        
-        try:
-            # 1. Extração
-            text = extract_text_locally(filepath)
-            
-            # 2. Chunking
-            chunks = chunker.criar_chunks(text)
-            print(f"   -> {len(chunks)} chunks gerados.")
+    try:
+        for idx, filename in enumerate(files):
+            print(f"\n--- Processando [{idx + 1}/{len(files)}]: {filename} ---")
             
-            # 3. Embeddings
-            chunks_ready = generate_embeddings_locally(chunks)
-            
-            # 4. Enviar para o Worker
-            # Extrair um ID de documento (por exemplo, nome do arquivo sanitizado)
-            doc_id = filename.replace(".pdf", "").replace(" ", "_").lower()
-            
-            print(f"   -> Enviando para o Worker ({len(chunks_ready)} vetores)...")
-            # Endpoint: POST /documents/{id}/chunks
-            worker_url = f"{WORKER_BASE_URL}/documents/{doc_id}/chunks"
-            
-            # Lotes de 50 para não estourar o limite de payload
-            batch_size = 50
-            for i in range(0, len(chunks_ready), batch_size):
-                batch = chunks_ready[i:i+batch_size]
-                res = requests.post(worker_url, json={"chunks": batch}, timeout=60)
-                if res.status_code == 200:
-                    print(f"      Lote {i//batch_size + 1} enviado com sucesso.")
-                else:
-                    print(f"      ERRO no lote {i//batch_size + 1}: {res.text}")
+            # 1. Extração + 2. Chunking (no pool, ou aqui mesmo no modo serial)
+            try:
+                chunks, segundos, erro = futuros[idx].result() if executor else extrair_e_chunkar(paths[idx], 1000, backend, processos_semantica, quase_duplicados)
+            except Exception as e:  # ex.: BrokenProcessPool
+                chunks, segundos, erro = [], 0.0, f"{type(e).__name__}: {e}"
+            if erro:
+                print(f"   ERRO ao processar {filename}: {erro}")
+                continue
+            print(f"   -> {len(chunks)} chunks gerados em {segundos:.1f}s.")
 
-        except Exception as e:
-            print(f"   ERRO ao processar {filename}: {e}")
+            try:
+                enviar_documento(filename, chunks, session)
+            except Exception as e:
+                print(f"   ERRO ao processar {filename}: {e}")
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
 
 if __name__ == "__main__":
-    ingest_documents()
+    import argparse
+    parser = argparse.ArgumentParser(description="Ingestão local de PDFs regulatórios")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processos para extração/chunking em paralelo (padrão: 1, serial)")
+    parser.add_argument("--pasta", default=FOLDER_PATH, help="pasta com os PDFs")
+    parser.add_argument("--backend", default=BACKEND_PADRAO, choices=list(BACKENDS),
+                        help=f"extrator de texto (padrão: {BACKEND_PADRAO})")
+    parser.add_argument("--artefato", nargs=2, metavar=("DOCUMENT_ID", "PDF"),
+                        help="extrai o PDF localmente e envia o texto por página ao documento já enviado")
+    parser.add_argument("--upload", nargs="+", metavar="PDF",
+                        help="envia os PDFs ao Worker junto com o texto por página extraído localmente")
+    parser.add_argument("--quase-duplicados", action="store_true",
+                        help="não vetoriza chunks quase duplicados no mesmo ponto da hierarquia")
+    args = parser.parse_args()
+    if args.artefato:
+        enviar_artefato(args.artefato[0], args.artefato[1], criar_sessao_http(2), backend=args.backend)
+    elif args.upload:
+        sessao = criar_sessao_http(2)
+        for pdf in args.upload:
+            enviar_pdf_com_artefato(pdf, sessao, backend=args.backend)
+    else:
+        ingest_documents(workers=args.workers, folder_path=args.pasta, backend=args.backend,
+                         quase_duplicados=args.quase_duplicados)
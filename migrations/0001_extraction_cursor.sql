@@ -0,0 +1,4 @@
+-- Cursor de extração em janelas de páginas (handle_process)
+ALTER TABLE documents ADD COLUMN total_pages INTEGER;
+ALTER TABLE documents ADD COLUMN last_page INTEGER DEFAULT 0;
+ALTER TABLE documents ADD COLUMN parser_state TEXT;
@@ -0,0 +1,11 @@
+-- Vazão por etapa do pipeline de ingestão via Queues
+CREATE TABLE ingestion_stages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    document_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    items INTEGER DEFAULT 0,
+    duration_ms INTEGER DEFAULT 0,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_ingestion_stages_document ON ingestion_stages(document_id, stage);
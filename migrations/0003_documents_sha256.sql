@@ -0,0 +1,2 @@
+-- SHA-256 do PDF (chave do cache de páginas extraídas)
+ALTER TABLE documents ADD COLUMN sha256 TEXT;
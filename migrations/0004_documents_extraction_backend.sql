@@ -0,0 +1,3 @@
+-- Backend de extração de texto escolhido por documento (ver src/handlers/extraction_backends.py).
+-- NULL = backend padrão (pdfplumber-layout).
+ALTER TABLE documents ADD COLUMN extraction_backend TEXT;
@@ -0,0 +1,15 @@
+-- Árvore estrutural de cada documento (ver src/utils/structure_store.py):
+-- um nó por elemento, com o pai e os chunk_id do elemento (lista JSON).
+CREATE TABLE document_nodes (
+    document_id TEXT NOT NULL,
+    node_id INTEGER NOT NULL,
+    parent_id INTEGER,
+    tipo TEXT NOT NULL,
+    numero TEXT NOT NULL,
+    pagina INTEGER,
+    chunk_ids TEXT NOT NULL,
+    PRIMARY KEY (document_id, node_id)
+);
+
+CREATE INDEX idx_document_nodes_elemento ON document_nodes(document_id, tipo, numero);
+CREATE INDEX idx_document_nodes_parent ON document_nodes(document_id, parent_id);
@@ -0,0 +1,12 @@
+-- Grafo de referências cruzadas (ver src/utils/structure_store.py): uma aresta
+-- por chunk de origem e elemento citado; target_node_id NULL para normas externas.
+CREATE TABLE document_references (
+    document_id TEXT NOT NULL,
+    source_node_id INTEGER NOT NULL,
+    source_chunk_id TEXT NOT NULL,
+    target_node_id INTEGER,
+    referencia TEXT NOT NULL
+);
+
+CREATE INDEX idx_document_references_source ON document_references(document_id, source_chunk_id);
+CREATE INDEX idx_document_references_target ON document_references(document_id, target_node_id);
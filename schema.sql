@@ -7,14 +7,55 @@ CREATE TABLE documents (
     upload_date DATETIME DEFAULT CURRENT_TIMESTAMP,
     file_size INTEGER,
     r2_key TEXT NOT NULL,
+    sha256 TEXT,
+    extraction_backend TEXT,
     chunk_count INTEGER DEFAULT 0,
-    status TEXT DEFAULT 'pending'
+    status TEXT DEFAULT 'pending',
+    total_pages INTEGER,
+    last_page INTEGER DEFAULT 0,
+    parser_state TEXT
 );
 
 CREATE INDEX idx_documents_sector ON documents(sector);
 CREATE INDEX idx_documents_type ON documents(type);
 CREATE INDEX idx_documents_status ON documents(status);
 
+CREATE TABLE ingestion_stages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    document_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    items INTEGER DEFAULT 0,
+    duration_ms INTEGER DEFAULT 0,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_ingestion_stages_document ON ingestion_stages(document_id, stage);
+
+CREATE TABLE document_nodes (
+    document_id TEXT NOT NULL,
+    node_id INTEGER NOT NULL,
+    parent_id INTEGER,
+    tipo TEXT NOT NULL,
+    numero TEXT NOT NULL,
+    pagina INTEGER,
+    chunk_ids TEXT NOT NULL,
+    PRIMARY KEY (document_id, node_id)
+);
+
+CREATE INDEX idx_document_nodes_elemento ON document_nodes(document_id, tipo, numero);
+CREATE INDEX idx_document_nodes_parent ON document_nodes(document_id, parent_id);
+
+CREATE TABLE document_references (
+    document_id TEXT NOT NULL,
+    source_node_id INTEGER NOT NULL,
+    source_chunk_id TEXT NOT NULL,
+    target_node_id INTEGER,
+    referencia TEXT NOT NULL
+);
+
+CREATE INDEX idx_document_references_source ON document_references(document_id, source_chunk_id);
+CREATE INDEX idx_document_references_target ON document_references(document_id, target_node_id);
+
 CREATE TABLE conversations (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     session_id TEXT NOT NULL,
@@ -6,15 +6,222 @@ Módulo principal de segmentação e processamento
 import re
 import json
 import os
-from typing import List, Dict, Optional
-from hierarchy_semantics import (
-    AnalisadorRegulatorio,
-    TipoElemento,
-    ElementoRegulatorio,
-    PadroesRegulatorios,
-    LimpadorTexto,
-    UtilitariosHierarquia
-)
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from handlers.hierarchy_semantics import (
+        AnalisadorRegulatorio,
+        TipoElemento,
+        ElementoRegulatorio,
+        FonteTexto,
+        PADROES,
+        LIMPADOR,
+        UtilitariosHierarquia
+    )
+except ImportError:  # execução local com src/handlers no sys.path
+    from hierarchy_semantics import (
+        AnalisadorRegulatorio,
+        TipoElemento,
+        ElementoRegulatorio,
+        FonteTexto,
+        PADROES,
+        LIMPADOR,
+        UtilitariosHierarquia
+    )
+
+# Incrementar sempre que a lógica de segmentação mudar: invalida os manifestos no R2
+VERSAO_CHUNKER = "3"
+
+
+_ROMANO_INICIAL = re.compile(r'([IVXLCDM]+)', re.I)
+_NUMERO_INICIAL = re.compile(r'(\d+)')
+_SEPARADOR_PAGINAS = re.compile(r'\n\n(?=\[\[PAGINA:\d+\]\])')
+
+
+class _SequenciasRegistradas(dict):
+    """
+    sequencias de uma partição processada fora de ordem (criar_chunks_paralelo).
+    
+    Registra o valor visto na primeira leitura de cada chave ainda não escrita
+    (as premissas sobre o estado deixado pelas partições anteriores) e as chaves
+    escritas (o efeito da partição sobre o estado).
+    """
+
+    def __init__(self, palpites: Dict[str, int]):
+        super().__init__(palpites)
+        self.premissas = {}
+        self.escritas = set()
+
+    def get(self, chave, padrao=None):
+        valor = super().get(chave, padrao)
+        if chave not in self.escritas and chave not in self.premissas:
+            self.premissas[chave] = valor
+        return valor
+
+    def __setitem__(self, chave, valor):
+        self.escritas.add(chave)
+        super().__setitem__(chave, valor)
+
+
+class EstatisticasChunking:
+    """
+    Coletor de tempos e contagens por etapa do ChunkerRegulatorio.
+    
+    Passado em ChunkerRegulatorio(estatisticas=...) e exposto em
+    chunker.estatisticas; acumula entre chamadas (use zerar() para recomeçar).
+    Sem coletor (padrão) nada é medido.
+    
+    tempos (segundos):
+        limpar, normalizar, parse, dedup, format — etapas de criar_chunks;
+        classificacao, validacao e hierarquia estão contidas em parse,
+        semantica (anotar_semantica=True) em format.
+    contagens:
+        linhas (lidas pelo parser), linhas_lixo, rejeicoes_sequencia,
+        duplicatas_removidas, revogados_filtrados, chunks
+    elementos_por_tipo:
+        Counter por TipoElemento.value dos elementos identificados (antes da deduplicação)
+    """
+
+    ETAPAS = ('limpar', 'normalizar', 'parse', 'classificacao', 'validacao', 'hierarquia',
+              'dedup', 'format', 'semantica')
+    CONTAGENS = ('linhas', 'linhas_lixo', 'rejeicoes_sequencia', 'duplicatas_removidas',
+                 'revogados_filtrados', 'chunks')
+
+    def __init__(self):
+        self.zerar()
+
+    def zerar(self):
+        self.tempos: Dict[str, float] = dict.fromkeys(self.ETAPAS, 0.0)
+        self.contagens: Dict[str, int] = dict.fromkeys(self.CONTAGENS, 0)
+        self.elementos_por_tipo = Counter()
+
+    @contextmanager
+    def etapa(self, nome: str):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tempos[nome] = self.tempos.get(nome, 0.0) + time.perf_counter() - inicio
+
+    def cronometrar(self, nome: str, funcao):
+        """Envolve funcao acumulando o tempo de cada chamada em tempos[nome]"""
+        relogio = time.perf_counter
+        self.tempos.setdefault(nome, 0.0)
+
+        def cronometrada(*args, **kwargs):
+            inicio = relogio()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                self.tempos[nome] += relogio() - inicio
+        return cronometrada
+
+    def contar(self, nome: str, n: int = 1):
+        self.contagens[nome] = self.contagens.get(nome, 0) + n
+
+    def como_dict(self) -> Dict:
+        return {'tempos': dict(self.tempos), 'contagens': dict(self.contagens),
+                'elementos_por_tipo': dict(self.elementos_por_tipo)}
+
+    def resumo(self) -> str:
+        linhas = [f"{nome:<22} {segundos:8.3f}s" for nome, segundos in self.tempos.items()]
+        linhas += [f"{nome:<22} {n:>9}" for nome, n in self.contagens.items()]
+        linhas += [f"elementos {tipo:<12} {n:>9}" for tipo, n in self.elementos_por_tipo.most_common()]
+        return '\n'.join(linhas)
+
+
+class EstadoParser:
+    """
+    Estado do parser entre chamadas de ChunkerRegulatorio.alimentar: permite
+    analisar o documento em janelas de páginas (ex.: uma por invocação do
+    Worker) e retomar de onde parou, com os mesmos elementos de uma passada única.
+
+    Guarda só o que ainda influencia o restante do documento: página e
+    inclusão de resolução correntes, sequências de numeração, a cadeia de
+    ancestrais do elemento aberto e o texto já acumulado dele (ou o do
+    preâmbulo, antes do primeiro elemento). Os elementos fechados já foram
+    produzidos e não fazem parte do estado.
+
+    como_dict/serializar geram um JSON compacto (para o D1 ou o R2), válido
+    apenas para a mesma VERSAO_CHUNKER.
+    """
+
+    def __init__(self, pagina: int = 1, sequencias: Optional[Dict[str, int]] = None):
+        self.pagina = pagina
+        self.em_inclusao = False
+        self.sequencias = {} if sequencias is None else sequencias  # Rastreia numeração sequencial por contexto
+        self.pilha: List[Tuple[ElementoRegulatorio, str]] = []  # Cadeia de ancestrais do elemento aberto (ver _vincular)
+        self.elemento_atual: Optional[ElementoRegulatorio] = None
+        # Texto aceito até aqui; o do elemento aberto começa em inicio. Cada
+        # divisão de topo (Título, Anexo...) abre uma fonte nova, e a anterior
+        # é liberada junto com seus elementos (ver criar_chunks_stream)
+        self.fonte = FonteTexto()
+        self.inicio = 0
+
+    def como_dict(self) -> Dict:
+        return {
+            'versao': VERSAO_CHUNKER,
+            'pagina': self.pagina,
+            'inclusao': self.em_inclusao,
+            'sequencias': dict(self.sequencias),
+            # (tipo, número, nível, página, contexto, contexto herdado pelos filhos), da raiz ao elemento aberto
+            'pilha': [[e.tipo.value, e.numero, e.nivel, e.pagina, e.contexto_hierarquico, contexto]
+                      for e, contexto in self.pilha],
+            'aberto': self.elemento_atual is not None,
+            'texto': self.fonte.trecho(self.inicio, self.fonte.tamanho),
+        }
+
+    @classmethod
+    def de_dict(cls, dados: Dict) -> 'EstadoParser':
+        """Gera ValueError se o estado foi salvo por outra versão do chunker"""
+        if dados.get('versao') != VERSAO_CHUNKER:
+            raise ValueError(f"Estado do parser da versão {dados.get('versao')} (atual: {VERSAO_CHUNKER})")
+        estado = cls(dados['pagina'], dados['sequencias'])
+        estado.em_inclusao = dados['inclusao']
+        pai = None
+        for tipo, numero, nivel, pagina, contexto, contexto_filhos in dados['pilha']:
+            pai = ElementoRegulatorio(TipoElemento(tipo), numero, "", nivel, pagina, pai=pai,
+                                      contexto_hierarquico=sys.intern(contexto))
+            estado.pilha.append((pai, sys.intern(contexto_filhos)))
+        # O texto anterior ao elemento aberto já saiu nos elementos fechados
+        estado.fonte = FonteTexto(dados['texto'])
+        if dados['aberto']:
+            estado.elemento_atual = pai
+            pai.definir_trecho(estado.fonte, 0, estado.fonte.tamanho)
+        return estado
+
+    def serializar(self) -> str:
+        return json.dumps(self.como_dict(), ensure_ascii=False, separators=(',', ':'))
+
+    @classmethod
+    def desserializar(cls, texto: str) -> 'EstadoParser':
+        return cls.de_dict(json.loads(texto))
+
+
+def serializar_elementos(elementos: Iterable[ElementoRegulatorio]) -> str:
+    """
+    Elementos fechados em JSON Lines ([tipo, número, nível, página, contexto, texto]),
+    para guardar entre janelas analisadas com EstadoParser. O vínculo com o pai
+    não é guardado: depois do parse, só o contexto hierárquico é usado.
+    """
+    return ''.join(json.dumps([e.tipo.value, e.numero, e.nivel, e.pagina, e.contexto_hierarquico, e.texto],
+                              ensure_ascii=False, separators=(',', ':')) + '\n'
+                   for e in elementos)
+
+
+def desserializar_elementos(texto: str) -> List[ElementoRegulatorio]:
+    elementos = []
+    for linha in texto.split('\n'):
+        if linha:
+            tipo, numero, nivel, pagina, contexto, conteudo = json.loads(linha)
+            elementos.append(ElementoRegulatorio(TipoElemento(tipo), numero, conteudo, nivel, pagina,
+                                                 contexto_hierarquico=sys.intern(contexto)))
+    return elementos
 
 
 class ChunkerRegulatorio:
@@ -27,24 +234,71 @@ class ChunkerRegulatorio:
         self,
         tamanho_max_chunk: int = 1200,
         overlap_chars: int = 200,
-        manter_contexto: bool = True
+        manter_contexto: bool = True,
+        anotar_semantica: bool = False,
+        estatisticas: Optional[EstatisticasChunking] = None,
+        agrupar_anexo_iv: bool = True
     ):
+        """
+        anotar_semantica: inclui chunk['semantica'] já na geração. Desligado por
+        padrão: quem precisa da anotação usa hierarchy_semantics.anotar_semantica.
+        agrupar_anexo_iv: agrupa as linhas consecutivas do Anexo IV (tabela de
+        prazos) em chunks de até tamanho_max_chunk, com a posição de cada linha
+        em chunk['metadata']['linhas'] (ver linhas_do_chunk). Desligado, gera
+        um chunk por linha.
+        estatisticas: coletor de tempos e contagens por etapa (ver EstatisticasChunking).
+        Sem coletor, nenhuma medição é feita. Em criar_chunks_paralelo só o
+        trabalho do processo principal é medido.
+        """
         self.tamanho_max_chunk = tamanho_max_chunk
         self.overlap_chars = overlap_chars
         self.manter_contexto = manter_contexto
+        self.anotar_semantica = anotar_semantica
+        self.agrupar_anexo_iv = agrupar_anexo_iv
         self.analisador = AnalisadorRegulatorio()
-        self.padroes_obj = PadroesRegulatorios()
-        self.padroes = self.padroes_obj.padroes
-        self.limpador = LimpadorTexto()
+        self.padroes_obj = PADROES
+        self.padroes = PADROES.padroes
+        self.limpador = LIMPADOR
         self.utils = UtilitariosHierarquia()
+        self.estatisticas = estatisticas
+        self._classificar_linha = self.padroes_obj.classificar_linha
+        self._analisar = self.analisador.analisar
+        if estatisticas is not None:
+            # Chamadas internas ao parse e à formatação, medidas uma a uma
+            self._classificar_linha = estatisticas.cronometrar('classificacao', self._classificar_linha)
+            self._validar_sequencia = estatisticas.cronometrar('validacao', self._validar_sequencia)
+            self._vincular = estatisticas.cronometrar('hierarquia', self._vincular)
+            self._analisar = estatisticas.cronometrar('semantica', self._analisar)
+
+    @property
+    def versao(self) -> str:
+        """Identifica a configuração do chunker (usada como chave do manifesto)"""
+        return f"v{VERSAO_CHUNKER}-{self.tamanho_max_chunk}" + ("" if self.agrupar_anexo_iv else "-linhas")
 
     def limpar_texto(self, texto: str) -> str:
         """Limpa e normaliza o texto do documento"""
-        return self.limpador.limpar(texto)
+        if self.estatisticas is None:
+            return self.limpador.limpar(texto)
+        with self.estatisticas.etapa('limpar'):
+            return self.limpador.limpar(texto)
 
     def _normalizar_estrutura(self, texto: str) -> str:
         """Normaliza a estrutura do texto para melhor parsing"""
-        return self.limpador.normalizar_estrutura(texto)
+        if self.estatisticas is None:
+            return self.limpador.normalizar_estrutura(texto)
+        with self.estatisticas.etapa('normalizar'):
+            return self.limpador.normalizar_estrutura(texto)
+
+    def linhas_documento(self, paginas: Iterable[str]) -> Iterator[str]:
+        """
+        Limpa e normaliza o documento página a página e produz suas linhas.
+        
+        As regras de limpeza/normalização não atravessam os marcadores
+        [[PAGINA:n]], então processar cada página isoladamente gera as mesmas
+        linhas não vazias que processar o documento inteiro de uma vez.
+        """
+        for pagina in paginas:
+            yield from self._normalizar_estrutura(self.limpar_texto(pagina)).split('\n')
 
     def parse_documento(self, texto: str) -> List[ElementoRegulatorio]:
         """
@@ -58,214 +312,330 @@ class ChunkerRegulatorio:
         """
         texto = self.limpar_texto(texto)
         texto = self._normalizar_estrutura(texto)
+        if self.estatisticas is None:
+            return self._deduplicar_elementos(list(self.iterar_elementos(texto.split('\n'))))
+        with self.estatisticas.etapa('parse'):
+            elementos = list(self.iterar_elementos(texto.split('\n')))
+        return self._deduplicar_elementos(elementos)
+
+    def _percorrer_linhas(
+        self,
+        linhas: Iterable[str],
+        pagina: int = 1,
+        estatisticas: Optional[EstatisticasChunking] = None,
+        estado: Optional[EstadoParser] = None
+    ) -> Iterator[Tuple[int, str, int, bool]]:
+        """
+        Aplica os filtros que antecedem a classificação (linhas vazias, marcadores
+        de página, lixo) e produz (índice, linha, página, incluída).
         
-        elementos = []
-        linhas = texto.split('\n')
-        elemento_atual = None
-        texto_acumulado = []
-        pagina_atual = 1
-        sequencias = {}  # Rastreia numeração sequencial por contexto
+        incluída marca as linhas de uma resolução transcrita no texto, que se
+        juntam ao texto acumulado em vez de serem classificadas.
+        estatisticas recebe as contagens de linhas lidas e de lixo.
+        estado, se informado, fornece a página e a inclusão iniciais (no lugar
+        de pagina) e recebe as finais.
+        """
         em_inclusao_resolucao = False
-
-        for linha in linhas:
+        if estado is not None:
+            pagina, em_inclusao_resolucao = estado.pagina, estado.em_inclusao
+        i = -1
+        for i, linha in enumerate(linhas):
             linha = linha.strip()
             if not linha:
                 continue
 
             # Verifica marcador de página
             if m_pag := self.padroes['marcador_pagina'].match(linha):
-                pagina_atual = int(m_pag.group(1))
+                pagina = int(m_pag.group(1))
                 continue
             
             # Limpeza do PDF
-            if any(re.search(p, linha) for p in self.padroes['trash']):
+            if self.padroes_obj.eh_lixo(linha):
+                if estatisticas is not None:
+                    estatisticas.contar('linhas_lixo')
                 continue
 
             if self.padroes['inicio_inclusao'].search(linha):
-                if texto_acumulado:
-                    texto_acumulado[-1] += " " + linha
-                else:
-                    texto_acumulado.append(linha)
                 em_inclusao_resolucao = True
+                yield i, linha, pagina, True
                 continue
 
             if em_inclusao_resolucao:
-                if texto_acumulado:
-                    texto_acumulado[-1] += " " + linha
-                else:
-                    texto_acumulado.append(linha)
-
                 if self.padroes['fim_inclusao'].search(linha):
                     em_inclusao_resolucao = False
+                yield i, linha, pagina, True
                 continue
 
-            elemento_identificado = None
-    
-            # Funções auxiliares para validação de sequência
-            def obter_contexto(tipo):
-                """Determina o contexto para validação de sequência"""
-                nivel_alvo = self.utils.obter_nivel_por_tipo(tipo)
-                # Artigos e acima são globais
-                if nivel_alvo <= 5:
-                    return "doc"
-                curr = elemento_atual
-                while curr and curr.nivel >= nivel_alvo:
-                    curr = curr.pai
-                if not curr:
-                    return "doc"
-                return f"{curr.contexto_hierarquico} > {curr.tipo.value}_{curr.numero}"
-
-            def validar_sequencia(tipo, num_str):
-                """Valida se a numeração está em sequência válida"""
-                if num_str == "único":
-                    return True
-                
-                try:
-                    # Extrai apenas o número base (ignora sufixos como -A, -B)
-                    if tipo == TipoElemento.INCISO:
-                        # Pega apenas os algarismos romanos, ignora sufixos
-                        match = re.match(r'([IVXLCDM]+)', num_str, re.I)
-                        if not match:
-                            return True
-                        num = self.utils.romano_para_valor(match.group(1))
-                    elif tipo == TipoElemento.ALINEA:
-                        num = ord(num_str.lower()[0]) - ord('a') + 1
-                    else:
-                        # Para artigos e parágrafos, pega apenas o número base
-                        match = re.match(r'(\d+)', num_str)
-                        if not match:
-                            return True
-                        num = int(match.group(1))
-                    
-                    key = f"{obter_contexto(tipo)}|{tipo.value}"
-                    ultimo = sequencias.get(key, 0)
-                    
-                    # Aceita se:
-                    # - É o primeiro (num == 1)
-                    # - É sequencial (num == ultimo + 1)
-                    # - É repetição do mesmo número (num == ultimo) - para variações tipo I, I-A
-                    # - É um salto pequeno (até 5) - para elementos revogados
-                    if (num == 1 or num == ultimo + 1 or num == ultimo or 
-                        (num > ultimo and num < ultimo + 5)):
-                        # Só atualiza a sequência se for maior (para aceitar I e I-A no mesmo contexto)
-                        if num > ultimo:
-                            sequencias[key] = num
-                        return True
-                    return False
-                except:
-                    return True
+            yield i, linha, pagina, False
+        
+        if estado is not None:
+            estado.pagina, estado.em_inclusao = pagina, em_inclusao_resolucao
+        if estatisticas is not None:
+            estatisticas.contar('linhas', i + 1)
 
-            # Identificação de elementos estruturais
-            if m := self.padroes['resolucao'].match(linha):
-                elemento_identificado = ElementoRegulatorio(
-                    TipoElemento.RESOLUCAO, m.group(1), linha, 0, pagina_atual
-                )
-            
-            elif m := self.padroes['titulo'].match(linha):
-                elemento_identificado = ElementoRegulatorio(
-                    TipoElemento.TITULO, m.group(1), linha, 1, pagina_atual
-                )
-            
-            elif m := self.padroes['capitulo'].match(linha):
-                elemento_identificado = ElementoRegulatorio(
-                    TipoElemento.CAPITULO, m.group(1), linha, 2, pagina_atual
-                )
-            
-            elif m := self.padroes['secao'].match(linha):
-                elemento_identificado = ElementoRegulatorio(
-                    TipoElemento.SECAO, m.group(1), linha, 3, pagina_atual
-                )
-            
-            elif m := self.padroes['artigo'].match(linha):
-                if validar_sequencia(TipoElemento.ARTIGO, m.group(1)):
-                    elemento_identificado = ElementoRegulatorio(
-                        TipoElemento.ARTIGO, m.group(1), linha, 5, pagina_atual
-                    )
-            
-            elif m := self.padroes['clausula'].match(linha):
-                elemento_identificado = ElementoRegulatorio(
-                    TipoElemento.CLAUSULA, m.group(1).strip(':'), linha, 5, pagina_atual
-                )
-            
-            elif m := self.padroes['anexo'].match(linha):
-                # Tratamento especial para Anexo III (preâmbulo) e Anexo IV
-                if m.group(1) == "III" or (m.group(1) == "I" and "CONTRATO" in linha.upper()):
-                    elemento_identificado = ElementoRegulatorio(
-                        TipoElemento.PREAMBULO, m.group(1), linha, 0, pagina_atual
-                    )
-                else:
-                    elemento_identificado = ElementoRegulatorio(
-                        TipoElemento.ANEXO, m.group(1), linha, 1, pagina_atual
-                    )
-                # Limpa sequências ao entrar em anexo
-                for k in list(sequencias.keys()):
-                    if "|" in k and not (k.startswith("doc|") or "anexo" in k.lower()):
-                        del sequencias[k]
-            
-            elif m := self.padroes['paragrafo_unico'].match(linha):
-                elemento_identificado = ElementoRegulatorio(
-                    TipoElemento.PARAGRAFO, "único", linha, 6, pagina_atual
-                )
-            
-            elif m := self.padroes['paragrafo'].match(linha):
-                if validar_sequencia(TipoElemento.PARAGRAFO, m.group(1)):
-                    elemento_identificado = ElementoRegulatorio(
-                        TipoElemento.PARAGRAFO, m.group(1), linha, 6, pagina_atual
-                    )
-            
-            elif m := self.padroes['inciso'].match(linha):
-                if validar_sequencia(TipoElemento.INCISO, m.group(1)):
-                    elemento_identificado = ElementoRegulatorio(
-                        TipoElemento.INCISO, m.group(1), linha, 7, pagina_atual
-                    )
-            
-            elif m := self.padroes['alinea'].match(linha):
-                if validar_sequencia(TipoElemento.ALINEA, m.group(1)):
-                    elemento_identificado = ElementoRegulatorio(
-                        TipoElemento.ALINEA, m.group(1), linha, 8, pagina_atual
+    def iterar_elementos(
+        self,
+        linhas: Iterable[str],
+        pagina_inicial: int = 1,
+        sequencias: Optional[Dict[str, int]] = None
+    ) -> Iterator[ElementoRegulatorio]:
+        """
+        Percorre as linhas e produz cada elemento assim que ele se fecha
+        (isto é, quando o próximo elemento é identificado), já com a hierarquia
+        estabelecida. Só o elemento aberto e sua cadeia de ancestrais ficam em memória.
+        
+        pagina_inicial e sequencias permitem continuar de uma partição anterior
+        (ver criar_chunks_paralelo); sequencias é atualizado no lugar.
+        """
+        estado = EstadoParser(pagina_inicial, sequencias)
+        yield from self.alimentar(estado, linhas)
+        yield from self.finalizar(estado)
+
+    def alimentar(self, estado: EstadoParser, linhas: Iterable[str]) -> Iterator[ElementoRegulatorio]:
+        """
+        Continua a análise a partir de estado com mais linhas do documento e
+        produz os elementos que se fecham nelas; estado é atualizado no lugar.
+        
+        Alimentar o documento em qualquer divisão de páginas (com o estado
+        serializado e restaurado entre as partes) e chamar finalizar no fim
+        produz os mesmos elementos de iterar_elementos. O gerador deve ser
+        consumido até o fim antes de usar o estado de novo.
+        """
+        pilha, sequencias = estado.pilha, estado.sequencias
+        elemento_atual, fonte, inicio = estado.elemento_atual, estado.fonte, estado.inicio
+        classificar = self._classificar_linha
+        try:
+            for _, linha, pagina_atual, incluida in self._percorrer_linhas(linhas, estatisticas=self.estatisticas,
+                                                                           estado=estado):
+                if incluida:
+                    if fonte.tamanho > inicio:
+                        fonte.acrescentar(" ")
+                    fonte.acrescentar(linha)
+                    continue
+
+                # Identificação de elementos estruturais
+                elemento_identificado = None
+                if classificada := classificar(linha):
+                    elemento_identificado = self._criar_elemento(
+                        *classificada, linha, pagina_atual, elemento_atual, sequencias
                     )
-            
-            elif m := self.padroes['item'].match(linha):
-                elemento_identificado = ElementoRegulatorio(
-                    TipoElemento.ITEM, m.group(1).strip('.'), linha, 9, pagina_atual
-                )
-
-            # Se identificou novo elemento, salva o anterior
-            if elemento_identificado:
-                if elemento_atual:
-                    elemento_atual.texto = '\n'.join(texto_acumulado)
-                    elementos.append(elemento_atual)
-                else:
-                    # Texto antes do primeiro elemento = preâmbulo
-                    if texto_acumulado:
-                        elementos.append(
-                            ElementoRegulatorio(
+
+                # Se identificou novo elemento, fecha o anterior
+                if elemento_identificado:
+                    if elemento_atual:
+                        elemento_atual.definir_trecho(fonte, inicio, fonte.tamanho)
+                        yield elemento_atual
+                    else:
+                        # Texto antes do primeiro elemento = preâmbulo
+                        if fonte.tamanho > inicio:
+                            preambulo = ElementoRegulatorio(
                                 TipoElemento.PREAMBULO,
                                 "0",
-                                '\n'.join(texto_acumulado),
+                                "",
                                 0,
                                 1,
                                 contexto_hierarquico="Preâmbulo"
                             )
-                        )
-                
-                elemento_identificado.texto = linha
-                elemento_atual = elemento_identificado
-                texto_acumulado = [linha]
-                self._estabelecer_hierarquia(elementos + [elemento_atual])
-            else:
-                texto_acumulado.append(linha)
+                            preambulo.definir_trecho(fonte, inicio, fonte.tamanho)
+                            self._vincular(pilha, preambulo)
+                            yield preambulo
+
+                    if elemento_identificado.nivel <= 1:
+                        fonte.consolidar()
+                        fonte = FonteTexto()
+                    elif fonte.tamanho:
+                        fonte.acrescentar("\n")
+                    inicio = fonte.tamanho
+                    fonte.acrescentar(linha)
+                    elemento_identificado.definir_trecho(fonte, inicio, fonte.tamanho)
+                    elemento_atual = elemento_identificado
+                    self._vincular(pilha, elemento_atual)
+                else:
+                    if fonte.tamanho > inicio:
+                        fonte.acrescentar("\n")
+                    fonte.acrescentar(linha)
+        finally:
+            estado.elemento_atual, estado.fonte, estado.inicio = elemento_atual, fonte, inicio
+
+    def finalizar(self, estado: EstadoParser) -> Iterator[ElementoRegulatorio]:
+        """Fecha o último elemento (fim do documento)"""
+        estado.fonte.consolidar()
+        if estado.elemento_atual:
+            estado.elemento_atual.definir_trecho(estado.fonte, estado.inicio, estado.fonte.tamanho)
+            yield estado.elemento_atual
+
+    def criar_chunks_de_elementos(self, elementos: List[ElementoRegulatorio]) -> List[Dict]:
+        """
+        Última parte de criar_chunks (deduplicação e geração), para elementos
+        analisados em partes com alimentar/finalizar.
+        """
+        chunks, _ = self._gerar_chunks(self._deduplicar_elementos(elementos))
+        return chunks
+
+    def arvore_estrutura(self, chunks: List[Dict]) -> List[Dict]:
+        """
+        Árvore estrutural do documento a partir dos chunks finais: um nó por
+        elemento, na ordem do documento (os chunks de um mesmo elemento são
+        consecutivos e ficam no mesmo nó).
+
+        O pai de um nó é o elemento que passa o contexto_hierarquico do nó aos
+        filhos (ver _vincular). Se ele não gerou chunks (ex.: revogado), o nó
+        sobe para o ancestral mais próximo que gerou.
+
+        Returns:
+            Lista de {'id', 'pai', 'tipo', 'numero', 'pagina', 'chunks'};
+            pai é o id do nó pai (None na raiz) e chunks, os chunk_id do elemento
+        """
+        nos, por_contexto, anterior = [], {}, None
+        for c in chunks:
+            chave = (c['tipo'], c['numero'], c['contexto_hierarquico'])
+            if chave == anterior:
+                nos[-1]['chunks'].append(c['chunk_id'])
+                continue
+            anterior = chave
+
+            contexto, pai = c['contexto_hierarquico'], None
+            while contexto and (pai := por_contexto.get(contexto)) is None:
+                contexto = contexto.rpartition(' > ')[0]
+            no = {'id': len(nos), 'pai': pai, 'tipo': c['tipo'], 'numero': c['numero'],
+                  'pagina': c['pagina'], 'chunks': [c['chunk_id']]}
+            nos.append(no)
+
+            # Mesmo contexto dos descendentes que _vincular monta
+            base = c['contexto_hierarquico']
+            prefixo = self._prefixo_contexto(ElementoRegulatorio(TipoElemento(c['tipo']), c['numero'], "", c['nivel']))
+            if prefixo:
+                por_contexto[f"{base} > {prefixo}" if base else prefixo] = no['id']
+        return nos
+
+    # Padrão estrutural -> (tipo, nível, valida numeração sequencial)
+    ELEMENTOS_POR_PADRAO = {
+        'resolucao': (TipoElemento.RESOLUCAO, 0, False),
+        'titulo': (TipoElemento.TITULO, 1, False),
+        'capitulo': (TipoElemento.CAPITULO, 2, False),
+        'secao': (TipoElemento.SECAO, 3, False),
+        'artigo': (TipoElemento.ARTIGO, 5, True),
+        'clausula': (TipoElemento.CLAUSULA, 5, False),
+        'anexo': (TipoElemento.ANEXO, 1, False),
+        'paragrafo_unico': (TipoElemento.PARAGRAFO, 6, False),
+        'paragrafo': (TipoElemento.PARAGRAFO, 6, True),
+        'inciso': (TipoElemento.INCISO, 7, True),
+        'alinea': (TipoElemento.ALINEA, 8, True),
+        'item': (TipoElemento.ITEM, 9, False),
+    }
+
+    def _criar_elemento(
+        self,
+        padrao: str,
+        numero: str,
+        linha: str,
+        pagina: int,
+        elemento_atual: Optional[ElementoRegulatorio],
+        sequencias: Dict[str, int]
+    ) -> Optional[ElementoRegulatorio]:
+        """Cria o elemento da linha classificada, ou None se a numeração não for válida"""
+        tipo, nivel, valida = self.ELEMENTOS_POR_PADRAO[padrao]
         
-        # Salva o último elemento
-        if elemento_atual:
-            elemento_atual.texto = '\n'.join(texto_acumulado)
-            elementos.append(elemento_atual)
+        if padrao == 'clausula':
+            numero = numero.strip(':')
+        elif padrao == 'item':
+            numero = numero.strip('.')
+        elif padrao == 'paragrafo_unico':
+            numero = "único"
+        elif padrao == 'anexo':
+            # Tratamento especial para Anexo III (preâmbulo) e Anexo IV
+            if numero == "III" or (numero == "I" and "CONTRATO" in linha.upper()):
+                tipo, nivel = TipoElemento.PREAMBULO, 0
+            self._limpar_sequencias_anexo(sequencias)
+        
+        if valida and not self._validar_sequencia(tipo, numero, elemento_atual, sequencias):
+            if self.estatisticas is not None:
+                self.estatisticas.contar('rejeicoes_sequencia')
+            return None
+        return ElementoRegulatorio(tipo, numero, linha, nivel, pagina)
 
-        self._estabelecer_hierarquia(elementos)
-        return self._deduplicar_elementos(elementos)
+    @staticmethod
+    def _limpar_sequencias_anexo(sequencias: Dict[str, int]):
+        """Limpa sequências ao entrar em anexo (mantém as globais e as de anexos)"""
+        for k in list(sequencias.keys()):
+            if "|" in k and not (k.startswith("doc|") or "anexo" in k.lower()):
+                del sequencias[k]
+
+    def _contexto_sequencia(self, tipo: TipoElemento, elemento_atual: Optional[ElementoRegulatorio]) -> str:
+        """Determina o contexto para validação de sequência"""
+        nivel_alvo = self.utils.obter_nivel_por_tipo(tipo)
+        # Artigos e acima são globais
+        if nivel_alvo <= 5:
+            return "doc"
+        curr = elemento_atual
+        while curr and curr.nivel >= nivel_alvo:
+            curr = curr.pai
+        if not curr:
+            return "doc"
+        return f"{curr.contexto_hierarquico} > {curr.tipo.value}_{curr.numero}"
+
+    def _validar_sequencia(
+        self,
+        tipo: TipoElemento,
+        num_str: str,
+        elemento_atual: Optional[ElementoRegulatorio],
+        sequencias: Dict[str, int]
+    ) -> bool:
+        """Valida se a numeração está em sequência válida"""
+        if num_str == "único":
+            return True
+        
+        try:
+            # Extrai apenas o número base (ignora sufixos como -A, -B)
+            if tipo == TipoElemento.INCISO:
+                # Pega apenas os algarismos romanos, ignora sufixos
+                match = _ROMANO_INICIAL.match(num_str)
+                if not match:
+                    return True
+                num = self.utils.romano_para_valor(match.group(1))
+            elif tipo == TipoElemento.ALINEA:
+                num = ord(num_str.lower()[0]) - ord('a') + 1
+            else:
+                # Para artigos e parágrafos, pega apenas o número base
+                match = _NUMERO_INICIAL.match(num_str)
+                if not match:
+                    return True
+                num = int(match.group(1))
+            
+            key = f"{self._contexto_sequencia(tipo, elemento_atual)}|{tipo.value}"
+            ultimo = sequencias.get(key, 0)
+            
+            # Aceita se:
+            # - É o primeiro (num == 1)
+            # - É sequencial (num == ultimo + 1)
+            # - É repetição do mesmo número (num == ultimo) - para variações tipo I, I-A
+            # - É um salto pequeno (até 5) - para elementos revogados
+            if (num == 1 or num == ultimo + 1 or num == ultimo or 
+                (num > ultimo and num < ultimo + 5)):
+                # Só atualiza a sequência se for maior (para aceitar I e I-A no mesmo contexto)
+                if num > ultimo:
+                    sequencias[key] = num
+                return True
+            return False
+        except:
+            return True
 
     def _deduplicar_elementos(self, elementos: List[ElementoRegulatorio]) -> List[ElementoRegulatorio]:
         """Remove duplicatas mantendo versões mais recentes"""
+        if self.estatisticas is None:
+            return self._remover_duplicatas(elementos)
+        self.estatisticas.elementos_por_tipo.update(e.tipo.value for e in elementos)
+        with self.estatisticas.etapa('dedup'):
+            resultado = self._remover_duplicatas(elementos)
+        self.estatisticas.contar('duplicatas_removidas', len(elementos) - len(resultado))
+        return resultado
+
+    @staticmethod
+    def _substitui_versao(e: ElementoRegulatorio) -> bool:
+        """Versão que substitui as anteriores da mesma chave em _remover_duplicatas"""
+        return any(x in e.texto.lower() for x in ["redação dada", "incluído"])
+
+    def _remover_duplicatas(self, elementos: List[ElementoRegulatorio]) -> List[ElementoRegulatorio]:
         mapa_final = {}
         vistos = set()
         
@@ -275,8 +645,7 @@ class ChunkerRegulatorio:
             
             chave = f"{e.tipo.value}|{e.numero}|{e.contexto_hierarquico}"
             # Prioriza versões com "redação dada" ou "incluído"
-            if (chave not in mapa_final or 
-                any(x in e.texto.lower() for x in ["redação dada", "incluído"])):
+            if chave not in mapa_final or self._substitui_versao(e):
                 mapa_final[chave] = e
         
         resultado = []
@@ -292,49 +661,50 @@ class ChunkerRegulatorio:
         
         return resultado
 
+    # Tipos que aparecem no contexto hierárquico dos descendentes
+    TIPOS_CONTEXTO = frozenset([
+        TipoElemento.TITULO, TipoElemento.CAPITULO, TipoElemento.SECAO,
+        TipoElemento.SUBSECAO, TipoElemento.ARTIGO, TipoElemento.PARAGRAFO,
+        TipoElemento.INCISO, TipoElemento.ALINEA, TipoElemento.ITEM,
+        TipoElemento.ANEXO, TipoElemento.CLAUSULA
+    ])
+
+    def _prefixo_contexto(self, e: ElementoRegulatorio) -> str:
+        """Como o elemento aparece no contexto dos descendentes ('' se não aparece)"""
+        if e.tipo not in self.TIPOS_CONTEXTO:
+            return ""
+        # Formatação especial para alguns tipos
+        if e.tipo == TipoElemento.PARAGRAFO:
+            return "Parágrafo Único" if e.numero == "único" else f"§ {e.numero}"
+        if e.tipo == TipoElemento.INCISO:
+            return f"Inc. {e.numero}"
+        return f"{self.utils.obter_nome_exibicao(e.tipo)} {e.numero}"
+
+    def _vincular(self, pilha: List, e: ElementoRegulatorio):
+        """
+        Liga o elemento ao seu pai em O(profundidade).
+        
+        pilha guarda (elemento, contexto herdado pelos filhos) da raiz até o último
+        elemento vinculado; o contexto de cada ancestral é montado uma única vez.
+        """
+        # Remove elementos de nível maior ou igual da pilha
+        while pilha and pilha[-1][0].nivel >= e.nivel:
+            pilha.pop()
+        
+        base = ""
+        if pilha:
+            e.pai, base = pilha[-1]
+        e.contexto_hierarquico = base
+        
+        # Internado: contextos iguais (ex.: o mesmo Capítulo repetido) viram um só objeto
+        prefixo = self._prefixo_contexto(e)
+        pilha.append((e, sys.intern(f"{base} > {prefixo}" if base and prefixo else base or prefixo)))
+
     def _estabelecer_hierarquia(self, elementos: List[ElementoRegulatorio]):
         """Estabelece relações pai-filho e constrói contexto hierárquico"""
         pilha = []
-        
         for e in elementos:
-            # Remove elementos de nível maior ou igual da pilha
-            while pilha and pilha[-1].nivel >= e.nivel:
-                pilha.pop()
-            
-            # Define pai
-            if pilha:
-                e.pai = pilha[-1]
-            
-            # Constrói contexto hierárquico
-            partes = []
-            curr = e
-            while curr and curr.pai:
-                curr = curr.pai
-                if curr.tipo in [TipoElemento.TITULO, TipoElemento.CAPITULO,
-                                TipoElemento.SECAO, TipoElemento.SUBSECAO,
-                                TipoElemento.ARTIGO, TipoElemento.PARAGRAFO,
-                                TipoElemento.INCISO, TipoElemento.ALINEA,
-                                TipoElemento.ITEM, TipoElemento.ANEXO,
-                                TipoElemento.CLAUSULA]:
-                    
-                    num_display = curr.numero
-                    nome = self.utils.obter_nome_exibicao(curr.tipo)
-                    
-                    # Formatação especial para alguns tipos
-                    if curr.tipo == TipoElemento.PARAGRAFO:
-                        if num_display == "único":
-                            prefix = "Parágrafo Único"
-                        else:
-                            prefix = f"§ {num_display}"
-                    elif curr.tipo == TipoElemento.INCISO:
-                        prefix = f"Inc. {num_display}"
-                    else:
-                        prefix = f"{nome} {num_display}"
-                    
-                    partes.insert(0, prefix)
-            
-            e.contexto_hierarquico = " > ".join(partes)
-            pilha.append(e)
+            self._vincular(pilha, e)
 
     def criar_chunks(self, texto: str, verbose: bool = False) -> List[Dict]:
         """
@@ -356,55 +726,252 @@ class ChunkerRegulatorio:
             print(f" ✓ {len(elementos)} elementos identificados")
             print("📦 Gerando chunks: ", end="", flush=True)
         
+        chunks, _ = self._gerar_chunks(elementos, verbose=verbose)
+        return chunks
+
+    def criar_chunks_stream(self, paginas: Iterable[str],
+                            substituicoes_tardias: Optional[List[str]] = None) -> Iterator[Dict]:
+        """
+        Versão em streaming de criar_chunks.
+        
+        Consome as páginas uma a uma (ex.: iter_paginas_locais em ingest.py) e
+        produz os chunks de cada divisão de topo (Título, Anexo, Resolução...)
+        assim que ela se fecha, de modo que o chunking acompanha a extração.
+        A memória fica limitada à maior divisão.
+        
+        A deduplicação segue as regras de criar_chunks: cada chave
+        tipo|numero|contexto entra na posição da primeira ocorrência e as
+        repetições em divisões posteriores são descartadas. A exceção é uma
+        repetição posterior com "redação dada"/"incluído" de um elemento já
+        produzido: criar_chunks usaria o texto dela, o que o stream não pode
+        refazer. A chave vai para substituicoes_tardias; quem consome deve
+        então refazer o documento com criar_chunks.
+        
+        Args:
+            paginas: Blocos de texto, cada um iniciado por [[PAGINA:n]]
+            substituicoes_tardias: Recebe as chaves em que a saída diverge de criar_chunks
+        """
+        chunk_id, pendentes, produzidas = 0, [], set()
+        
+        def descarregar():
+            nonlocal chunk_id
+            elementos, repetidos = [], 0
+            for e in self._deduplicar_elementos(pendentes):
+                if e.tipo != TipoElemento.PREAMBULO:
+                    chave = f"{e.tipo.value}|{e.numero}|{e.contexto_hierarquico}"
+                    if chave in produzidas:
+                        repetidos += 1
+                        if substituicoes_tardias is not None and self._substitui_versao(e):
+                            substituicoes_tardias.append(chave)
+                        continue
+                    produzidas.add(chave)
+                elementos.append(e)
+            if self.estatisticas is not None:
+                self.estatisticas.contar('duplicatas_removidas', repetidos)
+            pendentes.clear()
+            chunks, chunk_id = self._gerar_chunks(elementos, chunk_id)
+            return chunks
+        
+        for e in self.iterar_elementos(self.linhas_documento(paginas)):
+            if e.nivel <= 1 and pendentes:
+                yield from descarregar()
+            pendentes.append(e)
+        yield from descarregar()
+
+    def criar_chunks_paralelo(self, texto: str, processos: Optional[int] = None) -> List[Dict]:
+        """
+        criar_chunks com limpeza, análise e geração de chunks num ProcessPoolExecutor.
+        Mesma saída da execução em série.
+        
+        1. As páginas são limpas em paralelo (a limpeza não atravessa [[PAGINA:n]]).
+        2. As linhas limpas são divididas em cada Título/Anexo (_particionar); o
+           contexto hierárquico não atravessa essas fronteiras.
+        3. Cada partição é analisada e convertida em chunks num processo, a partir
+           de um palpite para as sequências globais (ex.: último artigo aceito).
+        4. As partições são costuradas em ordem: as premissas de cada uma são
+           conferidas com o estado real das sequências e, se alguma falhar, a
+           partição é refeita aqui em série. A deduplicação roda sobre todos os
+           elementos (marcadores de topo se repetem entre partições) e chunk_id
+           é renumerado globalmente.
+        
+        Args:
+            processos: Número de processos (padrão: os.cpu_count())
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        processos = processos or os.cpu_count() or 1
+        if processos <= 1:
+            return self.criar_chunks(texto)
+        
+        paginas = _SEPARADOR_PAGINAS.split(texto)
+        tamanho = -(-len(paginas) // processos)
+        opcoes = {'tamanho_max_chunk': self.tamanho_max_chunk, 'overlap_chars': self.overlap_chars,
+                  'manter_contexto': self.manter_contexto, 'anotar_semantica': self.anotar_semantica,
+                  'agrupar_anexo_iv': self.agrupar_anexo_iv}
+        with ProcessPoolExecutor(processos, initializer=_iniciar_processo, initargs=(opcoes,)) as executor:
+            linhas = [l for bloco in executor.map(_limpar_paginas, [paginas[i:i + tamanho]
+                                                                     for i in range(0, len(paginas), tamanho)])
+                      for l in bloco]
+            particoes = self._particionar(linhas)
+            resultados = list(executor.map(_processar_particao,
+                                           [(linhas[inicio:fim], pagina) for inicio, fim, pagina, _ in particoes]))
+        
+        sequencias, elementos, chunks_por_elemento = {}, [], {}
+        for (inicio, fim, pagina, padrao), (da_particao, chunks, premissas, escritas) in zip(particoes, resultados):
+            if padrao == 'anexo':
+                self._limpar_sequencias_anexo(sequencias)
+            if all(sequencias.get(k, 0) == v for k, v in premissas.items()):
+                sequencias.update(escritas)
+            else:
+                da_particao = list(self.iterar_elementos(linhas[inicio:fim], pagina, sequencias))
+                chunks = [self._gerar_chunks([e])[0] for e in da_particao]
+            elementos.extend(da_particao)
+            chunks_por_elemento.update(zip(map(id, da_particao), chunks))
+        
+        # Deduplicação sobre o documento todo: só escolhe quais listas de chunks entram
+        resultado = []
+        for e in self._deduplicar_elementos(elementos):
+            for c in chunks_por_elemento[id(e)]:
+                c['chunk_id'] = f"chunk_{len(resultado)}"
+                resultado.append(c)
+        return resultado
+
+    def _particionar(self, linhas: List[str]) -> List[Tuple[int, int, int, Optional[str]]]:
+        """
+        Divide as linhas limpas antes de cada Título/Anexo, exceto o primeiro
+        (o texto anterior a ele pode formar o preâmbulo).
+        
+        Returns:
+            Lista de (início, fim, página inicial, padrão do marcador que abre a partição)
+        """
+        inicios = []
+        for i, linha, pagina, incluida in self._percorrer_linhas(linhas):
+            if incluida or linha[0] not in 'TtAa':
+                continue
+            classificada = self.padroes_obj.classificar_linha(linha)
+            if classificada and classificada[0] in ('titulo', 'anexo'):
+                inicios.append((i, pagina, classificada[0]))
+        
+        fronteiras = [(0, 1, None)] + inicios[1:]
+        return [(inicio, seguinte[0] if seguinte else len(linhas), pagina, padrao)
+                for (inicio, pagina, padrao), seguinte in zip(fronteiras, fronteiras[1:] + [None])]
+
+    def _processar_particao(self, linhas: List[str], pagina: int):
+        """
+        Analisa uma partição e gera os chunks de cada elemento, antes da
+        deduplicação (que depende do documento todo).
+        
+        A numeração de artigos é global: o palpite é que o primeiro artigo da
+        partição continua a sequência da anterior.
+        
+        Returns:
+            (elementos, chunks de cada elemento, premissas, escritas) — ver _SequenciasRegistradas
+        """
+        palpites = {}
+        for _, linha, _, incluida in self._percorrer_linhas(linhas):
+            classificada = None if incluida else self.padroes_obj.classificar_linha(linha)
+            if classificada and classificada[0] == 'artigo':
+                if m := _NUMERO_INICIAL.match(classificada[1]):
+                    palpites[f"doc|{TipoElemento.ARTIGO.value}"] = int(m.group(1)) - 1
+                break
+        
+        sequencias = _SequenciasRegistradas(palpites)
+        elementos = list(self.iterar_elementos(linhas, pagina, sequencias))
+        chunks = [self._gerar_chunks([e])[0] for e in elementos]
+        return elementos, chunks, sequencias.premissas, {k: sequencias[k] for k in sequencias.escritas}
+
+    def _gerar_chunks(
+        self,
+        elementos: List[ElementoRegulatorio],
+        chunk_id: int = 0,
+        verbose: bool = False
+    ):
+        """
+        Filtra elementos revogados e formata os chunks a partir de chunk_id.
+        
+        Returns:
+            (lista de chunks, próximo chunk_id)
+        """
+        if self.estatisticas is None:
+            return self._formatar_elementos(elementos, chunk_id, verbose)
+        with self.estatisticas.etapa('format'):
+            chunks, proximo = self._formatar_elementos(elementos, chunk_id, verbose)
+        self.estatisticas.contar('chunks', len(chunks))
+        return chunks, proximo
+
+    def _formatar_elementos(
+        self,
+        elementos: List[ElementoRegulatorio],
+        chunk_id: int,
+        verbose: bool
+    ):
+        total_recebidos = len(elementos)
+        
+        # e.texto decodifica o trecho da fonte a cada leitura: uma vez por elemento
+        elementos = [(e, e.texto) for e in elementos]
+        
         # Remove elementos revogados (com marcação no texto)
         elementos = [
-            e for e in elementos
-            if not self.padroes['revogado'].search(e.texto)
+            (e, texto) for e, texto in elementos
+            if not self.padroes['revogado'].search(texto)
         ]
         
         # Remove parágrafos únicos revogados (lista manual)
         elementos = [
-            e for e in elementos
+            (e, texto) for e, texto in elementos
             if not (e.tipo == TipoElemento.PARAGRAFO and 
                    e.numero == "único" and 
-                   self.padroes_obj.is_paragrafo_unico_revogado(e.texto))
+                   self.padroes_obj.is_paragrafo_unico_revogado(texto))
         ]
         
+        if self.estatisticas is not None:
+            self.estatisticas.contar('revogados_filtrados', total_recebidos - len(elementos))
+        
         chunks = []
-        chunk_id = 0
         total_elementos = len(elementos)
         
-        for idx, e in enumerate(elementos):
+        for idx, (e, texto) in enumerate(elementos):
             if verbose and idx % 10 == 0:
                 pct = (idx + 1) / total_elementos * 100
                 barra = '█' * int(pct / 5) + '░' * (20 - int(pct / 5))
                 print(f"\r📦 Gerando chunks: [{pct:5.1f}%] {barra} ({idx+1}/{total_elementos})", end="", flush=True)
             
-            # Tratamento especial para Anexo IV (linha por linha)
+            # Tratamento especial para Anexo IV (linha por linha, agrupadas até tamanho_max_chunk)
             if ("ANEXO IV" in e.contexto_hierarquico.upper() or
                 (e.tipo == TipoElemento.ANEXO and e.numero == "IV")):
-                for line in e.texto.split('\n'):
-                    if line.strip():
-                        chunks.append(
-                            self._formatar_chunk(line.strip(), e, chunk_id)
-                        )
+                linhas = [line.strip() for line in texto.split('\n') if line.strip()]
+                if not self.agrupar_anexo_iv:
+                    for line in linhas:
+                        chunks.append(self._formatar_chunk(line, e, chunk_id))
                         chunk_id += 1
+                    continue
+                grupos = self._agrupar_linhas(linhas)
+                for grupo in grupos:
+                    chunk = self._formatar_chunk('\n'.join(grupo), e, chunk_id, parte=len(grupos) > 1)
+                    # Posições relativas a chunk['texto'] (depois do prefixo de contexto)
+                    inicio = len(chunk['texto']) - chunk['tamanho']
+                    posicoes = []
+                    for line in grupo:
+                        posicoes.append(f"{inicio}-{inicio + len(line)}")
+                        inicio += len(line) + 1
+                    chunk['metadata'] = {'linhas': ','.join(posicoes)}
+                    chunks.append(chunk)
+                    chunk_id += 1
                 continue
             
             # Tratamento especial para Anexo III (completo)
             if ("ANEXO III" in e.contexto_hierarquico.upper() or
                 (e.tipo == TipoElemento.ANEXO and e.numero == "III")):
-                chunks.append(self._formatar_chunk(e.texto, e, chunk_id))
+                chunks.append(self._formatar_chunk(texto, e, chunk_id))
                 chunk_id += 1
                 continue
             
             # Marcadores estruturais curtos
             if e.tipo in [TipoElemento.TITULO, TipoElemento.CAPITULO,
                          TipoElemento.SECAO, TipoElemento.ANEXO]:
-                if len(e.texto) < 500:
+                if len(texto) < 500:
                     chunks.append(
                         self._formatar_chunk(
-                            f"MARCADOR_ESTRUTURAL: {e.texto}",
+                            f"MARCADOR_ESTRUTURAL: {texto}",
                             e,
                             chunk_id
                         )
@@ -413,12 +980,12 @@ class ChunkerRegulatorio:
                     continue
             
             # Chunk normal ou dividido
-            if len(e.texto) <= self.tamanho_max_chunk:
-                chunks.append(self._formatar_chunk(e.texto, e, chunk_id))
+            if len(texto) <= self.tamanho_max_chunk:
+                chunks.append(self._formatar_chunk(texto, e, chunk_id))
                 chunk_id += 1
             else:
                 # Divide elemento grande
-                for sub_texto in self._dividir_texto(e):
+                for sub_texto in self._dividir_texto(texto):
                     chunks.append(
                         self._formatar_chunk(sub_texto, e, chunk_id, parte=True)
                     )
@@ -427,7 +994,7 @@ class ChunkerRegulatorio:
         if verbose:
             print(f"\r📦 Gerando chunks: [100.0%] ████████████████████ ({total_elementos}/{total_elementos})")
         
-        return chunks
+        return chunks, chunk_id
 
     def _formatar_chunk(
         self,
@@ -441,7 +1008,7 @@ class ChunkerRegulatorio:
         if elemento.contexto_hierarquico:
             prefix = f"[{elemento.contexto_hierarquico}] "
         
-        return {
+        chunk = {
             'chunk_id': f"chunk_{chunk_id}",
             'texto': f"{prefix}{texto}",
             'tipo': elemento.tipo.value,
@@ -450,18 +1017,28 @@ class ChunkerRegulatorio:
             'contexto_hierarquico': elemento.contexto_hierarquico,
             'pagina': elemento.pagina,
             'tamanho': len(texto),
-            'parte_de_elemento_maior': parte,
-            'semantica': {
-                'obrigacoes': self.analisador.identificar_obrigacoes(texto),
-                'vedacoes': self.analisador.identificar_vedacoes(texto),
-                'referencias': self.analisador.extrair_referencias_cruzadas(texto),
-                'valores': self.analisador.extrair_valores_numericos(texto)
-            }
+            'parte_de_elemento_maior': parte
         }
+        if self.anotar_semantica:
+            chunk['semantica'] = self._analisar(texto)
+        return chunk
+
+    def _agrupar_linhas(self, linhas: List[str]) -> List[List[str]]:
+        """Agrupa linhas consecutivas enquanto o texto unido por '\\n' couber em tamanho_max_chunk"""
+        grupos, atual, tamanho = [], [], -1
+        for linha in linhas:
+            if atual and tamanho + 1 + len(linha) > self.tamanho_max_chunk:
+                grupos.append(atual)
+                atual, tamanho = [], -1
+            atual.append(linha)
+            tamanho += 1 + len(linha)
+        if atual:
+            grupos.append(atual)
+        return grupos
 
-    def _dividir_texto(self, elemento: ElementoRegulatorio) -> List[str]:
+    def _dividir_texto(self, texto: str) -> List[str]:
         """Divide texto grande em partes menores respeitando sentenças"""
-        sentencas = re.split(r'(?<=[.;!?])\s+', elemento.texto)
+        sentencas = re.split(r'(?<=[.;!?])\s+', texto)
         chunks = []
         atual = ""
         
@@ -482,6 +1059,46 @@ class ChunkerRegulatorio:
         return chunks
 
 
+def linhas_do_chunk(chunk: Dict) -> List[str]:
+    """
+    Linhas de um chunk agrupado do Anexo IV, pela posição gravada em
+    chunk['metadata']['linhas'] ("inicio-fim,..." sobre chunk['texto']).
+    Chunks sem agrupamento devolvem o texto sem o prefixo de contexto.
+    """
+    posicoes = chunk.get('metadata', {}).get('linhas')
+    texto = chunk['texto']
+    if not posicoes:
+        return [texto[len(texto) - chunk['tamanho']:]]
+    return [texto[int(inicio):int(fim)] for inicio, fim in
+            (p.split('-') for p in posicoes.split(','))]
+
+
+@lru_cache(maxsize=None)
+def obter_chunker(tamanho_max_chunk: int = 1200) -> ChunkerRegulatorio:
+    """
+    Chunker reaproveitado entre requisições do mesmo processo/isolate.
+    criar_chunks não guarda estado entre documentos (sem coletor de estatísticas).
+    """
+    return ChunkerRegulatorio(tamanho_max_chunk=tamanho_max_chunk)
+
+
+# Processos de criar_chunks_paralelo: um chunker por processo
+_chunker_processo: Optional[ChunkerRegulatorio] = None
+
+
+def _iniciar_processo(opcoes: Dict):
+    global _chunker_processo
+    _chunker_processo = ChunkerRegulatorio(**opcoes)
+
+
+def _limpar_paginas(paginas: List[str]) -> List[str]:
+    return list(_chunker_processo.linhas_documento(paginas))
+
+
+def _processar_particao(args):
+    return _chunker_processo._processar_particao(*args)
+
+
 # ================================================================================
 # MODO LOCAL E TESTES
 # ================================================================================
@@ -501,6 +1118,7 @@ def exportar_txt(chunks: List[Dict], path: str):
 
 if __name__ == "__main__":
     from extract_from_pdf import extract_text_from_pdf_local
+    from extraction_cache import CachePaginas
     
     pdf_local = r"c:/Users/rlazaro/Documents/Projetos_AGEMS/agems-rag-api/documentos_para_processar/REN_1000_ANEEL.pdf"
     
@@ -508,7 +1126,7 @@ if __name__ == "__main__":
         print("🚀 Processando localmente com PDFPLUMBER...")
         
         # Extrai texto do PDF
-        full_text = extract_text_from_pdf_local(pdf_local, verbose=True)
+        full_text = extract_text_from_pdf_local(pdf_local, verbose=True, cache=CachePaginas())
         
         # Salva texto bruto extraído
         raw_output_path = pdf_local.replace(".pdf", "_raw_text_extract.txt")
@@ -6,100 +6,27 @@ Este é o módulo central de processamento documental da AGEMS.
 Consolida extração de PDF, análise semântica e segmentação hierárquica.
 """
 
-import re
 import json
 import io
-import uuid
 import os
-import sys
-from typing import List, Dict, Tuple, Optional
-from dataclasses import dataclass
-from enum import Enum
-from pathlib import Path
+from typing import List
 import pdfplumber
 
+try:
+    from handlers.chunker import (ChunkerRegulatorio, EstadoParser, desserializar_elementos, exportar_txt,
+                                  obter_chunker, serializar_elementos)
+    from handlers.hierarchy_semantics import grafo_referencias
+    from handlers.near_duplicates import marcar_quase_duplicados, trocar_por_representantes
+except ImportError:  # execução local com src/handlers no sys.path
+    from chunker import (ChunkerRegulatorio, EstadoParser, desserializar_elementos, exportar_txt,
+                         obter_chunker, serializar_elementos)
+    from hierarchy_semantics import grafo_referencias
+    from near_duplicates import marcar_quase_duplicados, trocar_por_representantes
+
 # ================================================================================
 # 1. ANÁLISE SEMÂNTICA & AUXILIARES
 # ================================================================================
 
-class AnalisadorRegulatorio:
-    """Classe para análise e extração de informações regulatórias semânticas"""
-    
-    @staticmethod
-    def extrair_referencias_cruzadas(texto: str) -> List[str]:
-        """Extrai referências cruzadas a outros artigos, parágrafos ou leis"""
-        referencias = []
-        padroes = [
-            r'art(?:igo)?\.?\s+(\d+(?:-[A-Z])?)[ºo°]?',
-            r'§\s*(\d+(?:-[A-Z])?)[ºo°]?',
-            r'inciso\s+([IVXLCDM]+(?:-[A-Z])?)',
-            r'Lei\s+n[ºo°]?\s*[\d.]+/\d{4}',
-            r'Decreto\s+n[ºo°]?\s*[\d.]+/\d{4}',
-            r'Resolução\s+(?:Normativa\s+)?n[ºo°]?\s*[\d.]+/\d{4}',
-        ]
-        for padrao in padroes:
-            matches = re.finditer(padrao, texto, re.IGNORECASE)
-            referencias.extend([m.group(0) for m in matches])
-        return list(set(referencias))
-    
-    @staticmethod
-    def extrair_valores_numericos(texto: str) -> Dict[str, List]:
-        """Extrai valores numéricos importantes (potências, prazos, multas, porcentagens)"""
-        valores = {
-            'potencias_mw': [],
-            'porcentagens': [],
-            'prazos_dias': [],
-            'valores_monetarios': []
-        }
-        
-        # Potências em MW/kW
-        potencias = re.finditer(r'(\d+(?:[.,]\d+)?)\s*(?:MW|kW)', texto, re.IGNORECASE)
-        valores['potencias_mw'] = [m.group(0) for m in potencias]
-        
-        # Porcentagens
-        porcentagens = re.finditer(r'(\d+(?:[.,]\d+)?)\s*%', texto)
-        valores['porcentagens'] = [m.group(0) for m in porcentagens]
-        
-        # Prazos em dias/meses
-        prazos = re.finditer(r'(\d+)\s*(?:dias|meses)', texto, re.IGNORECASE)
-        valores['prazos_dias'] = [m.group(0) for m in prazos]
-        
-        # Valores monetários
-        monetarios = re.finditer(r'R\$\s*[\d.,]+', texto)
-        valores['valores_monetarios'] = [m.group(0) for m in monetarios]
-        
-        return valores
-    
-    @staticmethod
-    def identificar_obrigacoes(texto: str) -> List[str]:
-        """Identifica verbos e locuções que indicam obrigatoriedade"""
-        obrigacoes = []
-        padroes = [
-            r'deverá\s+[^.;]+',
-            r'é\s+obrigat[oó]rio\s+[^.;]+',
-            r'deve\s+[^.;]+',
-            r'fica\s+obrigad[oa]\s+[^.;]+',
-        ]
-        for padrao in padroes:
-            matches = re.finditer(padrao, texto, re.IGNORECASE)
-            obrigacoes.extend([m.group(0) for m in matches])
-        return obrigacoes
-    
-    @staticmethod
-    def identificar_vedacoes(texto: str) -> List[str]:
-        """Identifica proibições e vedações"""
-        vedacoes = []
-        padroes = [
-            r'não\s+poder[áa]\s+[^.;]+',
-            r'é\s+vedado\s+[^.;]+',
-            r'fica\s+proibid[oa]\s+[^.;]+',
-            r'não\s+ser[áa]\s+permitido\s+[^.;]+',
-        ]
-        for padrao in padroes:
-            matches = re.finditer(padrao, texto, re.IGNORECASE)
-            vedacoes.extend([m.group(0) for m in matches])
-        return vedacoes
-
 class OtimizadorConsultas:
     """Otimizador para expansão de termos de busca em regulação"""
     @staticmethod
@@ -123,323 +50,264 @@ class OtimizadorConsultas:
 # 2. EXTRAÇÃO DE PDF (PDFPLUMBER)
 # ================================================================================
 
-async def extract_text_from_pdf(env, r2_key, start_page=1, limit_pages=100):
-    """
-    Extrai texto de um PDF armazenado no R2 usando pdfplumber.
-    Injeta marcadores de página para preservação de metadados.
-    """
+# Tolerâncias de extração do Worker (entram, com o backend, na chave do cache de páginas)
+OPCOES_EXTRACAO_WORKER = {"x_tolerance": 2, "y_tolerance": 3}
+
+def chave_extracao_worker(backend=None):
+    """Backend + opções com que o Worker extrai o documento (conferida nos artefatos pré-extraídos)"""
+    from handlers.extraction_backends import chave_extracao
+    return chave_extracao(backend, **OPCOES_EXTRACAO_WORKER)
+
+# Teto opcional de memória Python por janela de extração (o isolate tem 128 MB no
+# total). Desligado por padrão: o tracemalloc deixa a extração de 3,5 a 5x mais
+# lenta e o pico medido numa janela de 40 páginas fica perto de 13 MB, então
+# max_pages já limita a memória. Ligue com EXTRACTION_MEMORY_MB ou memory_limit_mb no /process.
+LIMITE_MEMORIA_MB = int(os.environ["EXTRACTION_MEMORY_MB"]) if os.environ.get("EXTRACTION_MEMORY_MB") else None
+
+async def _baixar_pdf(env, r2_key):
+    """Baixa o PDF do R2 com uma única cópia JS -> Python (sem bytes() + BytesIO duplicando o buffer)"""
     obj = await env.agems_docs.get(r2_key)
     if not obj: raise Exception(f"Arquivo não encontrado: {r2_key}")
-
     from js import Uint8Array
-    pdf_bytes = bytes(Uint8Array.new(await obj.arrayBuffer()))
-    texto_acumulado = []
-    
-    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-        total_pages = len(pdf.pages)
-        end_page = min(start_page + limit_pages - 1, total_pages)
-        for i in range(start_page - 1, end_page):
-            text = pdf.pages[i].extract_text(x_tolerance=2, y_tolerance=3, layout=True)
-            if text: texto_acumulado.append(f"[[PAGINA:{i+1}]]\n{text}")
-                
-    return "\n\n".join(texto_acumulado), total_pages
+    buffer = await obj.arrayBuffer()
+    pdf_bytes = Uint8Array.new(buffer).to_bytes()
+    del buffer, obj
+    return pdf_bytes
+
+async def extract_page_window(env, r2_key, start_page=1, max_pages=40, orcamento_ms=20000, sha256=None,
+                              limite_memoria_mb=LIMITE_MEMORIA_MB, backend=None):
+    """
+    Extrai uma janela de páginas a partir de start_page, respeitando um teto de páginas,
+    um orçamento de tempo e, opcionalmente, um teto de memória. Retorna (paginas, total_pages, proxima_pagina,
+    pico_memoria_mb), onde paginas é uma lista de (numero, texto) e proxima_pagina > total_pages
+    indica fim. backend é o nome do backend de extração (None = pdfplumber-layout).
+
+    Com sha256 informado, consulta o cache de páginas no R2: se a janela inteira
+    estiver em cache, o PDF nem é baixado (pico_memoria_mb = 0).
+
+    No runtime dos Workers o relógio só avança em I/O, então max_pages é o limite efetivo;
+    o orçamento de tempo vale para execuções locais e para o pywrangler dev.
+
+    Com limite_memoria_mb, a memória é medida com tracemalloc (heap Python, incluindo os
+    bytes do PDF) e a janela termina antes do teto quando o uso atual passa do limite (ao
+    menos uma página é sempre extraída). A medição tem custo alto de CPU, por isso o padrão
+    (LIMITE_MEMORIA_MB) é None: só max_pages limita a janela e pico_memoria_mb volta None.
+    O cache de layout de cada página é liberado logo após a extração. O PDF continua
+    sendo baixado inteiro: o pdfminer precisa de seek síncrono no arquivo, o que
+    leituras por intervalo do R2 (assíncronas) não oferecem.
+    """
+    import time
+    import tracemalloc
+    from handlers.extraction_backends import obter_backend
+    from handlers.extraction_cache import hash_bytes
+    from utils.page_store import carregar_cache, salvar_cache
+    backend = obter_backend(backend, **OPCOES_EXTRACAO_WORKER)
+    opcoes = backend.chave()
+    total_cache, cache = await carregar_cache(env, sha256, opcoes) if sha256 else (None, {})
+    if total_cache:
+        fim = min(start_page - 1 + max_pages, total_cache)
+        if all(n in cache for n in range(start_page, fim + 1)):
+            print(f"DEBUG: Páginas {start_page}-{fim} servidas pelo cache")
+            return [(n, cache[n]) for n in range(start_page, fim + 1) if cache[n]], total_cache, fim + 1, 0.0
+
+    medir = limite_memoria_mb is not None and not tracemalloc.is_tracing()
+    if medir: tracemalloc.start()
+    try:
+        pdf_bytes = await _baixar_pdf(env, r2_key)
+        sha256 = sha256 or hash_bytes(pdf_bytes)
+        inicio, paginas = time.monotonic(), []
+        teto = limite_memoria_mb * 1024 * 1024 if medir else None
+
+        pdf = backend.abrir(io.BytesIO(pdf_bytes))
+        try:
+            total_pages = pdf.total_paginas
+            i = start_page - 1
+            while i < min(start_page - 1 + max_pages, total_pages):
+                text = pdf.extrair(i)
+                cache[i + 1] = text
+                if text: paginas.append((i + 1, text))
+                i += 1
+                if (time.monotonic() - inicio) * 1000 > orcamento_ms: break
+                if teto and tracemalloc.get_traced_memory()[0] > teto:
+                    print(f"WARN: Teto de memória ({limite_memoria_mb} MB) atingido na página {i}; janela encerrada")
+                    break
+        finally:
+            pdf.fechar()
+        del pdf_bytes
+        pico_mb = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1) if medir else None
+    finally:
+        if medir: tracemalloc.stop()
+
+    if pico_mb is not None:
+        print(f"METRICA extracao paginas={start_page}-{i} pico_memoria_mb={pico_mb}")
+    await salvar_cache(env, sha256, opcoes, total_pages, cache)
+    return paginas, total_pages, i + 1, pico_mb
 
 # ================================================================================
 # 3. SEGMENTAÇÃO HIERÁRQUICA (CHUNKING)
 # ================================================================================
-
-class TipoElemento(Enum):
-    PREAMBULO = "preambulo"
-    RESOLUCAO = "resolucao"
-    TITULO = "titulo"
-    CAPITULO = "capitulo"
-    SECAO = "secao"
-    SUBSECAO = "subsecao"
-    ARTIGO = "artigo"
-    PARAGRAFO = "paragrafo"
-    INCISO = "inciso"
-    ALINEA = "alinea"
-    ITEM = "item"
-    ANEXO = "anexo"
-    CLAUSULA = "clausula"
-
-@dataclass
-class ElementoRegulatorio:
-    tipo: TipoElemento
-    numero: str
-    texto: str
-    nivel: int
-    pagina: int = 1
-    revogado: bool = False
-    pai: Optional['ElementoRegulatorio'] = None
-    contexto_hierarquico: str = ""
-
-class ChunkerRegulatorio:
-    def __init__(self, tamanho_max_chunk: int = 1200, overlap_chars: int = 200, manter_contexto: bool = True):
-        self.tamanho_max_chunk = tamanho_max_chunk
-        self.overlap_chars = overlap_chars
-        self.manter_contexto = manter_contexto
-        self.analisador = AnalisadorRegulatorio()
-        self.padroes = {
-            'resolucao': re.compile(r'^RESOLUÇ[ÃãA]O\s+NORMATIVA\s+ANEEL\s+Nº\s+([\d.]+)', re.IGNORECASE | re.MULTILINE),
-            'titulo': re.compile(r'^TÍTULO\s+([IVXLCDM\dºª]+)(?:\s*[-–—]?\s*(.*))?$', re.IGNORECASE | re.MULTILINE),
-            'capitulo': re.compile(r'^CAPÍTULO\s+([IVXLCDM\dºª]+)(?:\s*[-–—]?\s*(.*))?$', re.IGNORECASE | re.MULTILINE),
-            'secao': re.compile(r'^SEÇÃO\s+([IVXLCDM\dºª]+)(?:\s*[-–—]?\s*(.*))?$', re.IGNORECASE | re.MULTILINE),
-            'subsecao': re.compile(r'^SUBSEÇÃO\s+([IVXLCDM\dºª]+)(?:\s*[-–—]?\s*(.*))?$', re.IGNORECASE | re.MULTILINE),
-            'artigo': re.compile(r'^Art\.\s*(\d+[A-Z-]*)\.?\s*(.*)$', re.IGNORECASE | re.MULTILINE),
-            'paragrafo': re.compile(r'^[§õ]\s*(\d+)[-º]*\s*(.*)$', re.MULTILINE),
-            'paragrafo_unico': re.compile(r'^Parágrafo único\.\s*(.*)$', re.IGNORECASE | re.MULTILINE),
-            'inciso': re.compile(r'^([IVXLCDM]+)\s*[–—\-]\s*(.*)$', re.MULTILINE),
-            'alinea': re.compile(r'^([a-z])\)\s*(.*)$', re.MULTILINE),
-            'item': re.compile(r'^\s*(\d+(?:\.\d+)*)\s*[\-–—.]\s*(.*)$', re.MULTILINE),
-            'anexo': re.compile(r'^ANEXO\s+([IVXLCDM]+|[0-9]+|[A-Z])\s*[-–—]?\s*(.*)$', re.IGNORECASE | re.MULTILINE),
-            'clausula': re.compile(r'^CLÁUSULA\s+([A-ZÁÉÍÓÚÀÈÌÒÙÃÕÂÊÎÔÛÇ0-9ºª]+(?:\s+[A-ZÁÉÍÓÚÀÈÌÒÙÃÕÂÊÎÔÛÇ0-9ºª]+){0,5})\s*[:–—]?\s*(.*)$', re.IGNORECASE | re.MULTILINE),
-            'revogado': re.compile(r'\((?:revogad[oa]|suprimid[oa]|exclu[íi]d[oa]|eliminad[oa])(?:[\s\S]*?)\)', re.IGNORECASE),
-            'marcador_pagina': re.compile(r'\[\[PAGINA:(\d+)\]\]', re.MULTILINE),
-            'trash': [
-                r'Este texto não substitui o (?:publicado|republicado) no Diário Oficial.*',
-                r'Publicado no DOU de \d{2}/\d{2}/\d{2}.*',
-                r'Diário Oficial da União\s?-\s?Seção\s?\d+.*',
-                r'Page \d+ of \d+.*',
-                r'^\s*\d+\s*$',
-                r'\d{2}/\d{2}/\d{2},?\s*\d{2}:\d{2}'
-            ]
-        }
-
-    def limpar_texto(self, texto: str) -> str:
-        padrões_lixo = [
-            r'(?i)ANDRÉ\s+PEPITONE\s+DA\s+NÓBREGA.*',
-            r'(?i)HÉLVIO\s+NEVES\s+GUERRA.*',
-            r'(?i)SANDRO\s+LAZZARI.*',
-            r'(?i)ÍNDICE.*',
-            r'(?i)Este texto não substitui o (?:publicado|republicado).*',
-            r'(?i)retificado no D\.O\. de .*',
-            r'(?i)\(\*\)\s*Republicado em razão de incorreções.*'
-        ]
-        for p in padrões_lixo: texto = re.sub(p, '', texto, flags=re.MULTILINE)
-        for p in self.padroes['trash']: texto = re.sub(p, '', texto, flags=re.IGNORECASE | re.MULTILINE)
-        
-        cf = {'TÃTULO': 'TÍTULO', 'CAPÃTULO': 'CAPÍTULO', 'Ã§Ã£o': 'ção', 'Ã§Ãµes': 'ções',
-              'Ã¡': 'á', 'Ã©': 'é', 'Ã­': 'í', 'Ã³': 'ó', 'Ãº': 'ú', 'Ã': 'à', 'Ãª': 'ê', 
-              'Ã´': 'ô', 'Ã§': 'ç', 'à': 'ã', '┴': 'Á', '╔': 'É', 'Ý': 'í', 
-              'þ': 'ã', 'ú': 'í', 'Ò': 'Õ', 'Ó': 'à', 'û': '–'}
-        for b, f in cf.items(): texto = texto.replace(b, f)
-        texto = re.sub(r'õ(\s*\d)', r'§\1', texto)
-        return texto.strip()
-
-    def _normalizar_estrutura(self, texto: str) -> str:
-        quebras = [r'([.;!?])\s*(TÍTULO\s+)', r'([.;!?])\s*(CAPÍTULO\s+)', r'([.;!?])\s*(SEÇÃO\s+)', 
-                   r'([.;!?])\s*(SUBSEÇÃO\s+)', r'([.;!?])\s*(CLÁUSULA\s+)']
-        for p in quebras: texto = re.sub(p, r'\1\n\2', texto)
-        texto = re.sub(r'([.;!?])\s*(ANEXO\s+[IVXLCDM0-9A-Z]+)', r'\1\n\n\2', texto)
-        texto = re.sub(r'(?m)^ *(ANEXO\s+[IVXLCDM0-9A-Z]+)', r'\n\1', texto) 
-        texto = re.sub(r'(?m)^ *(CLÁUSULA\s+)', r'\n\1', texto) 
-        return re.sub(r'([a-z0-9áàâãéêíóôõúç);:])\s+(Art\.?\s*\d+)', r'\1\n\2', texto)
-
-    def parse_documento(self, texto: str) -> List[ElementoRegulatorio]:
-        texto = self.limpar_texto(texto)
-        texto = self._normalizar_estrutura(texto)
-        elementos, linhas = [], texto.split('\n')
-        elemento_atual, texto_acumulado, pagina_atual, sequencias = None, [], 1, {}
-
-        for linha in linhas:
-            linha = linha.strip()
-            if not linha: continue
-            if m_pag := self.padroes['marcador_pagina'].match(linha):
-                pagina_atual = int(m_pag.group(1))
-                continue
-
-            elemento_id = None
-            def romano_v(s):
-                val = {'I': 1, 'V': 5, 'X': 10, 'L': 50, 'C': 100, 'D': 500, 'M': 1000}
-                res, s = 0, s.upper()
-                for i in range(len(s)):
-                    if i > 0 and val[s[i]] > val[s[i-1]]: res += val[s[i]] - 2 * val[s[i-1]]
-                    else: res += val[s[i]]
-                return res
-
-            def get_ctx(tipo):
-                niv = {TipoElemento.RESOLUCAO: 0, TipoElemento.TITULO: 1, TipoElemento.ANEXO: 1,
-                       TipoElemento.CAPITULO: 2, TipoElemento.SECAO: 3, TipoElemento.SUBSECAO: 4, 
-                       TipoElemento.ARTIGO: 5, TipoElemento.CLAUSULA: 5, TipoElemento.PARAGRAFO: 6, 
-                       TipoElemento.INCISO: 7, TipoElemento.ALINEA: 8, TipoElemento.ITEM: 9}
-                n_alvo = niv.get(tipo, 10)
-                # Artigos e acima são globais (Título, Capítulo, Seção etc)
-                # Para evitar cortes em documentos longos onde a numeração se mantém única
-                if n_alvo <= 5: return "doc"
-                curr = elemento_atual
-                while curr and curr.nivel >= n_alvo: curr = curr.pai
-                if not curr: return "doc"
-                return f"{curr.contexto_hierarquico} > {curr.tipo.value}_{curr.numero}"
-
-            def val_seq(tipo, num_str):
-                if num_str == "único": return True
-                try: 
-                    if tipo == TipoElemento.INCISO: num = romano_v(re.findall(r'[IVXLCDM]+', num_str, re.I)[0])
-                    elif tipo == TipoElemento.ALINEA: num = ord(num_str.lower()[0]) - ord('a') + 1
-                    else: num = int(re.findall(r'\d+', num_str)[0])
-                    key = f"{get_ctx(tipo)}|{tipo.value}"
-                    ult = sequencias.get(key, 0)
-                    # Permite saltos de até 5 para ser leniente com documentos irregulares
-                    if num == 1 or num == ult + 1 or num == ult or (num > ult and num < ult + 5):
-                        sequencias[key] = num
-                        return True
-                    return False
-                except: return True 
-
-            if m := self.padroes['resolucao'].match(linha):
-                elemento_id = ElementoRegulatorio(TipoElemento.RESOLUCAO, m.group(1), linha, 0, pagina_atual)
-            elif m := self.padroes['titulo'].match(linha):
-                elemento_id = ElementoRegulatorio(TipoElemento.TITULO, m.group(1), linha, 1, pagina_atual)
-            elif m := self.padroes['capitulo'].match(linha):
-                elemento_id = ElementoRegulatorio(TipoElemento.CAPITULO, m.group(1), linha, 2, pagina_atual)
-            elif m := self.padroes['secao'].match(linha):
-                elemento_id = ElementoRegulatorio(TipoElemento.SECAO, m.group(1), linha, 3, pagina_atual)
-            elif m := self.padroes['artigo'].match(linha):
-                if val_seq(TipoElemento.ARTIGO, m.group(1)):
-                    elemento_id = ElementoRegulatorio(TipoElemento.ARTIGO, m.group(1), linha, 5, pagina_atual)
-            elif m := self.padroes['clausula'].match(linha):
-                elemento_id = ElementoRegulatorio(TipoElemento.CLAUSULA, m.group(1).strip(':'), linha, 5, pagina_atual)
-            elif m := self.padroes['anexo'].match(linha):
-                if m.group(1) == "III" or (m.group(1) == "I" and "CONTRATO" in linha.upper()):
-                    elemento_id = ElementoRegulatorio(TipoElemento.PREAMBULO, m.group(1), linha, 0, pagina_atual)
-                else:
-                    elemento_id = ElementoRegulatorio(TipoElemento.ANEXO, m.group(1), linha, 1, pagina_atual)
-                for k in list(sequencias.keys()): 
-                    if "|" in k and not (k.startswith("doc|") or "anexo" in k.lower()): del sequencias[k]
-            elif m := self.padroes['paragrafo_unico'].match(linha):
-                elemento_id = ElementoRegulatorio(TipoElemento.PARAGRAFO, "único", linha, 6, pagina_atual)
-            elif m := self.padroes['paragrafo'].match(linha):
-                if val_seq(TipoElemento.PARAGRAFO, m.group(1)):
-                    elemento_id = ElementoRegulatorio(TipoElemento.PARAGRAFO, m.group(1), linha, 6, pagina_atual)
-            elif m := self.padroes['inciso'].match(linha):
-                if val_seq(TipoElemento.INCISO, m.group(1)):
-                    elemento_id = ElementoRegulatorio(TipoElemento.INCISO, m.group(1), linha, 7, pagina_atual)
-            elif m := self.padroes['alinea'].match(linha):
-                if val_seq(TipoElemento.ALINEA, m.group(1)):
-                    elemento_id = ElementoRegulatorio(TipoElemento.ALINEA, m.group(1), linha, 8, pagina_atual)
-            elif m := self.padroes['item'].match(linha):
-                elemento_id = ElementoRegulatorio(TipoElemento.ITEM, m.group(1).strip('.'), linha, 9, pagina_atual)
-
-            if elemento_id:
-                if elemento_atual: 
-                    elemento_atual.texto = '\n'.join(texto_acumulado)
-                    elementos.append(elemento_atual)
-                else:
-                    if texto_acumulado:
-                        elementos.append(ElementoRegulatorio(TipoElemento.PREAMBULO, "0", '\n'.join(texto_acumulado), 0, 1, contexto_hierarquico="Preâmbulo"))
-                elemento_id.texto = linha
-                elemento_atual, texto_acumulado = elemento_id, [linha]
-                self._estabelecer_hierarquia(elementos + [elemento_atual])
-            else:
-                texto_acumulado.append(linha)
-        
-        if elemento_atual: 
-            elemento_atual.texto = '\n'.join(texto_acumulado)
-            elementos.append(elemento_atual)
-            
-        self._estabelecer_hierarquia(elementos)
-        return self._deduplicar_elementos(elementos)
-
-    def _deduplicar_elementos(self, elementos):
-        mapa_final, vistos = {}, set()
-        for e in elementos:
-            if e.tipo == TipoElemento.PREAMBULO: continue
-            chave = f"{e.tipo.value}|{e.numero}|{e.contexto_hierarquico}"
-            if chave not in mapa_final or any(x in e.texto.lower() for x in ["redação dada", "incluído"]):
-                mapa_final[chave] = e
-        
-        res = []
-        for e in elementos:
-            if e.tipo == TipoElemento.PREAMBULO:
-                res.append(e)
-                continue
-            chave = f"{e.tipo.value}|{e.numero}|{e.contexto_hierarquico}"
-            if chave not in vistos:
-                res.append(mapa_final[chave])
-                vistos.add(chave)
-        return res
-
-    def _estabelecer_hierarquia(self, elementos):
-        pilha, nomes = [], {
-            TipoElemento.TITULO: "Título", TipoElemento.CAPITULO: "Capítulo",
-            TipoElemento.SECAO: "Seção", TipoElemento.SUBSECAO: "Subseção", TipoElemento.ARTIGO: "Artigo",
-            TipoElemento.PARAGRAFO: "Parágrafo", TipoElemento.INCISO: "Inciso", TipoElemento.ALINEA: "Alínea",
-            TipoElemento.ITEM: "Item", TipoElemento.ANEXO: "Anexo", TipoElemento.CLAUSULA: "Cláusula"
-        }
-        for e in elementos:
-            while pilha and pilha[-1].nivel >= e.nivel: pilha.pop()
-            if pilha: e.pai = pilha[-1]
-            parts, curr = [], e
-            while curr and curr.pai:
-                curr = curr.pai
-                if curr.tipo in nomes:
-                    num_display = curr.numero
-                    prefix = f"{nomes[curr.tipo]} {num_display}"
-                    if curr.tipo == TipoElemento.PARAGRAFO: prefix = f"§ {num_display}" if num_display != "único" else "Parágrafo Único"
-                    elif curr.tipo == TipoElemento.INCISO: prefix = f"Inc. {num_display}"
-                    parts.insert(0, prefix)
-            e.contexto_hierarquico = " > ".join(parts)
-            pilha.append(e)
-
-    def criar_chunks(self, texto: str) -> List[Dict]:
-        elementos = [e for e in self.parse_documento(texto) if not self.padroes['revogado'].search(e.texto)]
-        chunks, chunk_id = [], 0
-        for e in elementos:
-            if "ANEXO IV" in e.contexto_hierarquico.upper() or (e.tipo == TipoElemento.ANEXO and e.numero == "IV"):
-                for line in e.texto.split('\n'):
-                    if line.strip():
-                        chunks.append(self._formatar_chunk(line.strip(), e, chunk_id))
-                        chunk_id += 1
-                continue
-            if "ANEXO III" in e.contexto_hierarquico.upper() or (e.tipo == TipoElemento.ANEXO and e.numero == "III"):
-                chunks.append(self._formatar_chunk(e.texto, e, chunk_id))
-                chunk_id += 1
-                continue
-            if e.tipo in [TipoElemento.TITULO, TipoElemento.CAPITULO, TipoElemento.SECAO, TipoElemento.ANEXO]:
-                if len(e.texto) < 500:
-                    chunks.append(self._formatar_chunk(f"MARCADOR_ESTRUTURAL: {e.texto}", e, chunk_id))
-                    chunk_id += 1
-                    continue
-            if len(e.texto) <= self.tamanho_max_chunk:
-                chunks.append(self._formatar_chunk(e.texto, e, chunk_id))
-                chunk_id += 1
-            else:
-                for sub in self._dividir_texto(e):
-                    chunks.append(self._formatar_chunk(sub, e, chunk_id, parte=True))
-                    chunk_id += 1
-        return chunks
-
-    def _formatar_chunk(self, texto, e, cid, parte=False):
-        prefix = f"[{e.contexto_hierarquico}] " if e.contexto_hierarquico else ""
-        return {'chunk_id': f"chunk_{cid}", 'texto': f"{prefix}{texto}", 'tipo': e.tipo.value, 'numero': e.numero,
-                'nivel': e.nivel, 'contexto_hierarquico': e.contexto_hierarquico, 'pagina': e.pagina,
-                'tamanho': len(texto), 'parte_de_elemento_maior': parte,
-                'semantica': {'obrigacoes': self.analisador.identificar_obrigacoes(texto),
-                             'vedacoes': self.analisador.identificar_vedacoes(texto),
-                             'referencias': self.analisador.extrair_referencias_cruzadas(texto),
-                             'valores': self.analisador.extrair_valores_numericos(texto)}}
-
-    def _dividir_texto(self, e):
-        sentencas = re.split(r'(?<=[.;!?])\s+', e.texto)
-        chunks, atual = [], ""
-        for s in sentencas:
-            if len(atual) + len(s) > self.tamanho_max_chunk:
-                if atual: chunks.append(atual)
-                atual = s
-            else: atual += (' ' if atual else '') + s
-        if atual: chunks.append(atual)
-        return chunks
+# O motor é o de chunker.py (ver imports acima), o mesmo da execução local;
+# os handlers usam obter_chunker() para reaproveitar a instância entre requisições.
 
 # ================================================================================
 # 4. HANDLERS E UTILITÁRIOS DE EXECUÇÃO
 # ================================================================================
 
+def _cursor_vazio(pdf_etag, versao):
+    return {"pdf_etag": pdf_etag, "versao_chunker": versao, "janelas": [], "elementos": []}
+
+def _ler_cursor(doc, pdf_etag, versao):
+    """
+    Cursor de extração salvo no D1. Recomeça do zero se o PDF ou o chunker
+    (versao = chunker.versao) mudou desde a extração.
+    """
+    estado = json.loads(doc.get("parser_state") or "{}")
+    if estado.get("pdf_etag") != pdf_etag or estado.get("versao_chunker") != versao:
+        return 0, _cursor_vazio(pdf_etag, versao)
+    return doc.get("last_page") or 0, estado
+
+async def _salvar_cursor(env, document_id, last_page, total_pages, estado, status):
+    await env.agems_rag_db.prepare(
+        "UPDATE documents SET last_page = ?, total_pages = ?, parser_state = ?, status = ? WHERE id = ?"
+    ).bind(last_page, total_pages, json.dumps(estado), status, document_id).run()
+
+def _analisar_janela(estado, paginas):
+    """
+    Continua o parse com a janela recém-extraída, a partir do estado do parser
+    salvo no cursor (estado["parser"], atualizado no lugar), e devolve os
+    elementos fechados nela serializados.
+
+    Devolve None (e etapa_chunkar refaz o parse a partir das janelas) se o
+    cursor é anterior ao parse incremental ou foi salvo por outra versão do chunker.
+    """
+    if estado["janelas"] and "parser" not in estado:
+        return None
+    try:
+        parser = EstadoParser.de_dict(estado["parser"]) if estado["janelas"] else EstadoParser()
+    except ValueError as e:
+        print(f"WARN: {e}; o parse será refeito a partir das janelas")
+        del estado["parser"]
+        return None
+    from utils.page_store import blocos_paginas
+    chunker = obter_chunker()
+    elementos = serializar_elementos(chunker.alimentar(parser, chunker.linhas_documento(blocos_paginas(paginas))))
+    estado["parser"] = parser.como_dict()
+    return elementos
+
+def _retomar_elementos(parser_salvo, elementos_salvos):
+    """Elementos do parse incremental, com o último fechado; None se o parse deve ser refeito"""
+    try:
+        parser = EstadoParser.de_dict(parser_salvo)
+    except ValueError:
+        return None
+    elementos = desserializar_elementos(elementos_salvos)
+    elementos.extend(obter_chunker().finalizar(parser))
+    return elementos
+
+async def etapa_extrair(env, doc, pdf_etag, max_pages=40, orcamento_ms=20000, limite_memoria_mb=LIMITE_MEMORIA_MB):
+    """
+    Extrai a próxima janela de páginas e avança o cursor no D1.
+    Retorna (concluido, proxima_pagina, total_pages, paginas_extraidas, pico_memoria_mb).
+
+    Se houver um artefato pré-extraído do mesmo PDF (documents/{id}.pages.jsonl),
+    as páginas vêm dele e o pdfplumber não roda; a janela e o cursor são os
+    mesmos (max_pages por etapa), para o parse não concentrar o documento
+    inteiro numa só mensagem.
+    O cursor guarda a extração das janelas (estado["extracao"]): se o artefato
+    chegou depois de janelas extraídas aqui com outro backend ou outras opções
+    (chave_extracao_worker), a extração recomeça da página 1 pelo artefato,
+    sem misturar as duas extrações.
+
+    A janela já passa pelo parser (retomado do estado salvo no cursor): os
+    elementos fechados vão para o R2 ao lado das páginas e etapa_chunkar só
+    deduplica e gera os chunks.
+    """
+    from utils.page_store import salvar_janela, salvar_elementos, carregar_artefato, remover_janelas
+    versao = obter_chunker().versao
+    last_page, estado = _ler_cursor(doc, pdf_etag, versao)
+    if last_page and not estado["janelas"]:
+        # Extração já consumida por um etapa_chunkar cujo manifesto não existe mais
+        print(f"WARN: Cursor de {doc['id']} sem janelas na página {last_page}; extração recomeça do início")
+        last_page = 0
+    artefato = await carregar_artefato(env, doc["r2_key"], doc.get("sha256"))
+    do_worker = chave_extracao_worker(doc.get("extraction_backend"))
+    extracao = artefato[2] if artefato else do_worker
+    if last_page and estado.get("extracao", do_worker) != extracao:
+        print(f"WARN: Páginas 1-{last_page} de {doc['id']} extraídas com {estado.get('extracao', do_worker)}; "
+              f"descartadas e extração recomeça com {extracao}")
+        await remover_janelas(env, estado["janelas"] + estado.get("elementos", []))
+        last_page, estado = 0, _cursor_vazio(pdf_etag, versao)
+    estado["extracao"] = extracao
+    if artefato:
+        total_pages, todas, _ = artefato
+        fim = min(last_page + max_pages, total_pages)
+        paginas, proxima, pico_mb = [(n, t) for n, t in todas if last_page < n <= fim], fim + 1, 0.0
+        print(f"DEBUG: Páginas {last_page + 1}-{fim} servidas pelo artefato pré-extraído")
+    else:
+        paginas, total_pages, proxima, pico_mb = await extract_page_window(
+            env, doc["r2_key"], last_page + 1, max_pages, orcamento_ms, doc.get("sha256"), limite_memoria_mb,
+            doc.get("extraction_backend"))
+    elementos = _analisar_janela(estado, paginas)
+    if elementos is not None:
+        estado.setdefault("elementos", []).append(await salvar_elementos(env, doc["id"], last_page + 1, elementos))
+    estado["janelas"].append(await salvar_janela(env, doc["id"], last_page + 1, paginas))
+    await _salvar_cursor(env, doc["id"], proxima - 1, total_pages, estado, 'extracting')
+    doc.update({"last_page": proxima - 1, "total_pages": total_pages, "parser_state": json.dumps(estado)})
+    return proxima > total_pages, proxima, total_pages, proxima - 1 - last_page, pico_mb
+
+def _detectar_quase_duplicados(env):
+    """Variável NEAR_DUPLICATES do Worker ("true"/"1"): liga near_duplicates em etapa_chunkar"""
+    return str(getattr(env, "NEAR_DUPLICATES", "") or "").lower() in ("1", "true")
+
+async def etapa_chunkar(env, doc, pdf_etag, chunker):
+    """
+    Gera o manifesto, a árvore estrutural e o grafo de referências a partir dos
+    elementos analisados na extração (ou, se o parse incremental não cobriu
+    todas as janelas, do texto remontado) e limpa as janelas. Com a variável
+    NEAR_DUPLICATES ligada, os quase duplicados são marcados no manifesto.
+
+    Sem janelas no cursor (mensagem reentregue depois da limpeza) devolve o
+    manifesto já gravado, ou None se ele não existir: a extração deve recomeçar.
+    """
+    from utils.manifest import carregar_fatia_manifesto, salvar_manifesto
+    from utils.page_store import carregar_elementos, carregar_paginas, remover_janelas, montar_texto
+    from utils.structure_store import salvar_arvore, salvar_referencias
+    _, estado = _ler_cursor(doc, pdf_etag, chunker.versao)
+    if not estado["janelas"]:
+        # Reentrega depois das janelas removidas: o manifesto já gravado vale; sem ele, None
+        # (quem chamou recomeça pela extração em vez de gravar um manifesto vazio)
+        manifesto = await carregar_fatia_manifesto(env, doc["id"], chunker.versao, pdf_etag, 0, None)
+        return manifesto[0] if manifesto else None
+    elementos = None
+    if "parser" in estado and len(estado.get("elementos", [])) == len(estado["janelas"]):
+        elementos = _retomar_elementos(estado["parser"], await carregar_elementos(env, estado["elementos"]))
+    if elementos is not None:
+        chunks = chunker.criar_chunks_de_elementos(elementos)
+    else:
+        chunks = chunker.criar_chunks(montar_texto(await carregar_paginas(env, estado["janelas"])))
+    if _detectar_quase_duplicados(env):
+        aliases = marcar_quase_duplicados(chunks)
+        print(f"DEBUG: {aliases} de {len(chunks)} chunks são quase duplicados (não vetorizados)")
+    await salvar_manifesto(env, doc["id"], chunker.versao, pdf_etag, chunks)
+    nos = chunker.arvore_estrutura(chunks)
+    arestas = grafo_referencias(chunks, nos)
+    trocar_por_representantes(chunks, nos, arestas)
+    await salvar_arvore(env, doc["id"], nos)
+    await salvar_referencias(env, doc["id"], arestas)
+    await remover_janelas(env, estado["janelas"] + estado.get("elementos", []))
+    await _salvar_cursor(env, doc["id"], doc.get("total_pages") or 0, doc.get("total_pages"),
+                         _cursor_vazio(pdf_etag, chunker.versao), 'processing')
+    return chunks
+
+async def atualizar_progresso(env, document_id, status, chunk_count):
+    await env.agems_rag_db.prepare("UPDATE documents SET status = ?, chunk_count = ? WHERE id = ?").bind(status, chunk_count, document_id).run()
+
 async def handle_process(request, env):
     try:
-        from js import JSON
+        from js import JSON, Response
         from pyodide.ffi import to_js
         from utils.vectorize import process_and_vectorize_chunks
+        from utils.manifest import obter_etag, carregar_fatia_manifesto
         body = (await request.json()).to_py()
         document_id = body.get("document_id")
         start_chunk = body.get("start_chunk", 0)
@@ -447,16 +315,30 @@ async def handle_process(request, env):
         if not document_id: return Response.new(json.dumps({"error": "document_id is required"}), to_js({"status": 400}))
         doc_result = (await env.agems_rag_db.prepare("SELECT * FROM documents WHERE id = ?").bind(document_id).first()).to_py()
         if not doc_result: return Response.new(json.dumps({"error": "Document not found"}), to_js({"status": 404}))
-        full_text, total_pages = await extract_text_from_pdf(env, doc_result["r2_key"], limit_pages=100)
-        chunker = ChunkerRegulatorio()
-        chunks = chunker.criar_chunks(full_text)
-        processed = await process_and_vectorize_chunks(env, document_id, doc_result, chunks, start_chunk, limit_chunks)
-        total = len(chunks)
-        current = start_chunk + processed
+        headers = JSON.parse(json.dumps({"headers": {"Content-Type": "application/json"}}))
+        chunker = obter_chunker()
+        pdf_etag = await obter_etag(env, doc_result["r2_key"])
+        # Lotes seguintes leem só a fatia do manifesto; o primeiro (ou após mudança no PDF/chunker) o gera
+        fatia = await carregar_fatia_manifesto(env, document_id, chunker.versao, pdf_etag, start_chunk, limit_chunks)
+        if fatia is None:
+            # Extração em janelas de páginas: cada chamada avança o cursor salvo no D1
+            concluido, proxima, total_pages, _, pico_mb = await etapa_extrair(
+                env, doc_result, pdf_etag, body.get("max_pages", 40), body.get("time_budget_ms", 20000),
+                body.get("memory_limit_mb", LIMITE_MEMORIA_MB))
+            if not concluido:
+                return Response.new(json.dumps({"success": True, "stage": "extracting", "next_page": proxima,
+                                                "total_pages": total_pages, "memory_peak_mb": pico_mb, "is_finished": False,
+                                                "total_processed": start_chunk, "chunks_in_batch": 0}), headers)
+            chunks = await etapa_chunkar(env, doc_result, pdf_etag, chunker)
+            lote, total = chunks[start_chunk:start_chunk + limit_chunks], len(chunks)
+        else:
+            lote, total = fatia
+        # Avança pela posição no manifesto: quase duplicados e embeddings inválidos não geram vetor
+        vetores = await process_and_vectorize_chunks(env, document_id, doc_result, lote, indice_base=start_chunk)
+        current = start_chunk + len(lote)
         finished = current >= total
-        status = 'processed' if finished else 'processing'
-        await env.agems_rag_db.prepare("UPDATE documents SET status = ?, chunk_count = ? WHERE id = ?").bind(status, current, document_id).run()
-        return Response.new(json.dumps({"success": True, "total_processed": current, "total_chunks": total, "is_finished": finished, "chunks_in_batch": processed}), JSON.parse(json.dumps({"headers": {"Content-Type": "application/json"}})))
+        await atualizar_progresso(env, document_id, 'processed' if finished else 'processing', current)
+        return Response.new(json.dumps({"success": True, "stage": "vectorizing", "total_processed": current, "total_chunks": total, "is_finished": finished, "chunks_in_batch": len(lote), "vectors_in_batch": vetores}), headers)
     except Exception as e:
         import traceback
         return Response.new(json.dumps({"error": str(e), "trace": traceback.format_exc()}), to_js({"status": 500}))
@@ -479,13 +361,6 @@ async def handle_add_chunks(request, env):
 # 5. MODO LOCAL E TESTES
 # ================================================================================
 
-def exportar_txt(chunks: List[Dict], path: str):
-    with open(path, "w", encoding="utf-8") as f:
-        f.write("RELATÓRIO DE CHUNKS CONSOLIDADO\n" + "="*80 + "\n")
-        for c in chunks:
-            f.write(f"\nCHUNK {c['chunk_id']} | PÁG: {c['pagina']} | TIPO: {c['tipo']}\n")
-            f.write(f"CONTEXTO: {c['contexto_hierarquico']}\n" + "-"*80 + f"\n{c['texto']}\n")
-
 if __name__ == "__main__":
     pdf_local = r"c:/Users/rlazaro/Documents/Projetos_AGEMS/agems-rag-api/documentos_para_processar/REN_1000_ANEEL.pdf"
     if os.path.exists(pdf_local):
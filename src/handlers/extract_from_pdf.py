@@ -3,10 +3,208 @@ Módulo de Extração de Texto de PDF
 Responsável por processar PDFs e converter para texto com marcadores de página
 """
 
-import pdfplumber
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterator, List, Optional
 
+try:
+    from handlers.extraction_backends import BackendExtracao, obter_backend
+except ImportError:  # execução local com src/handlers no sys.path
+    from extraction_backends import BackendExtracao, obter_backend
+try:
+    from handlers.extraction_cache import CachePaginas, hash_arquivo
+except ImportError:  # execução local com src/handlers no sys.path
+    from extraction_cache import CachePaginas, hash_arquivo
 
-def extract_text_from_pdf_local(pdf_path: str, verbose: bool = True) -> str:
+
+PREPOSICOES_CURTAS = ['de', 'da', 'do', 'em', 'ou', 'e', 'a', 'o', 'à', 'ao']
+
+
+def deve_juntar(ultima_linha: str, primeira_linha: str) -> bool:
+    """
+    Decide se a primeira linha de uma página continua a última linha da página anterior.
+    
+    Args:
+        ultima_linha: Última linha não vazia da página anterior (já com strip)
+        primeira_linha: Primeira linha não vazia da página atual (já com strip)
+    """
+    if not (ultima_linha and primeira_linha):
+        return False
+    
+    # Caso 1: Última linha não termina com pontuação e primeira não começa com maiúscula/número
+    if (not ultima_linha.endswith(('.', ';', ':', '!', '?', ')')) and
+        not primeira_linha[0].isupper() and
+        not primeira_linha[0].isdigit()):
+        return True
+    
+    # Caso 2: Última linha termina com preposição ou conjunção curta
+    ultima_palavra = ultima_linha.split()[-1].lower().rstrip(',;')
+    if ultima_palavra in PREPOSICOES_CURTAS:
+        return True
+    
+    # Caso 3: Primeira linha começa com data/número entre parênteses (continuação de referência)
+    if primeira_linha.startswith(('0', '1', '2', '3', '4', '5', '6', '7', '8', '9')) and ')' in primeira_linha[:15]:
+        return True
+    
+    return False
+
+
+def _mesclar_pagina(parte_anterior: str, texto: str) -> Optional[str]:
+    """
+    Se a primeira linha da página continua a última linha da parte anterior,
+    devolve a parte anterior com a página emendada; senão, None.
+    """
+    linhas_anteriores = parte_anterior.split('\n')
+    
+    # Pega a última linha da página anterior (ignorando vazias)
+    ultima_linha = ''
+    for linha in reversed(linhas_anteriores):
+        if linha.strip():
+            ultima_linha = linha.strip()
+            break
+    
+    # Pega a primeira linha da página atual (ignorando vazias)
+    primeira_linha = ''
+    for linha in texto.split('\n'):
+        if linha.strip():
+            primeira_linha = linha.strip()
+            break
+    
+    if deve_juntar(ultima_linha, primeira_linha):
+        # Junta as linhas removendo a quebra
+        texto_anterior_sem_ultima = '\n'.join(linhas_anteriores[:-1])
+        return texto_anterior_sem_ultima + '\n' + ultima_linha + ' ' + texto
+    return None
+
+
+def _juntar_pagina(text_parts: List[str], numero: int, texto: str):
+    """Acrescenta a página em text_parts, juntando com a anterior se a linha foi quebrada"""
+    if numero > 1 and text_parts:
+        mesclada = _mesclar_pagina(text_parts[-1], texto)
+        if mesclada is not None:
+            text_parts[-1] = mesclada
+            return
+    
+    text_parts.append(f"[[PAGINA:{numero}]]\n{texto}")
+
+
+def _imprimir_progresso(feitas: int, total: int):
+    pct = feitas / total * 100
+    barra = '█' * int(pct / 5) + '░' * (20 - int(pct / 5))
+    print(
+        f"\r📄 Extraindo texto: página {feitas}/{total} "
+        f"[{pct:5.1f}%] {barra}",
+        end="",
+        flush=True
+    )
+
+
+def _extrair_pagina(pdf, i: int, sha256: Optional[str], cache: Optional[CachePaginas]) -> str:
+    """Texto da página i (base 0), consultando o cache antes de rodar o backend"""
+    if cache:
+        texto = cache.obter(sha256, i + 1, pdf.backend.chave())
+        if texto is not None:
+            return texto
+    texto = pdf().extrair(i)
+    if cache:
+        cache.salvar(sha256, i + 1, pdf.backend.chave(), texto)
+    return texto
+
+
+class _PdfPreguicoso:
+    """Só abre o PDF se alguma página não estiver no cache"""
+    def __init__(self, pdf_path: str, backend: BackendExtracao):
+        self.pdf_path, self.backend, self.pdf = pdf_path, backend, None
+    
+    def __call__(self):
+        if self.pdf is None:
+            self.pdf = self.backend.abrir(self.pdf_path)
+        return self.pdf
+    
+    def fechar(self):
+        if self.pdf is not None:
+            self.pdf.fechar()
+
+
+def _extrair_intervalo(pdf_path: str, inicio: int, fim: int, sha256: Optional[str] = None,
+                       diretorio_cache: Optional[str] = None,
+                       backend: Optional[BackendExtracao] = None) -> List[str]:
+    """Extrai as páginas [inicio, fim) (base 0). Executado em cada processo do pool."""
+    cache = CachePaginas(diretorio_cache) if diretorio_cache else None
+    pdf = _PdfPreguicoso(pdf_path, backend or obter_backend())
+    try:
+        return [_extrair_pagina(pdf, i, sha256, cache) for i in range(inicio, fim)]
+    finally:
+        pdf.fechar()
+
+
+def _contar_paginas(pdf_path: str, backend: BackendExtracao) -> int:
+    pdf = backend.abrir(pdf_path)
+    try:
+        return pdf.total_paginas
+    finally:
+        pdf.fechar()
+
+
+def _extrair_paralelo(pdf_path: str, workers: int, verbose: bool, total_paginas: int,
+                      sha256: Optional[str], cache: Optional[CachePaginas],
+                      backend: BackendExtracao) -> List[str]:
+    """Divide as páginas em faixas contíguas, uma por tarefa, e devolve os textos em ordem"""
+    # Algumas faixas a mais que processos para balancear páginas mais pesadas
+    n_faixas = min(total_paginas, workers * 4) or 1
+    passo = -(-total_paginas // n_faixas)
+    faixas = [(i, min(i + passo, total_paginas)) for i in range(0, total_paginas, passo)]
+    diretorio_cache = cache.diretorio if cache else None
+    
+    resultados, feitas = {}, 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futuros = {executor.submit(_extrair_intervalo, pdf_path, a, b, sha256, diretorio_cache, backend): a
+                   for a, b in faixas}
+        for futuro in as_completed(futuros):
+            resultados[futuros[futuro]] = futuro.result()
+            feitas += len(resultados[futuros[futuro]])
+            if verbose:
+                _imprimir_progresso(feitas, total_paginas)
+    
+    return [t for a, _ in faixas for t in resultados[a]]
+
+
+def iter_paginas_pdf_local(pdf_path: str, verbose: bool = False, cache: Optional[CachePaginas] = None,
+                           backend: Optional[BackendExtracao] = None) -> Iterator[str]:
+    """
+    Gera o texto do PDF página a página (cada bloco iniciado por [[PAGINA:n]]),
+    para alimentar ChunkerRegulatorio.criar_chunks_stream sem montar o documento inteiro.
+    
+    Um bloco só é produzido depois que a página seguinte é lida, pois ela pode
+    ser emendada nele. "\n\n".join(blocos) é igual a extract_text_from_pdf_local.
+    """
+    backend = backend or obter_backend()
+    sha256 = hash_arquivo(pdf_path) if cache else None
+    total_paginas = _contar_paginas(pdf_path, backend)
+    pdf = _PdfPreguicoso(pdf_path, backend)
+    pendente = None
+    try:
+        for i in range(total_paginas):
+            if verbose:
+                _imprimir_progresso(i + 1, total_paginas)
+            texto = _extrair_pagina(pdf, i, sha256, cache)
+            if pendente is not None and i > 0:
+                mesclada = _mesclar_pagina(pendente, texto)
+                if mesclada is not None:
+                    pendente = mesclada
+                    continue
+                yield pendente
+            pendente = f"[[PAGINA:{i + 1}]]\n{texto}"
+        if pendente is not None:
+            yield pendente
+    finally:
+        pdf.fechar()
+        if verbose:
+            print()
+
+
+def extract_text_from_pdf_local(pdf_path: str, verbose: bool = True, workers: int = 1,
+                                cache: Optional[CachePaginas] = None,
+                                backend: Optional[BackendExtracao] = None) -> str:
     """
     Extrai texto de um PDF local com animação de progresso.
     Junta linhas quebradas por mudança de página para evitar fragmentação.
@@ -14,75 +212,29 @@ def extract_text_from_pdf_local(pdf_path: str, verbose: bool = True) -> str:
     Args:
         pdf_path: Caminho do arquivo PDF
         verbose: Se True, mostra progresso no terminal
+        workers: Processos para extração em paralelo (1 = serial). Cada processo
+            abre o PDF e extrai uma faixa de páginas; a junção entre páginas
+            roda depois, em ordem, e o resultado é idêntico ao serial.
+        cache: Cache de páginas (chave: SHA-256 do PDF + página + backend/opções).
+            Páginas em cache não passam pelo backend.
+        backend: Backend de extração (padrão: pdfplumber-layout, ver extraction_backends.py)
         
     Returns:
         str: Texto extraído com marcadores de página
     """
-    with pdfplumber.open(pdf_path) as pdf:
-        total_paginas = len(pdf.pages)
+    backend = backend or obter_backend()
+    if workers > 1:
         text_parts = []
-        
-        for i, p in enumerate(pdf.pages):
-            if verbose:
-                pct = (i + 1) / total_paginas * 100
-                barra = '█' * int(pct / 5) + '░' * (20 - int(pct / 5))
-                print(
-                    f"\r📄 Extraindo texto: página {i+1}/{total_paginas} "
-                    f"[{pct:5.1f}%] {barra}",
-                    end="",
-                    flush=True
-                )
-            
-            texto = p.extract_text(layout=True) or ''
-            
-            # Se não é a primeira página, verifica se deve juntar com a anterior
-            if i > 0 and text_parts:
-                ultima_parte = text_parts[-1]
-                linhas_anteriores = ultima_parte.split('\n')
-                
-                # Pega a última linha da página anterior (ignorando vazias)
-                ultima_linha = ''
-                for linha in reversed(linhas_anteriores):
-                    if linha.strip():
-                        ultima_linha = linha.strip()
-                        break
-                
-                # Pega a primeira linha da página atual (ignorando vazias)
-                primeira_linha = ''
-                for linha in texto.split('\n'):
-                    if linha.strip():
-                        primeira_linha = linha.strip()
-                        break
-                
-                # Verifica se deve juntar as linhas
-                deve_juntar = False
-                
-                if ultima_linha and primeira_linha:
-                    # Caso 1: Última linha não termina com pontuação e primeira não começa com maiúscula/número
-                    if (not ultima_linha.endswith(('.', ';', ':', '!', '?', ')')) and
-                        not primeira_linha[0].isupper() and
-                        not primeira_linha[0].isdigit()):
-                        deve_juntar = True
-                    
-                    # Caso 2: Última linha termina com preposição ou conjunção curta
-                    preposicoes_curtas = ['de', 'da', 'do', 'em', 'ou', 'e', 'a', 'o', 'à', 'ao']
-                    ultima_palavra = ultima_linha.split()[-1].lower().rstrip(',;')
-                    if ultima_palavra in preposicoes_curtas:
-                        deve_juntar = True
-                    
-                    # Caso 3: Primeira linha começa com data/número entre parênteses (continuação de referência)
-                    if primeira_linha.startswith(('0', '1', '2', '3', '4', '5', '6', '7', '8', '9')) and ')' in primeira_linha[:15]:
-                        deve_juntar = True
-                
-                if deve_juntar:
-                    # Junta as linhas removendo a quebra
-                    texto_anterior_sem_ultima = '\n'.join(linhas_anteriores[:-1])
-                    text_parts[-1] = texto_anterior_sem_ultima + '\n' + ultima_linha + ' ' + texto
-                    continue
-            
-            text_parts.append(f"[[PAGINA:{i+1}]]\n{texto}")
-        
+        sha256 = hash_arquivo(pdf_path) if cache else None
+        textos = _extrair_paralelo(pdf_path, workers, verbose, _contar_paginas(pdf_path, backend),
+                                   sha256, cache, backend)
+        for i, texto in enumerate(textos):
+            _juntar_pagina(text_parts, i + 1, texto)
         if verbose:
             print()  # Nova linha após a barra de progresso
-            
-        return "\n\n".join(text_parts)
\ No newline at end of file
+    else:
+        text_parts = list(iter_paginas_pdf_local(pdf_path, verbose=verbose, cache=cache, backend=backend))
+        if verbose and cache:
+            print(f"🗄️  Cache de páginas: {cache.acertos} acertos, {cache.faltas} extraídas")
+        
+    return "\n\n".join(text_parts)
@@ -0,0 +1,202 @@
+"""
+Backends de extração de texto de PDF.
+
+Cada backend abre um PDF (caminho ou arquivo em memória) e devolve o texto de
+uma página por vez. A chave do backend entra na chave do cache de páginas, então
+trocar de backend nunca reaproveita texto extraído pelo outro.
+
+- pdfplumber-layout: extract_text(layout=True). Preserva o alinhamento das
+  colunas e é o padrão usado para gerar os relatórios de referência. Lento.
+- pdfminer-texto: lê o fluxo de caracteres do interpretador do pdfminer e só
+  agrupa por linha de base (sem reconstrução de layout e sem os objetos por
+  caractere do pdfplumber). Saída equivalente a extract_text_simple, ~3x mais rápido.
+
+O backend é escolhido por documento (coluna documents.extraction_backend).
+Comparação de vazão e qualidade: testes_validacao/benchmark_backends_extracao.py
+"""
+
+from typing import Dict, List, Optional, Tuple, Type
+
+import pdfplumber
+
+try:
+    from handlers.extraction_cache import chave_opcoes
+except ImportError:  # execução local com src/handlers no sys.path
+    from extraction_cache import chave_opcoes
+
+
+class DocumentoPdf:
+    """PDF aberto por um backend: total_paginas + extrair(i) (base 0)"""
+    total_paginas: int = 0
+
+    def extrair(self, i: int) -> str:
+        raise NotImplementedError
+
+    def fechar(self):
+        pass
+
+
+class BackendExtracao:
+    """Interface dos backends. As tolerâncias seguem a semântica do pdfplumber."""
+    nome = ""
+
+    def __init__(self, x_tolerance: float = 3, y_tolerance: float = 3):
+        self.x_tolerance = x_tolerance
+        self.y_tolerance = y_tolerance
+
+    def chave(self) -> str:
+        """Identifica backend + opções no cache de páginas"""
+        raise NotImplementedError
+
+    def abrir(self, fonte) -> DocumentoPdf:
+        """fonte: caminho do arquivo ou objeto binário com seek (ex.: io.BytesIO)"""
+        raise NotImplementedError
+
+
+# ================================================================================
+# PDFPLUMBER COM LAYOUT
+# ================================================================================
+
+class _DocumentoPdfplumber(DocumentoPdf):
+    def __init__(self, fonte, opcoes: Dict):
+        self.pdf = pdfplumber.open(fonte)
+        self.opcoes = opcoes
+        self.total_paginas = len(self.pdf.pages)
+
+    def extrair(self, i: int) -> str:
+        page = self.pdf.pages[i]
+        texto = page.extract_text(**self.opcoes) or ''
+        page.close()  # libera o cache de objetos/layout da página
+        return texto
+
+    def fechar(self):
+        self.pdf.close()
+
+
+class BackendPdfplumberLayout(BackendExtracao):
+    nome = "pdfplumber-layout"
+
+    def chave(self) -> str:
+        # Mesma chave usada antes dos backends: o cache existente continua válido
+        return chave_opcoes(layout=True, x_tolerance=self.x_tolerance, y_tolerance=self.y_tolerance)
+
+    def abrir(self, fonte) -> DocumentoPdf:
+        return _DocumentoPdfplumber(fonte, {"layout": True, "x_tolerance": self.x_tolerance,
+                                            "y_tolerance": self.y_tolerance})
+
+
+# ================================================================================
+# PDFMINER: FLUXO DE CARACTERES SEM LAYOUT
+# ================================================================================
+
+def _montar_linhas(caracteres: List[Tuple[float, float, float, str]],
+                   x_tolerance: float, y_tolerance: float) -> str:
+    """
+    caracteres: (linha de base, x0, x1, texto). Agrupa de cima para baixo por linha
+    de base e insere espaço quando o vão entre caracteres passa de x_tolerance.
+    """
+    caracteres.sort(key=lambda c: (-c[0], c[1]))
+    linhas, grupo, base = [], [], None
+    for c in caracteres:
+        if base is None or base - c[0] > y_tolerance:
+            if grupo: linhas.append(grupo)
+            grupo, base = [], c[0]
+        grupo.append(c)
+    if grupo: linhas.append(grupo)
+
+    saida = []
+    for grupo in linhas:
+        grupo.sort(key=lambda c: c[1])
+        partes, fim_anterior = [], None
+        for _, x0, x1, texto in grupo:
+            if (fim_anterior is not None and x0 - fim_anterior > x_tolerance
+                    and partes[-1] != ' ' and texto != ' '):
+                partes.append(' ')
+            partes.append(texto)
+            fim_anterior = x1
+        saida.append(''.join(partes))
+    return '\n'.join(saida)
+
+
+def _criar_coletor():
+    """Dispositivo do pdfminer que só anota posição e texto de cada caractere"""
+    from pdfminer.pdfdevice import PDFTextDevice
+    from pdfminer.pdffont import PDFUnicodeNotDefined
+
+    class ColetorCaracteres(PDFTextDevice):
+        def __init__(self, rsrcmgr):
+            super().__init__(rsrcmgr)
+            self.caracteres = []
+
+        def render_char(self, matrix, font, fontsize, scaling, rise, cid, ncs, graphicstate):
+            try:
+                texto = font.to_unichr(cid)
+            except PDFUnicodeNotDefined:
+                texto = ''
+            avanco = font.char_width(cid) * fontsize * scaling
+            a, _, _, _, e, f = matrix
+            self.caracteres.append((f, e, e + a * avanco, texto))
+            return avanco
+
+    return ColetorCaracteres
+
+
+class _DocumentoPdfminer(DocumentoPdf):
+    def __init__(self, fonte, x_tolerance: float, y_tolerance: float):
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfinterp import PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfparser import PDFParser
+
+        self.arquivo = open(fonte, 'rb') if isinstance(fonte, str) else None
+        documento = PDFDocument(PDFParser(self.arquivo or fonte))
+        self.paginas = list(PDFPage.create_pages(documento))
+        self.total_paginas = len(self.paginas)
+        self.recursos = PDFResourceManager(caching=True)
+        self.coletor = _criar_coletor()
+        self.x_tolerance, self.y_tolerance = x_tolerance, y_tolerance
+
+    def extrair(self, i: int) -> str:
+        from pdfminer.pdfinterp import PDFPageInterpreter
+        dispositivo = self.coletor(self.recursos)
+        PDFPageInterpreter(self.recursos, dispositivo).process_page(self.paginas[i])
+        return _montar_linhas(dispositivo.caracteres, self.x_tolerance, self.y_tolerance)
+
+    def fechar(self):
+        if self.arquivo:
+            self.arquivo.close()
+
+
+class BackendTextoPdfminer(BackendExtracao):
+    nome = "pdfminer-texto"
+
+    def chave(self) -> str:
+        return f"texto_x={self.x_tolerance:g}_y={self.y_tolerance:g}"
+
+    def abrir(self, fonte) -> DocumentoPdf:
+        return _DocumentoPdfminer(fonte, self.x_tolerance, self.y_tolerance)
+
+
+# ================================================================================
+# REGISTRO
+# ================================================================================
+
+BACKENDS: Dict[str, Type[BackendExtracao]] = {
+    BackendPdfplumberLayout.nome: BackendPdfplumberLayout,
+    BackendTextoPdfminer.nome: BackendTextoPdfminer,
+}
+BACKEND_PADRAO = BackendPdfplumberLayout.nome
+
+
+def obter_backend(nome: Optional[str] = None, **tolerancias) -> BackendExtracao:
+    """Instancia o backend pelo nome (None = padrão). Nome desconhecido gera ValueError."""
+    nome = nome or BACKEND_PADRAO
+    if nome not in BACKENDS:
+        raise ValueError(f"Backend de extração desconhecido: {nome} (opções: {', '.join(BACKENDS)})")
+    return BACKENDS[nome](**tolerancias)
+
+
+def chave_extracao(nome: Optional[str] = None, **tolerancias) -> str:
+    """Backend + opções (ex.: pdfplumber-layout/layout=1_x=2_y=3): páginas com chaves diferentes não se misturam"""
+    backend = obter_backend(nome, **tolerancias)
+    return f"{backend.nome}/{backend.chave()}"
@@ -0,0 +1,68 @@
+"""
+Cache persistente de texto extraído por página.
+
+A chave é o SHA-256 do PDF + o número da página + as opções de extração
+(layout, x_tolerance, y_tolerance). Se nem o PDF nem as opções mudaram,
+o texto da página é reaproveitado e o pdfplumber não roda de novo, o que
+deixa os experimentos de regex no chunker (PadroesRegulatorios, LimpadorTexto)
+restritos ao custo do próprio chunking.
+
+Local: um arquivo por página em disco (CachePaginas).
+Worker: um objeto JSON Lines por PDF no R2 (ver utils/page_store.py).
+"""
+
+import hashlib
+import os
+from typing import Optional
+
+DIRETORIO_PADRAO = os.environ.get(
+    "AGEMS_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "agems-rag", "paginas")
+)
+
+
+def chave_opcoes(layout: bool = True, x_tolerance: float = 3, y_tolerance: float = 3) -> str:
+    """Representação estável das opções de extração (os padrões são os do pdfplumber)"""
+    return f"layout={int(bool(layout))}_x={x_tolerance:g}_y={y_tolerance:g}"
+
+
+def hash_bytes(dados: bytes) -> str:
+    return hashlib.sha256(dados).hexdigest()
+
+
+def hash_arquivo(path: str, bloco: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for parte in iter(lambda: f.read(bloco), b''):
+            h.update(parte)
+    return h.hexdigest()
+
+
+class CachePaginas:
+    """Cache em disco: {diretorio}/{sha256}/{opcoes}/{pagina:06d}.txt"""
+    
+    def __init__(self, diretorio: str = DIRETORIO_PADRAO):
+        self.diretorio = diretorio
+        self.acertos = 0
+        self.faltas = 0
+    
+    def _caminho(self, sha256: str, pagina: int, opcoes: str) -> str:
+        return os.path.join(self.diretorio, sha256, opcoes, f"{pagina:06d}.txt")
+    
+    def obter(self, sha256: str, pagina: int, opcoes: str) -> Optional[str]:
+        try:
+            with open(self._caminho(sha256, pagina, opcoes), encoding='utf-8', newline='') as f:
+                self.acertos += 1
+                return f.read()
+        except FileNotFoundError:
+            self.faltas += 1
+            return None
+    
+    def salvar(self, sha256: str, pagina: int, opcoes: str, texto: str):
+        caminho = self._caminho(sha256, pagina, opcoes)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        # Escrita atômica: vários processos podem extrair o mesmo PDF ao mesmo tempo
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, 'w', encoding='utf-8', newline='') as f:
+            f.write(texto)
+        os.replace(temporario, caminho)
@@ -4,8 +4,7 @@ Otimizado para Resoluções ANEEL e textos legais brasileiros
 """
 
 import re
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
 from enum import Enum
 
 
@@ -14,82 +13,194 @@ from enum import Enum
 # ================================================================================
 
 class AnalisadorRegulatorio:
-    """Classe para análise e extração de informações regulatórias semânticas"""
-    
-    @staticmethod
-    def extrair_referencias_cruzadas(texto: str) -> List[str]:
-        """Extrai referências cruzadas a outros artigos, parágrafos ou leis"""
-        referencias = []
-        padroes = [
-            r'art(?:igo)?\.?\s+(\d+(?:-[A-Z])?)[ºo°]?',
-            r'§\s*(\d+(?:-[A-Z])?)[ºo°]?',
-            r'inciso\s+([IVXLCDM]+(?:-[A-Z])?)',
-            r'Lei\s+n[ºo°]?\s*[\d.]+/\d{4}',
-            r'Decreto\s+n[ºo°]?\s*[\d.]+/\d{4}',
-            r'Resolução\s+(?:Normativa\s+)?n[ºo°]?\s*[\d.]+/\d{4}',
-        ]
-        for padrao in padroes:
-            matches = re.finditer(padrao, texto, re.IGNORECASE)
-            referencias.extend([m.group(0) for m in matches])
-        return list(set(referencias))
-    
-    @staticmethod
-    def extrair_valores_numericos(texto: str) -> Dict[str, List]:
-        """Extrai valores numéricos importantes (potências, prazos, multas, porcentagens)"""
-        valores = {
-            'potencias_mw': [],
-            'porcentagens': [],
-            'prazos_dias': [],
-            'valores_monetarios': []
+    """
+    Classe para análise e extração de informações regulatórias semânticas.
+
+    Todos os padrões são varridos numa única passada (analisar). Cada padrão
+    mantém a semântica de um re.finditer próprio: os achados de padrões
+    diferentes podem se sobrepor (ex.: o "art. 5" dentro de uma obrigação).
+    """
+
+    # (categoria, padrão), na ordem em que os achados de cada categoria são listados
+    PADROES = [
+        ('obrigacoes', r'(?i:deverá\s+[^.;]+)'),
+        ('obrigacoes', r'(?i:é\s+obrigat[oó]rio\s+[^.;]+)'),
+        ('obrigacoes', r'(?i:deve\s+[^.;]+)'),
+        ('obrigacoes', r'(?i:fica\s+obrigad[oa]\s+[^.;]+)'),
+        ('vedacoes', r'(?i:não\s+poder[áa]\s+[^.;]+)'),
+        ('vedacoes', r'(?i:é\s+vedado\s+[^.;]+)'),
+        ('vedacoes', r'(?i:fica\s+proibid[oa]\s+[^.;]+)'),
+        ('vedacoes', r'(?i:não\s+ser[áa]\s+permitido\s+[^.;]+)'),
+        ('referencias', r'(?i:art(?:igo)?\.?\s+\d+(?:-[A-Z])?[ºo°]?)'),
+        ('referencias', r'(?i:§\s*\d+(?:-[A-Z])?[ºo°]?)'),
+        ('referencias', r'(?i:inciso\s+[IVXLCDM]+(?:-[A-Z])?)'),
+        ('referencias', r'(?i:Lei\s+n[ºo°]?\s*[\d.]+/\d{4})'),
+        ('referencias', r'(?i:Decreto\s+n[ºo°]?\s*[\d.]+/\d{4})'),
+        ('referencias', r'(?i:Resolução\s+(?:Normativa\s+)?n[ºo°]?\s*[\d.]+/\d{4})'),
+        # Um achado que começa depois de outro dígito já estaria dentro do achado
+        # iniciado no dígito anterior: (?<!\d) só poupa tentativas
+        ('potencias_mw', r'(?<!\d)(?i:\d+(?:[.,]\d+)?\s*(?:MW|kW))'),
+        ('porcentagens', r'(?<!\d)\d+(?:[.,]\d+)?\s*%'),
+        ('prazos_dias', r'(?<!\d)(?i:\d+\s*(?:dias|meses))'),
+        ('valores_monetarios', r'R\$\s*[\d.,]+'),
+    ]
+    VALORES = ('potencias_mw', 'porcentagens', 'prazos_dias', 'valores_monetarios')
+
+    # Todo padrão começa por um destes caracteres; o filtro evita testar a
+    # alternação inteira em cada posição do texto
+    _varredura = re.compile(
+        r'(?=[dDéÉfFnNaAiIlLrR§0-9])(?=' +
+        '|'.join(f'(?P<p{i}>{padrao})' for i, (_, padrao) in enumerate(PADROES)) + ')')
+
+    @classmethod
+    def analisar(cls, texto: str) -> Dict:
+        """
+        Obrigações, vedações, referências cruzadas e valores numéricos do texto
+        numa única passada.
+
+        Returns:
+            {'obrigacoes', 'vedacoes', 'referencias', 'valores': {...}}
+        """
+        achados = [[] for _ in cls.PADROES]
+        fim = [0] * len(cls.PADROES)
+        for m in cls._varredura.finditer(texto):
+            i = int(m.lastgroup[1:])
+            if m.start() < fim[i]:  # sobreposto ao achado anterior do mesmo padrão
+                continue
+            valor = m.group(m.lastgroup)
+            achados[i].append(valor)
+            fim[i] = m.start() + len(valor)
+
+        por_categoria = {}
+        for (categoria, _), lista in zip(cls.PADROES, achados):
+            por_categoria.setdefault(categoria, []).extend(lista)
+        return {
+            'obrigacoes': por_categoria['obrigacoes'],
+            'vedacoes': por_categoria['vedacoes'],
+            'referencias': list(dict.fromkeys(por_categoria['referencias'])),
+            'valores': {v: por_categoria[v] for v in cls.VALORES},
         }
-        
-        # Potências em MW/kW
-        potencias = re.finditer(r'(\d+(?:[.,]\d+)?)\s*(?:MW|kW)', texto, re.IGNORECASE)
-        valores['potencias_mw'] = [m.group(0) for m in potencias]
-        
-        # Porcentagens
-        porcentagens = re.finditer(r'(\d+(?:[.,]\d+)?)\s*%', texto)
-        valores['porcentagens'] = [m.group(0) for m in porcentagens]
-        
-        # Prazos em dias/meses
-        prazos = re.finditer(r'(\d+)\s*(?:dias|meses)', texto, re.IGNORECASE)
-        valores['prazos_dias'] = [m.group(0) for m in prazos]
-        
-        # Valores monetários
-        monetarios = re.finditer(r'R\$\s*[\d.,]+', texto)
-        valores['valores_monetarios'] = [m.group(0) for m in monetarios]
-        
-        return valores
-    
-    @staticmethod
-    def identificar_obrigacoes(texto: str) -> List[str]:
+
+    @classmethod
+    def extrair_referencias_cruzadas(cls, texto: str) -> List[str]:
+        """Extrai referências cruzadas a outros artigos, parágrafos ou leis (sem repetição)"""
+        return cls.analisar(texto)['referencias']
+
+    @classmethod
+    def extrair_valores_numericos(cls, texto: str) -> Dict[str, List]:
+        """Extrai valores numéricos importantes (potências, prazos, multas, porcentagens)"""
+        return cls.analisar(texto)['valores']
+
+    @classmethod
+    def identificar_obrigacoes(cls, texto: str) -> List[str]:
         """Identifica verbos e locuções que indicam obrigatoriedade"""
-        obrigacoes = []
-        padroes = [
-            r'deverá\s+[^.;]+',
-            r'é\s+obrigat[oó]rio\s+[^.;]+',
-            r'deve\s+[^.;]+',
-            r'fica\s+obrigad[oa]\s+[^.;]+',
-        ]
-        for padrao in padroes:
-            matches = re.finditer(padrao, texto, re.IGNORECASE)
-            obrigacoes.extend([m.group(0) for m in matches])
-        return obrigacoes
-    
-    @staticmethod
-    def identificar_vedacoes(texto: str) -> List[str]:
+        return cls.analisar(texto)['obrigacoes']
+
+    @classmethod
+    def identificar_vedacoes(cls, texto: str) -> List[str]:
         """Identifica proibições e vedações"""
-        vedacoes = []
-        padroes = [
-            r'não\s+poder[áa]\s+[^.;]+',
-            r'é\s+vedado\s+[^.;]+',
-            r'fica\s+proibid[oa]\s+[^.;]+',
-            r'não\s+ser[áa]\s+permitido\s+[^.;]+',
-        ]
-        for padrao in padroes:
-            matches = re.finditer(padrao, texto, re.IGNORECASE)
-            vedacoes.extend([m.group(0) for m in matches])
-        return vedacoes
+        return cls.analisar(texto)['vedacoes']
+
+
+def texto_sem_contexto(chunk: Dict) -> str:
+    """Texto do chunk sem o prefixo "[contexto] " adicionado por _formatar_chunk"""
+    contexto = chunk.get('contexto_hierarquico')
+    texto = chunk['texto']
+    return texto[len(contexto) + 3:] if contexto and texto.startswith(f"[{contexto}] ") else texto
+
+
+def anotar_semantica(chunks: List[Dict], processos: int = 1) -> List[Dict]:
+    """
+    Preenche chunk['semantica'] nos chunks que ainda não têm a anotação.
+
+    A anotação é opcional (o pipeline do Worker não a usa); quem precisa dela
+    chama esta função. Com processos > 1 os chunks são analisados num
+    ProcessPoolExecutor (execução local em lote).
+    """
+    pendentes = [c for c in chunks if 'semantica' not in c]
+    textos = [texto_sem_contexto(c) for c in pendentes]
+    if processos > 1 and len(textos) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            lote = max(1, len(textos) // (processos * 4))
+            resultados = list(executor.map(AnalisadorRegulatorio.analisar, textos, chunksize=lote))
+    else:
+        resultados = map(AnalisadorRegulatorio.analisar, textos)
+    for c, semantica in zip(pendentes, resultados):
+        c['semantica'] = semantica
+    return chunks
+
+
+# Referências a elementos do próprio documento: rótulo, número e sufixo (-A)
+_REFERENCIA_INTERNA = re.compile(r'(?i)(art(?:igo)?\.?|§|inciso)\s*(\d+|[IVXLCDM]+)(-[A-Z])?')
+_TIPO_REFERENCIA = {'§': 'paragrafo', 'inciso': 'inciso'}  # demais rótulos: artigo
+# "... do art. 67", "... do caput do art. 35", "... do § 2º": a quem o parágrafo/inciso citado pertence
+_ANCORA_REFERENCIA = re.compile(r'\s+d[oa]\s+(?:caput\s+d[oa]\s+)?(art(?:igo)?\.?\s*\d+(?:-[A-Z])?|§\s*\d+)', re.I)
+
+
+def grafo_referencias(chunks: List[Dict], nos: List[Dict]) -> List[Dict]:
+    """
+    Arestas de referência cruzada entre elementos do documento, a partir de
+    AnalisadorRegulatorio.extrair_referencias_cruzadas em cada chunk.
+
+    nos é a árvore de ChunkerRegulatorio.arvore_estrutura(chunks). Resolução:
+    - art. N: o artigo N da mesma divisão de topo (ou o primeiro do documento);
+    - § N / inciso N: filho do elemento citado logo em seguida ("do art. 67"),
+      senão do artigo (ou, para incisos, do parágrafo) que contém o trecho;
+    - Lei, Decreto e Resolução: normas externas, sem alvo.
+    Referências internas não resolvidas e as do elemento a si mesmo (o rótulo
+    "§ 2º" no início do próprio parágrafo) são descartadas.
+
+    Returns:
+        Lista de {'chunk_id', 'origem', 'alvo', 'referencia'}; origem e alvo
+        são ids de nós (alvo None para normas externas)
+    """
+    filhos, artigos, raiz = {}, {}, []
+    for no in nos:
+        filhos.setdefault((no['pai'], no['tipo'], no['numero']), no['id'])
+        if no['tipo'] == 'artigo':
+            artigos.setdefault(no['numero'], []).append(no['id'])
+        # O pai vem antes do filho na lista
+        raiz.append(no['id'] if no['pai'] is None else raiz[no['pai']])
+    no_do_chunk = {c: no['id'] for no in nos for c in no['chunks']}
+
+    def ancestrais(origem, tipos):
+        while origem is not None:
+            if nos[origem]['tipo'] in tipos:
+                yield origem
+            origem = nos[origem]['pai']
+
+    def resolver(referencia, origem, texto=None):
+        m = _REFERENCIA_INTERNA.match(referencia)
+        rotulo, numero, sufixo = m.groups()
+        numero = numero.upper() + (sufixo or '').upper()
+        tipo = _TIPO_REFERENCIA.get(rotulo.lower(), 'artigo')
+        if tipo == 'artigo':
+            candidatos = artigos.get(numero, [])
+            return next((i for i in candidatos if raiz[i] == raiz[origem]), candidatos[0] if candidatos else None)
+        pos = texto.find(referencia) if texto else -1
+        if pos >= 0 and (ancora := _ANCORA_REFERENCIA.match(texto, pos + len(referencia))):
+            pais = [resolver(ancora.group(1), origem)]
+        else:
+            pais = ancestrais(origem, ('paragrafo', 'artigo') if tipo == 'inciso' else ('artigo',))
+        return next((filhos[(p, tipo, numero)] for p in pais if (p, tipo, numero) in filhos), None)
+
+    arestas = []
+    for c in chunks:
+        origem = no_do_chunk[c['chunk_id']]
+        texto = texto_sem_contexto(c)
+        referencias = (c['semantica']['referencias'] if 'semantica' in c
+                       else AnalisadorRegulatorio.extrair_referencias_cruzadas(texto))
+        vistas = set()
+        for referencia in referencias:
+            interna = _REFERENCIA_INTERNA.match(referencia) is not None
+            alvo = resolver(referencia, origem, texto) if interna else None
+            rotulo = ' '.join(referencia.split())
+            if (interna and alvo in (None, origem)) or (alvo, rotulo) in vistas:
+                continue
+            vistas.add((alvo, rotulo))
+            arestas.append({'chunk_id': c['chunk_id'], 'origem': origem, 'alvo': alvo, 'referencia': rotulo})
+    return arestas
 
 
 class OtimizadorConsultas:
@@ -134,17 +245,91 @@ class TipoElemento(Enum):
     CLAUSULA = "clausula"
 
 
-@dataclass
+class FonteTexto:
+    """
+    Buffer do texto limpo de um trecho do documento: as linhas aceitas pelo
+    parser, na ordem, unidas por '\n' (ou ' ' nas linhas de resolução
+    transcrita). Os elementos guardam só o intervalo do seu texto no buffer.
+    
+    Guardado em UTF-8: numa str, um único caractere fora do Latin-1 (ex.: '–')
+    dobraria o tamanho do trecho inteiro. Os intervalos são em bytes.
+    Recebe as partes enquanto o parser avança e as junta em consolidar().
+    """
+    __slots__ = ('_dados', '_partes', 'tamanho')
+
+    def __init__(self, texto: str = ""):
+        self._dados = texto.encode('utf-8')
+        self._partes = []
+        self.tamanho = len(self._dados)
+
+    def acrescentar(self, parte: str):
+        dados = parte.encode('utf-8')
+        self._partes.append(dados)
+        self.tamanho += len(dados)
+
+    def consolidar(self):
+        """Junta as partes pendentes num só buffer (e libera as linhas avulsas)"""
+        if self._partes:
+            self._dados += b''.join(self._partes)
+            self._partes.clear()
+
+    def trecho(self, inicio: int, fim: int) -> str:
+        self.consolidar()
+        return self._dados[inicio:fim].decode('utf-8')
+
+
 class ElementoRegulatorio:
-    """Representa um elemento da estrutura hierárquica do documento"""
-    tipo: TipoElemento
-    numero: str
-    texto: str
-    nivel: int
-    pagina: int = 1
-    revogado: bool = False
-    pai: Optional['ElementoRegulatorio'] = None
-    contexto_hierarquico: str = ""
+    """
+    Representa um elemento da estrutura hierárquica do documento.
+    
+    O texto não é copiado para o elemento: fica como um intervalo de uma
+    FonteTexto e só é materializado quando texto é lido (ex.: ao gerar o chunk).
+    Atribuir texto cria uma fonte própria com a string.
+    """
+    __slots__ = ('tipo', 'numero', 'nivel', 'pagina', 'revogado', 'pai',
+                 'contexto_hierarquico', 'fonte', '_intervalo')
+
+    def __init__(
+        self,
+        tipo: TipoElemento,
+        numero: str,
+        texto: str,
+        nivel: int,
+        pagina: int = 1,
+        revogado: bool = False,
+        pai: Optional['ElementoRegulatorio'] = None,
+        contexto_hierarquico: str = ""
+    ):
+        self.tipo = tipo
+        self.numero = numero
+        self.texto = texto
+        self.nivel = nivel
+        self.pagina = pagina
+        self.revogado = revogado
+        self.pai = pai
+        self.contexto_hierarquico = contexto_hierarquico
+
+    @property
+    def texto(self) -> str:
+        return self.fonte.trecho(*self.intervalo)
+
+    @texto.setter
+    def texto(self, texto: str):
+        fonte = FonteTexto(texto)
+        self.definir_trecho(fonte, 0, fonte.tamanho)
+
+    @property
+    def intervalo(self) -> Tuple[int, int]:
+        """(inicio, fim) do texto na fonte, em bytes"""
+        return self._intervalo >> 32, self._intervalo & 0xFFFFFFFF
+
+    def definir_trecho(self, fonte: FonteTexto, inicio: int, fim: int):
+        # inicio e fim num só int: cada int fora do cache do CPython é um objeto à parte
+        self.fonte, self._intervalo = fonte, inicio << 32 | fim
+
+    def __repr__(self) -> str:
+        return (f"ElementoRegulatorio(tipo={self.tipo}, numero={self.numero!r}, nivel={self.nivel}, "
+                f"pagina={self.pagina}, contexto_hierarquico={self.contexto_hierarquico!r})")
 
 
 # ================================================================================
@@ -154,6 +339,10 @@ class ElementoRegulatorio:
 class PadroesRegulatorios:
     """Padrões regex para identificação de elementos regulatórios"""
     
+    # Padrões estruturais na ordem de prioridade do parser (o primeiro que casa vence)
+    ORDEM_ESTRUTURAL = ('resolucao', 'titulo', 'capitulo', 'secao', 'artigo', 'clausula',
+                        'anexo', 'paragrafo_unico', 'paragrafo', 'inciso', 'alinea', 'item')
+    
     def __init__(self):
         # Lista de trechos iniciais de parágrafos únicos revogados (primeiras 50 caracteres)
         # Estes aparecem riscados no PDF mas o pdfplumber não detecta a formatação
@@ -245,6 +434,36 @@ class PadroesRegulatorios:
                 r'^\s*(\d{2}/\d{2}/\d{2},\s*\d{2}:\d{2}|Page\s+\d+\s+of\s+\d+)\s*$'
             ]
         }
+        
+        # Classificação de linha em passada única: os padrões estruturais viram uma
+        # alternação de grupos nomeados (mesma ordem da cadeia if/elif, então a primeira
+        # alternativa que casa vence) e os de lixo viram uma única busca
+        self.classificador = self._combinar_estruturais()
+        self.grupo_numero = {nome: self.classificador.groupindex[nome] + 1 for nome in self.ORDEM_ESTRUTURAL}
+        self.lixo = re.compile('|'.join(f'(?:{p})' for p in self.padroes['trash']))
+    
+    def _combinar_estruturais(self) -> re.Pattern:
+        """Une os padrões estruturais preservando as flags de cada um (as linhas chegam sem quebra de linha)"""
+        partes = []
+        for nome in self.ORDEM_ESTRUTURAL:
+            padrao = self.padroes[nome]
+            flags = 'i' if padrao.flags & re.IGNORECASE else '-i'
+            partes.append(f'(?P<{nome}>(?{flags}:{padrao.pattern}))')
+        return re.compile('|'.join(partes))
+    
+    def classificar_linha(self, linha: str) -> Optional[Tuple[str, str]]:
+        """
+        Returns:
+            (nome do padrão estrutural, primeiro grupo capturado) ou None.
+            Equivale a testar os padrões de ORDEM_ESTRUTURAL com match, em sequência.
+        """
+        m = self.classificador.match(linha)
+        if not m:
+            return None
+        return m.lastgroup, m.group(self.grupo_numero[m.lastgroup])
+    
+    def eh_lixo(self, linha: str) -> bool:
+        return self.lixo.search(linha) is not None
     
     def is_paragrafo_unico_revogado(self, texto: str) -> bool:
         """Verifica se o parágrafo único está na lista de revogados"""
@@ -304,52 +523,108 @@ class LimpadorTexto:
             'û': '–',
             'ã': 'à',
         }
-    
+
+        # Compilado uma vez: limpar() faz duas passadas (lixo, encoding) e
+        # normalizar_estrutura() uma, com o mesmo resultado da aplicação das
+        # regras uma a uma (conferido em testes_validacao/teste_limpador_golden.py)
+        self._regras_lixo = [re.compile(p, re.MULTILINE) for p in self.padroes_lixo]
+        self._bloco_lixo = re.compile(
+            r'(?<!\s)\s*+(?:(?:' + '|'.join(self._corpo_lixo(p) for p in self.padroes_lixo) + r')\s*+)+',
+            re.MULTILINE)
+        self._substituicoes = self._compor_correcoes()
+        self._substituicoes['õ'] = '§'
+        self._encoding = re.compile(
+            '|'.join(re.escape(errado) for errado in self.correcoes_encoding) + r'|õ(?=\s*\d)')
+        self._estrutura = re.compile(
+            r'(?P<pontuacao>[.;!?])\s*+(?=(?P<quebra>(?:TÍTULO|CAPÍTULO|SEÇÃO|SUBSEÇÃO)\s)'
+            r'|(?P<clausula>CLÁUSULA\s)|(?P<anexo>ANEXO\s+[IVXLCDM0-9A-Z]))'
+            r'|^ *+(?=(?P<linha_anexo>ANEXO\s+[IVXLCDM0-9A-Z])|(?P<linha_clausula>CLÁUSULA\s))'
+            r'|(?P<artigo>[a-z0-9áàâãéêíóôõúç);:])\s++(?P<numero>Art\.?\s*\d+)',
+            re.MULTILINE)
+        self._extensao = {'anexo': re.compile(r'ANEXO\s+[IVXLCDM0-9A-Z]+'),
+                          'clausula': re.compile(r'CLÁUSULA\s+')}
+
+    @staticmethod
+    def _corpo_lixo(padrao: str) -> str:
+        """Padrão de lixo sem as âncoras de linha e com o (?i) restrito a ele"""
+        if padrao.startswith('(?i)'):
+            return f'(?i:{padrao[4:]})'
+        return re.sub(r'^(?:\^|\\n\?)\\s\*|\\s\*\$$', '', padrao)
+
+    def _compor_correcoes(self) -> Dict[str, str]:
+        """
+        Resultado final de cada chave da tabela de encoding: a substituição dela
+        seguida das regras posteriores (ex.: 'Ã' -> 'à' -> 'ã' -> 'à').
+        Nenhuma saída forma chave nova com o texto vizinho, então uma passada
+        com as chaves na ordem da tabela equivale à cadeia de str.replace.
+        """
+        regras = list(self.correcoes_encoding.items())
+        compostas = {}
+        for i, (errado, correto) in enumerate(regras):
+            for chave, valor in regras[i + 1:]:
+                correto = correto.replace(chave, valor)
+            compostas[errado] = correto
+        return compostas
+
+    def _remover_lixo_encadeado(self, texto: str) -> str:
+        for regra in self._regras_lixo:
+            texto = regra.sub('', texto)
+        return texto
+
+    def _remover_bloco_lixo(self, m: re.Match) -> str:
+        """
+        Aplica a cadeia de regras só ao bloco de lixo (e espaços em volta).
+        O 'X' faz o papel do texto vizinho para as âncoras ^ e $.
+        """
+        antes = 'X' if m.start() else ''
+        depois = 'X' if m.end() < len(m.string) else ''
+        limpo = self._remover_lixo_encadeado(antes + m.group() + depois)
+        return limpo[len(antes):len(limpo) - len(depois)]
+
     def limpar(self, texto: str) -> str:
         """Aplica todas as limpezas necessárias no texto"""
         # Remove padrões de lixo
-        for padrao in self.padroes_lixo:
-            texto = re.sub(padrao, '', texto, flags=re.MULTILINE)
-        
-        # Correções de encoding
-        for errado, correto in self.correcoes_encoding.items():
-            texto = texto.replace(errado, correto)
-        
-        # Corrige õ que deveria ser §
-        texto = re.sub(r'õ(\s*\d)', r'§\1', texto)
-        
+        texto = self._bloco_lixo.sub(self._remover_bloco_lixo, texto)
+
+        # Correções de encoding + õ que deveria ser §
+        texto = self._encoding.sub(lambda m: self._substituicoes[m.group()], texto)
+
         return texto.strip()
-    
+
     def normalizar_estrutura(self, texto: str) -> str:
-        """Normaliza quebras de linha para melhor parsing"""
-        # Garante quebra de linha antes de elementos estruturais
-        quebras = [
-            r'([.;!?])\s*(TÍTULO\s+)',
-            r'([.;!?])\s*(CAPÍTULO\s+)',
-            r'([.;!?])\s*(SEÇÃO\s+)',
-            r'([.;!?])\s*(SUBSEÇÃO\s+)',
-            r'([.;!?])\s*(CLÁUSULA\s+)'
-        ]
-        for padrao in quebras:
-            texto = re.sub(padrao, r'\1\n\2', texto)
-        
-        # Anexos e cláusulas em nova linha
-        texto = re.sub(
-            r'([.;!?])\s*(ANEXO\s+[IVXLCDM0-9A-Z]+)',
-            r'\1\n\n\2',
-            texto
-        )
-        texto = re.sub(r'(?m)^ *(ANEXO\s+[IVXLCDM0-9A-Z]+)', r'\n\1', texto)
-        texto = re.sub(r'(?m)^ *(CLÁUSULA\s+)', r'\n\1', texto)
-        
-        # Artigos em nova linha
-        texto = re.sub(
-            r'([a-z0-9áàâãéêíóôõúç);:])\s+(Art\.?\s*\d+)',
-            r'\1\n\2',
-            texto
-        )
-        
-        return texto
+        """
+        Normaliza quebras de linha para melhor parsing:
+        - elementos estruturais após pontuação vão para nova linha
+        - ANEXO e CLÁUSULA ganham linha em branco antes
+        - artigos em nova linha
+        """
+        # Um ANEXO/CLÁUSULA no início de linha "consome" o trecho seguinte;
+        # inícios de linha dentro dele não recebem quebra extra
+        fim = {'anexo': -1, 'clausula': -1}
+
+        def substituir(m: re.Match) -> str:
+            tipo = m.lastgroup
+            if tipo == 'quebra':
+                return m.group('pontuacao') + '\n'
+            if tipo == 'numero':
+                return m.group('artigo') + '\n' + m.group('numero')
+            if tipo.startswith('linha_'):
+                tipo = tipo[len('linha_'):]
+                if m.start() < fim[tipo]:
+                    return m.group()
+                fim[tipo] = self._extensao[tipo].match(m.string, m.end()).end()
+                return '\n'
+            # Pontuação + ANEXO/CLÁUSULA: quebra da pontuação e linha em branco
+            fim[tipo] = self._extensao[tipo].match(m.string, m.end()).end()
+            return m.group('pontuacao') + ('\n\n\n' if tipo == 'anexo' else '\n\n')
+
+        return self._estrutura.sub(substituir, texto)
+
+
+# Regras compiladas uma vez por processo (ou isolate do Worker) e compartilhadas
+# por todos os ChunkerRegulatorio; nenhuma das duas classes guarda estado por documento
+PADROES = PadroesRegulatorios()
+LIMPADOR = LimpadorTexto()
 
 
 # ================================================================================
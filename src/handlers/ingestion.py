@@ -0,0 +1,141 @@
+"""
+Pipeline de ingestão assíncrona via Cloudflare Queues.
+
+O upload enfileira um job e o consumidor executa as etapas como mensagens
+encadeadas, cada uma com trabalho limitado:
+
+    extrair (uma janela de páginas por mensagem)
+      -> chunkar (gera o manifesto no R2)
+        -> vetorizar (um lote de chunks por mensagem: embedding + upsert)
+
+O progresso fica em documents.status / documents.chunk_count e a vazão de cada
+etapa em ingestion_stages. Mensagens que esgotam as tentativas vão para a
+dead-letter queue, cujo consumidor marca o documento como 'failed'.
+"""
+
+import json
+import time
+
+ETAPA_EXTRAIR = "extrair"
+ETAPA_CHUNKAR = "chunkar"
+ETAPA_VETORIZAR = "vetorizar"
+
+PAGINAS_POR_MENSAGEM = 40
+CHUNKS_POR_MENSAGEM = 50
+FILA_DLQ = "agems-ingest-dlq"
+
+
+def _corpo_mensagem(msg):
+    """Aceita mensagens do runtime (JsProxy) e da fila local (dict)"""
+    return msg.body.to_py() if hasattr(msg.body, "to_py") else msg.body
+
+
+async def enfileirar(env, document_id, etapa=ETAPA_EXTRAIR, **extras):
+    from utils.local_queue import FilaLocal
+    corpo = {"document_id": document_id, "etapa": etapa, **extras}
+    if isinstance(env.INGEST_QUEUE, FilaLocal):
+        await env.INGEST_QUEUE.send(corpo)
+    else:
+        from pyodide.ffi import to_js
+        from js import Object
+        await env.INGEST_QUEUE.send(to_js(corpo, dict_converter=Object.fromEntries))
+
+
+async def registrar_metrica(env, document_id, etapa, itens, inicio):
+    """Registra a vazão da etapa (itens = páginas ou chunks) e loga para o observability"""
+    duracao_ms = int((time.monotonic() - inicio) * 1000)
+    taxa = itens / (duracao_ms / 1000) if duracao_ms else 0.0
+    print(f"METRICA ingestao doc={document_id} etapa={etapa} itens={itens} ms={duracao_ms} itens/s={taxa:.2f}")
+    await env.agems_rag_db.prepare(
+        "INSERT INTO ingestion_stages (document_id, stage, items, duration_ms) VALUES (?, ?, ?, ?)"
+    ).bind(document_id, etapa, itens, duracao_ms).run()
+
+
+async def executar_etapa(env, corpo):
+    """Executa uma etapa e enfileira a seguinte"""
+    from handlers.chunks import (obter_chunker, etapa_extrair, etapa_chunkar, atualizar_progresso)
+    from utils.manifest import obter_etag, carregar_fatia_manifesto
+    from utils.vectorize import process_and_vectorize_chunks
+
+    document_id, etapa = corpo["document_id"], corpo.get("etapa", ETAPA_EXTRAIR)
+    doc_proxy = await env.agems_rag_db.prepare("SELECT * FROM documents WHERE id = ?").bind(document_id).first()
+    if not doc_proxy:
+        print(f"WARN: Documento {document_id} não existe mais; mensagem descartada")
+        return
+    doc = doc_proxy.to_py()
+    chunker = obter_chunker()
+    pdf_etag = await obter_etag(env, doc["r2_key"])
+    inicio = time.monotonic()
+
+    if etapa == ETAPA_EXTRAIR:
+        concluido, _, _, paginas, _ = await etapa_extrair(env, doc, pdf_etag, PAGINAS_POR_MENSAGEM)
+        await registrar_metrica(env, document_id, etapa, paginas, inicio)
+        await enfileirar(env, document_id, ETAPA_CHUNKAR if concluido else ETAPA_EXTRAIR)
+
+    elif etapa == ETAPA_CHUNKAR:
+        chunks = await etapa_chunkar(env, doc, pdf_etag, chunker)
+        if chunks is None:
+            await enfileirar(env, document_id, ETAPA_EXTRAIR)
+            return
+        await atualizar_progresso(env, document_id, 'processing', 0)
+        await registrar_metrica(env, document_id, etapa, len(chunks), inicio)
+        await enfileirar(env, document_id, ETAPA_VETORIZAR, inicio=0)
+
+    elif etapa == ETAPA_VETORIZAR:
+        pos = corpo.get("inicio", 0)
+        fatia = await carregar_fatia_manifesto(env, document_id, chunker.versao, pdf_etag, pos, CHUNKS_POR_MENSAGEM)
+        if fatia is None:
+            # PDF ou chunker mudou no meio do caminho: recomeça a partir da extração
+            await enfileirar(env, document_id, ETAPA_EXTRAIR)
+            return
+        lote, total = fatia
+        # upsert torna a reentrega da mesma mensagem idempotente
+        processados = await process_and_vectorize_chunks(env, document_id, doc, lote, indice_base=pos, usar_upsert=True)
+        proximo = pos + len(lote)
+        concluido = proximo >= total
+        # chunk_count é a posição no manifesto: a reentrega do lote não soma de novo
+        await atualizar_progresso(env, document_id, 'processed' if concluido else 'processing', proximo)
+        await registrar_metrica(env, document_id, etapa, processados, inicio)
+        if not concluido:
+            await enfileirar(env, document_id, ETAPA_VETORIZAR, inicio=proximo)
+
+    else:
+        raise ValueError(f"Etapa de ingestão desconhecida: {etapa}")
+
+
+async def handle_queue(batch, env):
+    """Consumidor das filas de ingestão e de dead-letter"""
+    for msg in batch.messages:
+        corpo = _corpo_mensagem(msg)
+        if batch.queue == FILA_DLQ:
+            print(f"ERRO: Ingestão de {corpo.get('document_id')} falhou na etapa {corpo.get('etapa')}")
+            await env.agems_rag_db.prepare("UPDATE documents SET status = 'failed' WHERE id = ?").bind(corpo.get("document_id")).run()
+            msg.ack()
+            continue
+        try:
+            await executar_etapa(env, corpo)
+            msg.ack()
+        except Exception as e:
+            import traceback
+            print(f"ERRO na etapa {corpo.get('etapa')} de {corpo.get('document_id')}: {traceback.format_exc()}")
+            msg.retry()
+
+
+async def handle_status(request, env):
+    """GET /documents/{id}/status - progresso e vazão por etapa"""
+    from js import Response, JSON
+    document_id = request.url.split("/documents/")[1].split("/status")[0]
+    doc_proxy = await env.agems_rag_db.prepare(
+        "SELECT id, title, status, chunk_count, last_page, total_pages FROM documents WHERE id = ?"
+    ).bind(document_id).first()
+    if not doc_proxy:
+        return Response.new(json.dumps({"error": "Document not found"}),
+                            JSON.parse(json.dumps({"status": 404, "headers": {"Content-Type": "application/json"}})))
+    etapas = (await env.agems_rag_db.prepare(
+        "SELECT stage, COUNT(*) AS messages, SUM(items) AS items, SUM(duration_ms) AS duration_ms "
+        "FROM ingestion_stages WHERE document_id = ? GROUP BY stage"
+    ).bind(document_id).all()).to_py().get("results", [])
+    for e in etapas:
+        e["items_per_s"] = round(e["items"] / (e["duration_ms"] / 1000), 2) if e["duration_ms"] else None
+    return Response.new(json.dumps({**doc_proxy.to_py(), "stages": etapas}),
+                        JSON.parse(json.dumps({"headers": {"Content-Type": "application/json"}})))
@@ -0,0 +1,124 @@
+"""
+Detecção de chunks quase duplicados antes da vetorização.
+
+Resoluções compiladas podem repetir um dispositivo dentro do mesmo ponto
+da hierarquia com textos que diferem só na nota "(Redação dada pela REN
+...)", o que _deduplicar_elementos (colisões exatas de tipo|numero|contexto)
+não alcança. Aqui os chunks do mesmo tipo e do mesmo contexto_hierarquico
+cujo texto (sem o prefixo de contexto e sem as notas de alteração) tem
+similaridade de Jaccard >= LIMIAR_SIMILARIDADE sobre trigramas de palavras
+são agrupados. Textos iguais sob artigos diferentes ("I - residencial;",
+sobras de notas como "07.02.2023)") não se agrupam: só o contexto do
+representante é vetorizado e a busca perderia os demais.
+
+Os candidatos saem de assinaturas MinHash com LSH por faixas (sem comparar
+todos os pares); a similaridade de cada candidato é conferida nos conjuntos
+de trigramas. Cada grupo é representado pelo primeiro chunk na ordem do
+texto, o único vetorizado; os demais ficam no manifesto com 'representante'
+e o representante lista seus 'aliases' (também gravados nos metadados do vetor).
+
+A passagem é opcional (variável NEAR_DUPLICATES do Worker, --quase-duplicados
+no ingest.py): na REN 1000 não há grupos no mesmo contexto (o Anexo IV, que
+repetia linhas, já sai agrupado em poucos chunks) e ela custa ~750 ms por
+ingestão. Com ela ligada, trocar_por_representantes troca os aliases da
+árvore estrutural e do grafo de referências pelos representantes: os
+chunk_ids dos nós sempre têm vetor (getByIds no handle_query) e as
+referências feitas num alias partem do representante que a busca devolve.
+"""
+
+import random
+import re
+import zlib
+from typing import Dict, List
+
+try:
+    from handlers.hierarchy_semantics import texto_sem_contexto
+except ImportError:  # execução local com src/handlers no sys.path
+    from hierarchy_semantics import texto_sem_contexto
+
+LIMIAR_SIMILARIDADE = 0.9
+# 16 faixas de 4 funções: pares com Jaccard 0,9 viram candidatos com probabilidade ~1
+FAIXAS, LINHAS_POR_FAIXA = 16, 4
+_MASCARAS = [random.Random(1000 + i).getrandbits(32) for i in range(FAIXAS * LINHAS_POR_FAIXA)]
+
+_PALAVRA = re.compile(r'\w+')
+_NOTA_ALTERACAO = re.compile(r'\((?:Redaç[aãà]o dada|Inclu[íi]d[oa]|Revogad[oa]|Vide)[^)]*\)?', re.I)
+
+
+def trigramas(texto: str) -> set:
+    """Hashes (crc32, estáveis entre execuções) dos trigramas de palavras do texto"""
+    palavras = _PALAVRA.findall(_NOTA_ALTERACAO.sub(' ', texto).lower())
+    if len(palavras) < 3:
+        return {zlib.crc32(' '.join(palavras).encode())}
+    return {zlib.crc32(' '.join(palavras[i:i + 3]).encode()) for i in range(len(palavras) - 2)}
+
+
+def assinatura_minhash(conjunto: set) -> tuple:
+    return tuple(min(h ^ m for h in conjunto) for m in _MASCARAS)
+
+
+def agrupar_quase_duplicados(chunks: List[Dict], limiar: float = LIMIAR_SIMILARIDADE) -> Dict[str, str]:
+    """
+    Returns:
+        {chunk_id do alias: chunk_id do representante}; chunks sem par não aparecem
+    """
+    conjuntos = [trigramas(texto_sem_contexto(c)) for c in chunks]
+    assinaturas = [assinatura_minhash(s) for s in conjuntos]
+
+    candidatos = set()
+    for faixa in range(FAIXAS):
+        inicio = faixa * LINHAS_POR_FAIXA
+        baldes = {}
+        for i, assinatura in enumerate(assinaturas):
+            chave = (chunks[i]['tipo'], chunks[i]['contexto_hierarquico'], assinatura[inicio:inicio + LINHAS_POR_FAIXA])
+            baldes.setdefault(chave, []).append(i)
+        for indices in baldes.values():
+            candidatos.update((indices[0], j) for j in indices[1:])
+
+    # Union-find com a menor posição como raiz: o representante é o primeiro do grupo
+    raiz = list(range(len(chunks)))
+
+    def encontrar(i):
+        while raiz[i] != i:
+            raiz[i] = raiz[raiz[i]]
+            i = raiz[i]
+        return i
+
+    for i, j in sorted(candidatos):
+        a, b = conjuntos[i], conjuntos[j]
+        if len(a & b) >= limiar * len(a | b):
+            ri, rj = encontrar(i), encontrar(j)
+            if ri != rj:
+                raiz[max(ri, rj)] = min(ri, rj)
+
+    return {chunks[i]['chunk_id']: chunks[encontrar(i)]['chunk_id']
+            for i in range(len(chunks)) if encontrar(i) != i}
+
+
+def marcar_quase_duplicados(chunks: List[Dict], limiar: float = LIMIAR_SIMILARIDADE) -> int:
+    """
+    Marca os aliases com 'representante' e os representantes com 'aliases'.
+
+    Returns:
+        Número de chunks que deixam de ser vetorizados
+    """
+    aliases = agrupar_quase_duplicados(chunks, limiar)
+    por_id = {c['chunk_id']: c for c in chunks}
+    for alias, representante in aliases.items():
+        por_id[alias]['representante'] = representante
+        por_id[representante].setdefault('aliases', []).append(alias)
+    return len(aliases)
+
+
+def trocar_por_representantes(chunks: List[Dict], nos: List[Dict], arestas: List[Dict]):
+    """
+    Troca os aliases pelos representantes nos 'chunks' de cada nó
+    (arvore_estrutura) e no 'chunk_id' de origem das arestas (grafo_referencias).
+    """
+    representante = {c['chunk_id']: c['representante'] for c in chunks if c.get('representante')}
+    if not representante:
+        return
+    for no in nos:
+        no['chunks'] = list(dict.fromkeys(representante.get(i, i) for i in no['chunks']))
+    for aresta in arestas:
+        aresta['chunk_id'] = representante.get(aresta['chunk_id'], aresta['chunk_id'])
@@ -2,6 +2,41 @@ from js import Response, Object, Array
 from pyodide.ffi import to_js
 import json
 
+# Busca antecipada dos trechos citados pelos resultados (document_references);
+# o corpo da consulta pode sobrescrever com references_depth/fanout/limit
+PROFUNDIDADE_REFERENCIAS = 1
+CITADOS_POR_TRECHO = 3
+LIMITE_CITADOS = 5
+
+
+def _inteiro(valor, padrao, maximo):
+    try:
+        return max(0, min(int(valor), maximo))
+    except (TypeError, ValueError):
+        return padrao
+
+
+async def _trechos_citados(env, matches, profundidade, por_trecho, limite):
+    """Metadados dos trechos citados pelos matches (grafo de referências + Vectorize.getByIds)"""
+    from utils.structure_store import carregar_citados
+    origens = []
+    for m in matches:
+        document_id = m.get('metadata', {}).get('document_id')
+        if document_id and m.get('id', '').startswith(f"{document_id}-"):
+            origens.append((document_id, m['id'][len(document_id) + 1:]))
+    if not origens or not profundidade or not limite:
+        return []
+    citados = await carregar_citados(env, origens, profundidade, por_trecho, limite)
+    if not citados:
+        return []
+    # Quase duplicados: os nós guardam o representante (trocar_por_representantes);
+    # ids sem vetor (aliases de árvores antigas) ficam de fora
+    ids = list(dict.fromkeys(f"{d}-{c}" for d, c in citados))
+    vetores = (await env.VECTORIZE.getByIds(to_js(ids))).to_py()
+    por_id = {v.get('id'): v.get('metadata', {}) for v in vetores}
+    return [por_id[i] for i in ids if i in por_id]
+
+
 async def handle_query(request, env):
     try:
         body_proxy = await request.json()
@@ -75,6 +110,24 @@ async def handle_query(request, env):
                 context_text += f"\n\nFONTE: {src}\n{txt}"
                 if src not in sources: sources.append(src)
 
+        # 3.1 Dispositivos citados pelos resultados (ex.: "nos termos do art. 23")
+        try:
+            citados = await _trechos_citados(
+                env, matches,
+                _inteiro(body.get("references_depth"), PROFUNDIDADE_REFERENCIAS, 3),
+                _inteiro(body.get("references_fanout"), CITADOS_POR_TRECHO, 10),
+                _inteiro(body.get("references_limit"), LIMITE_CITADOS, 20))
+        except Exception as e:
+            print(f"WARN: Referências não carregadas: {e}")
+            citados = []
+        for meta in citados:
+            txt = meta.get('text') or ""
+            src = meta.get('title') or "Documento"
+            if txt:
+                context_text += f"\n\nFONTE (citada): {src} - {meta.get('contexto', '')}\n{txt}"
+                if src not in sources: sources.append(src)
+        print(f"DEBUG REFERENCIAS: {len(citados)} trechos citados")
+
         if not context_text:
             context_text = "Nenhum contexto relevante encontrado nos documentos oficiais."
 
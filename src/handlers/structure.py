@@ -0,0 +1,84 @@
+"""
+Navegação pela árvore estrutural dos documentos (ver utils/structure_store.py).
+
+    GET /documents/{id}/tree                  todos os nós, na ordem do texto
+    GET /documents/{id}/tree?parent=root      só as raízes
+    GET /documents/{id}/tree?parent={node}    só os filhos diretos de um nó
+    GET /documents/{id}/elements/{tipo}/{numero}[/{tipo}/{numero}...]
+        ex.: /documents/REN_1000/elements/artigo/146/paragrafo/1
+    GET /documents/{id}/references/{node}     referências de/para um nó
+    GET /documents/{id}/references/{tipo}/{numero}[/...]
+        ex.: /documents/REN_1000/references/artigo/23 (quem cita o art. 23)
+"""
+
+import json
+from urllib.parse import parse_qs, unquote, urlparse
+
+
+def _resposta(dados, status=200):
+    from js import Response, JSON
+    return Response.new(json.dumps(dados, ensure_ascii=False),
+                        JSON.parse(json.dumps({"status": status, "headers": {"Content-Type": "application/json"}})))
+
+
+def _document_id(caminho_url):
+    return unquote(caminho_url.split("/documents/")[1].split("/")[0])
+
+
+async def handle_tree(request, env):
+    """GET /documents/{id}/tree - árvore estrutural (lista de adjacência)"""
+    from utils.structure_store import carregar_arvore
+    url = urlparse(request.url)
+    document_id = _document_id(url.path)
+    parent = parse_qs(url.query).get("parent", [None])[0]
+    if parent is None:
+        nos = await carregar_arvore(env, document_id)
+    elif parent == "root":
+        nos = await carregar_arvore(env, document_id, so_filhos=True)
+    elif parent.isdigit():
+        nos = await carregar_arvore(env, document_id, int(parent), so_filhos=True)
+    else:
+        return _resposta({"error": "parent must be 'root' or a node_id"}, 400)
+    if not nos and parent is None:
+        return _resposta({"error": "Structure tree not found (document not chunked yet?)"}, 404)
+    return _resposta({"document_id": document_id, "nodes": nos})
+
+
+async def handle_element(request, env):
+    """GET /documents/{id}/elements/{path} - elementos pelo caminho, com ancestrais e filhos"""
+    from utils.structure_store import buscar_elementos, ler_caminho
+    caminho_url = urlparse(request.url).path
+    document_id = _document_id(caminho_url)
+    try:
+        caminho = ler_caminho(unquote(caminho_url.split("/elements/", 1)[1]))
+    except ValueError as e:
+        return _resposta({"error": str(e)}, 400)
+    elementos = await buscar_elementos(env, document_id, caminho)
+    if not elementos:
+        return _resposta({"error": "Element not found"}, 404)
+    return _resposta({"document_id": document_id, "path": [f"{t}/{n}" for t, n in caminho], "matches": elementos})
+
+
+async def handle_references(request, env):
+    """GET /documents/{id}/references/{node|path} - quem cita o elemento e o que ele cita"""
+    from utils.structure_store import buscar_elementos, carregar_no, carregar_referencias, ler_caminho
+    caminho_url = urlparse(request.url).path
+    document_id = _document_id(caminho_url)
+    elemento = unquote(caminho_url.split("/references/", 1)[1]).strip("/")
+    if elemento.isdigit():
+        no = await carregar_no(env, document_id, int(elemento))
+        nos = [no] if no else []
+    else:
+        try:
+            caminho = ler_caminho(elemento)
+        except ValueError as e:
+            return _resposta({"error": str(e)}, 400)
+        nos = await buscar_elementos(env, document_id, caminho)
+    if not nos:
+        return _resposta({"error": "Element not found"}, 404)
+    matches = []
+    for no in nos:
+        citado_por, cita = await carregar_referencias(env, document_id, no["node_id"])
+        matches.append({**{k: no[k] for k in ("node_id", "parent_id", "tipo", "numero", "pagina", "chunk_ids")},
+                        "cited_by": citado_por, "cites": cita})
+    return _resposta({"document_id": document_id, "element": elemento, "matches": matches})
@@ -1,12 +1,33 @@
 from js import Response, FormData, Uint8Array, JSON
 from pyodide.ffi import to_js
+import hashlib
 import json
 import uuid
 
+# Blocos do hash do PDF: subarray é uma view e só o bloco é copiado para o Python
+BLOCO_HASH = 1 << 20
+
+
+def sha256_em_blocos(dados):
+    """SHA-256 de um Uint8Array sem copiar o PDF inteiro para bytes"""
+    h = hashlib.sha256()
+    for i in range(0, dados.length, BLOCO_HASH):
+        h.update(dados.subarray(i, i + BLOCO_HASH).to_bytes())
+    return h.hexdigest()
+
+
 async def handle_upload(request, env):
     """
     Handler de Upload - Versao ultra-estavel com JSON.parse para options.
+
+    O campo opcional "artifact" leva o texto pré-extraído por página (mesmo
+    formato do POST /documents/{id}/artifact), gravado antes de enfileirar:
+    a fila já encontra o artefato e o pdfplumber não roda no Worker.
     """
+    def erro(mensagem, status):
+        return Response.new(json.dumps({"error": mensagem}),
+                            JSON.parse(json.dumps({"status": status, "headers": {"Content-Type": "application/json"}})))
+
     try:
         print(f"DEBUG: Recebendo request de upload")
         form_data = await request.formData()
@@ -15,6 +36,9 @@ async def handle_upload(request, env):
         title = form_data.get("title") or "Sem Titulo"
         doc_type = form_data.get("type") or "Documento"
         sector = form_data.get("sector") or "Geral"
+        auto_process = (form_data.get("auto_process") or "true").lower() != "false"
+        extraction_backend = form_data.get("extraction_backend") or None
+        artifact = form_data.get("artifact")
 
         if not file:
             return Response.new(
@@ -22,13 +46,42 @@ async def handle_upload(request, env):
                 JSON.parse(json.dumps({"status": 400, "headers": {"Content-Type": "application/json"}}))
             )
 
+        from handlers.chunks import chave_extracao_worker
+        from handlers.extraction_backends import BACKENDS
+        from utils.page_store import ler_artefato, salvar_artefato
+        if extraction_backend and extraction_backend not in BACKENDS:
+            return Response.new(
+                json.dumps({"error": f"Unknown extraction_backend: {extraction_backend}",
+                            "available": list(BACKENDS)}),
+                JSON.parse(json.dumps({"status": 400, "headers": {"Content-Type": "application/json"}}))
+            )
+
         doc_id = str(uuid.uuid4())
         r2_key = f"documents/{doc_id}.pdf"
 
         # 1. R2 - Upload
         print(f"DEBUG: Salvando no R2")
         array_buffer = await file.arrayBuffer()
-        await env.agems_docs.put(r2_key, Uint8Array.new(array_buffer))
+        pdf_bytes = Uint8Array.new(array_buffer)
+        # SHA-256 do PDF: chave do cache de páginas extraídas
+        sha256 = sha256_em_blocos(pdf_bytes)
+
+        artefato = None
+        if artifact:
+            try:
+                artefato = artifact if isinstance(artifact, str) else await artifact.text()
+                cabecalho, _ = ler_artefato(artefato)
+            except ValueError as e:
+                return erro(str(e), 400)
+            if cabecalho["sha256"] != sha256:
+                return erro("Artifact checksum does not match the uploaded PDF", 409)
+            if cabecalho.get("extracao") != chave_extracao_worker(extraction_backend):
+                return erro(f"Artifact extraction {cabecalho.get('extracao')} does not match the Worker's "
+                            f"{chave_extracao_worker(extraction_backend)}", 409)
+
+        await env.agems_docs.put(r2_key, pdf_bytes)
+        if artefato:
+            await salvar_artefato(env, r2_key, artefato)
 
         # 2. D1
         print(f"DEBUG: Registrando no D1 via .run()")
@@ -38,25 +91,37 @@ async def handle_upload(request, env):
                 return f"'{str(v).replace("'", "''")}'"
 
             sql = f"""
-                INSERT INTO documents (id, title, type, sector, r2_key, status)
+                INSERT INTO documents (id, title, type, sector, r2_key, sha256, extraction_backend, status)
                 VALUES (
                     {sql_quote(doc_id)}, 
                     {sql_quote(title)}, 
                     {sql_quote(doc_type)}, 
                     {sql_quote(sector)}, 
                     {sql_quote(r2_key)}, 
+                    {sql_quote(sha256)}, 
+                    {sql_quote(extraction_backend) if extraction_backend else 'NULL'}, 
                     'pending'
                 )
             """
             await env.agems_rag_db.prepare(sql).run()
             
             print("Sucesso absoluto no D1 via .run()!")
+
+            # 3. Fila de ingestão (extração -> chunking -> vetorização em segundo plano)
+            queued = False
+            if auto_process and hasattr(env, "INGEST_QUEUE"):
+                from handlers.ingestion import enfileirar
+                await enfileirar(env, doc_id)
+                await env.agems_rag_db.prepare("UPDATE documents SET status = 'queued' WHERE id = ?").bind(doc_id).run()
+                queued = True
             
             return Response.new(
                 json.dumps({
                     "success": True, 
                     "message": "Upload e registro concluídos",
-                    "document_id": str(doc_id)
+                    "document_id": str(doc_id),
+                    "queued": queued,
+                    "artifact": artefato is not None
                 }),
                 JSON.parse(json.dumps({"status": 201, "headers": {"Content-Type": "application/json"}}))
             )
@@ -76,3 +141,55 @@ async def handle_upload(request, env):
             json.dumps({"error": str(e), "trace": err_trace}),
             JSON.parse(json.dumps({"status": 500, "headers": {"Content-Type": "application/json"}}))
         )
+
+
+async def handle_upload_artifact(request, env):
+    """
+    POST /documents/{id}/artifact - recebe o texto pré-extraído por página (JSON Lines,
+    ver utils/page_store.py) e o grava ao lado do PDF. O SHA-256 do cabeçalho precisa
+    bater com o do PDF e o backend + opções com os do Worker para
+    documents.extraction_backend (chave_extracao_worker); a partir daí o /process e
+    a fila não rodam mais o pdfplumber.
+    """
+    from handlers.chunks import chave_extracao_worker
+    from utils.page_store import ler_artefato, salvar_artefato
+    headers = JSON.parse(json.dumps({"headers": {"Content-Type": "application/json"}}))
+
+    def erro(mensagem, status):
+        return Response.new(json.dumps({"error": mensagem}),
+                            JSON.parse(json.dumps({"status": status, "headers": {"Content-Type": "application/json"}})))
+
+    try:
+        document_id = request.url.split("/documents/")[1].split("/artifact")[0]
+        doc_proxy = await env.agems_rag_db.prepare("SELECT id, r2_key, sha256, extraction_backend FROM documents WHERE id = ?").bind(document_id).first()
+        if not doc_proxy: return erro("Document not found", 404)
+        doc = doc_proxy.to_py()
+
+        try:
+            conteudo = await request.text()
+            cabecalho, paginas = ler_artefato(conteudo)
+        except ValueError as e:
+            return erro(str(e), 400)
+
+        sha256 = doc.get("sha256")
+        if not sha256:
+            # Documento anterior à coluna sha256: calcula a partir do PDF no R2
+            obj = await env.agems_docs.get(doc["r2_key"])
+            if not obj: return erro("PDF not found in storage", 404)
+            sha256 = sha256_em_blocos(Uint8Array.new(await obj.arrayBuffer()))
+            await env.agems_rag_db.prepare("UPDATE documents SET sha256 = ? WHERE id = ?").bind(sha256, document_id).run()
+        if cabecalho["sha256"] != sha256:
+            return erro("Artifact checksum does not match the stored PDF", 409)
+        esperada = chave_extracao_worker(doc.get("extraction_backend"))
+        if cabecalho.get("extracao") != esperada:
+            return erro(f"Artifact extraction {cabecalho.get('extracao')} does not match the document's {esperada}", 409)
+
+        await salvar_artefato(env, doc["r2_key"], conteudo)
+        print(f"DEBUG: Artefato de {document_id} salvo ({len(paginas)} páginas, backend {cabecalho.get('backend')})")
+        return Response.new(json.dumps({"success": True, "document_id": document_id, "pages": len(paginas),
+                                        "total_pages": cabecalho["total"], "backend": cabecalho.get("backend")}), headers)
+
+    except Exception as e:
+        import traceback
+        print(f"FALHA NO ARTEFATO: {traceback.format_exc()}")
+        return erro(str(e), 500)
@@ -10,9 +10,11 @@ from pyodide.ffi import to_js
 import json
 
 # Importar handlers
-from handlers.upload import handle_upload
+from handlers.upload import handle_upload, handle_upload_artifact
 from handlers.chunks import handle_add_chunks, handle_process
 from handlers.query import handle_query
+from handlers.ingestion import handle_queue, handle_status
+from handlers.structure import handle_element, handle_references, handle_tree
 
 
 async def on_fetch(request, env):
@@ -31,12 +33,27 @@ async def on_fetch(request, env):
     elif "/documents/" in url and "/chunks" in url and method == "POST":
         return await handle_add_chunks(request, env)
     
+    elif "/documents/" in url and "/artifact" in url and method == "POST":
+        return await handle_upload_artifact(request, env)
+    
     elif "/documents/" in url and "/process" in url and method == "POST":
         return await handle_process(request, env)
     
     elif "/chat/query" in url and method == "POST":
         return await handle_query(request, env)
     
+    elif "/documents/" in url and "/status" in url and method == "GET":
+        return await handle_status(request, env)
+    
+    elif "/documents/" in url and "/tree" in url and method == "GET":
+        return await handle_tree(request, env)
+    
+    elif "/documents/" in url and "/elements/" in url and method == "GET":
+        return await handle_element(request, env)
+    
+    elif "/documents/" in url and "/references/" in url and method == "GET":
+        return await handle_references(request, env)
+    
     elif method == "GET":
         return Response.new(
             json.dumps({
@@ -56,6 +73,8 @@ async def on_fetch(request, env):
         return Response.new(json.dumps({"error": "Endpoint not found"}), init)
 
 
-
-
-
+async def on_queue(batch, env):
+    """
+    Entry point das filas de ingestão (agems-ingest e sua dead-letter queue).
+    """
+    await handle_queue(batch, env)
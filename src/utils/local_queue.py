@@ -0,0 +1,76 @@
+"""
+Substituto em processo para Cloudflare Queues, para testes locais do pipeline
+de ingestão sem o runtime dos Workers.
+
+Reproduz a semântica relevante do runtime: entrega em lotes, ack/retry por
+mensagem, limite de tentativas e envio para uma dead-letter queue.
+
+Uso:
+    fila = FilaLocal("agems-ingest", dlq=FilaLocal("agems-ingest-dlq"))
+    env.INGEST_QUEUE = fila
+    await fila.send({...})
+    await fila.drenar(env, handle_queue)
+"""
+
+from collections import deque
+
+
+class MensagemLocal:
+    def __init__(self, body, attempts=1):
+        self.body = body
+        self.attempts = attempts
+        self._resultado = None
+
+    def ack(self):
+        self._resultado = "ack"
+
+    def retry(self):
+        self._resultado = "retry"
+
+
+class LoteLocal:
+    def __init__(self, queue, messages):
+        self.queue = queue
+        self.messages = messages
+
+    def ackAll(self):
+        for m in self.messages: m.ack()
+
+    def retryAll(self):
+        for m in self.messages: m.retry()
+
+
+class FilaLocal:
+    def __init__(self, nome, max_batch_size=1, max_retries=3, dlq=None):
+        self.nome = nome
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.dlq = dlq
+        self.pendentes = deque()
+        self.entregues = 0
+
+    async def send(self, body):
+        self.pendentes.append(MensagemLocal(body))
+
+    async def sendBatch(self, bodies):
+        for b in bodies: await self.send(b)
+
+    async def drenar(self, env, consumidor, max_lotes=10000):
+        """Entrega lotes ao consumidor até a fila (e a DLQ) esvaziarem"""
+        for _ in range(max_lotes):
+            if not self.pendentes:
+                break
+            msgs = [self.pendentes.popleft() for _ in range(min(self.max_batch_size, len(self.pendentes)))]
+            await consumidor(LoteLocal(self.nome, msgs), env)
+            self.entregues += len(msgs)
+            for m in msgs:
+                # Como no runtime, mensagem sem ack explícito é reentregue
+                if m._resultado == "ack":
+                    continue
+                if m.attempts >= self.max_retries:
+                    if self.dlq is not None:
+                        await self.dlq.send(m.body)
+                else:
+                    self.pendentes.append(MensagemLocal(m.body, m.attempts + 1))
+        if self.dlq is not None and self.dlq.pendentes:
+            await self.dlq.drenar(env, consumidor, max_lotes)
@@ -0,0 +1,102 @@
+"""
+Manifesto de chunks persistido no R2.
+
+O primeiro lote de um documento grava a lista completa de chunks em formato
+JSON Lines (um chunk por linha) junto com um índice de offsets em bytes.
+Os lotes seguintes leem apenas a fatia necessária com uma leitura por intervalo,
+sem baixar o PDF nem rodar o chunker novamente.
+
+O manifesto é invalidado quando:
+- o PDF muda (o etag do objeto no R2 deixa de bater com o registrado);
+- o chunker muda (a versão faz parte da chave do objeto).
+"""
+
+import json
+from pyodide.ffi import to_js
+from js import Object
+
+PREFIXO_MANIFESTO = "manifests"
+
+# Campos do chunk que o pipeline de vetorização realmente consome.
+# A análise semântica fica de fora para manter o manifesto compacto.
+# 'representante'/'aliases' vêm de near_duplicates.marcar_quase_duplicados;
+# 'metadata' (ex.: posições das linhas agrupadas do Anexo IV) vai para o vetor.
+CAMPOS_MANIFESTO = ('chunk_id', 'texto', 'tipo', 'numero', 'nivel',
+                    'contexto_hierarquico', 'pagina', 'tamanho', 'parte_de_elemento_maior',
+                    'representante', 'aliases', 'metadata')
+
+
+def chave_manifesto(document_id, versao_chunker):
+    return f"{PREFIXO_MANIFESTO}/{document_id}/{versao_chunker}.jsonl"
+
+
+def chave_indice(document_id, versao_chunker):
+    return f"{PREFIXO_MANIFESTO}/{document_id}/{versao_chunker}.idx.json"
+
+
+def serializar_manifesto(chunks):
+    """
+    Serializa os chunks em JSON Lines compacto.
+
+    Returns:
+        (bytes do manifesto, lista de offsets) onde offsets[i] é o byte inicial
+        do chunk i e offsets[-1] é o tamanho total.
+    """
+    linhas, offsets, pos = [], [0], 0
+    for c in chunks:
+        linha = json.dumps({k: c[k] for k in CAMPOS_MANIFESTO if k in c},
+                           ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+        linhas.append(linha)
+        pos += len(linha)
+        offsets.append(pos)
+    return b''.join(linhas), offsets
+
+
+def desserializar_linhas(texto):
+    return [json.loads(l) for l in texto.split('\n') if l]
+
+
+async def obter_etag(env, r2_key):
+    obj = await env.agems_docs.head(r2_key)
+    if not obj: raise Exception(f"Arquivo não encontrado: {r2_key}")
+    return str(obj.etag)
+
+
+async def salvar_manifesto(env, document_id, versao_chunker, pdf_etag, chunks):
+    """Grava manifesto e índice no R2. O índice carrega os dados de validação."""
+    corpo, offsets = serializar_manifesto(chunks)
+    await env.agems_docs.put(chave_manifesto(document_id, versao_chunker), corpo.decode('utf-8'))
+    opcoes = to_js({"customMetadata": {"pdf_etag": pdf_etag, "versao_chunker": versao_chunker,
+                                       "total_chunks": str(len(chunks))}},
+                   dict_converter=Object.fromEntries)
+    await env.agems_docs.put(chave_indice(document_id, versao_chunker),
+                             json.dumps(offsets, separators=(',', ':')), opcoes)
+    print(f"DEBUG: Manifesto salvo ({len(chunks)} chunks, {offsets[-1]} bytes)")
+
+
+async def carregar_fatia_manifesto(env, document_id, versao_chunker, pdf_etag, inicio, limite):
+    """
+    Lê apenas os chunks [inicio, inicio + limite) do manifesto.
+
+    Returns:
+        (lista de chunks, total de chunks) ou None se o manifesto não existir
+        ou estiver desatualizado em relação ao PDF.
+    """
+    idx_obj = await env.agems_docs.get(chave_indice(document_id, versao_chunker))
+    if not idx_obj: return None
+    meta = idx_obj.customMetadata.to_py() if idx_obj.customMetadata else {}
+    if meta.get("pdf_etag") != pdf_etag:
+        print(f"DEBUG: Manifesto de {document_id} desatualizado (PDF alterado)")
+        return None
+
+    offsets = json.loads(await idx_obj.text())
+    total = len(offsets) - 1
+    inicio = min(inicio, total)
+    fim = min(inicio + limite, total) if limite else total
+    if fim <= inicio: return [], total
+
+    faixa = to_js({"range": {"offset": offsets[inicio], "length": offsets[fim] - offsets[inicio]}},
+                  dict_converter=Object.fromEntries)
+    obj = await env.agems_docs.get(chave_manifesto(document_id, versao_chunker), faixa)
+    if not obj: return None
+    return desserializar_linhas(await obj.text()), total
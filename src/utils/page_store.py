@@ -0,0 +1,173 @@
+"""
+Armazenamento de texto extraído por página no R2.
+
+Cada janela de páginas extraída numa invocação do Worker é gravada como um
+objeto JSON Lines (uma página por linha: {"p": número, "t": texto}).
+Quando todas as janelas estão prontas, o texto completo é remontado com os
+marcadores [[PAGINA:n]] esperados pelo chunker.
+
+Ao lado de cada janela ficam os elementos que o parser fechou nela
+(chunker.serializar_elementos), analisados já na extração a partir do estado
+salvo no cursor do D1 (ver etapa_extrair em handlers/chunks.py).
+
+Também guarda o cache de páginas por SHA-256 e os artefatos pré-extraídos
+enviados de fora do Worker.
+"""
+
+import json
+
+PREFIXO_PAGINAS = "extracted"
+
+
+def chave_janela(document_id, pagina_inicial):
+    return f"{PREFIXO_PAGINAS}/{document_id}/{pagina_inicial:06d}.jsonl"
+
+
+def serializar_paginas(paginas):
+    """paginas: lista de (numero, texto)"""
+    return ''.join(json.dumps({"p": n, "t": t}, ensure_ascii=False, separators=(',', ':')) + '\n'
+                   for n, t in paginas)
+
+
+def desserializar_paginas(texto):
+    return [(d["p"], d["t"]) for d in (json.loads(l) for l in texto.split('\n') if l)]
+
+
+def blocos_paginas(paginas):
+    """Cada página com seu marcador [[PAGINA:n]], como em iter_paginas_pdf_local"""
+    return (f"[[PAGINA:{n}]]\n{t}" for n, t in paginas)
+
+
+def montar_texto(paginas):
+    """Reproduz o formato de extract_text_from_pdf_local: páginas separadas por linha em branco"""
+    return "\n\n".join(blocos_paginas(paginas))
+
+
+async def salvar_janela(env, document_id, pagina_inicial, paginas):
+    chave = chave_janela(document_id, pagina_inicial)
+    await env.agems_docs.put(chave, serializar_paginas(paginas))
+    return chave
+
+
+async def carregar_paginas(env, chaves):
+    """Lê as janelas na ordem informada e devolve a lista de páginas"""
+    paginas = []
+    for chave in chaves:
+        obj = await env.agems_docs.get(chave)
+        if not obj: raise Exception(f"Janela de extração ausente no R2: {chave}")
+        paginas.extend(desserializar_paginas(await obj.text()))
+    return paginas
+
+
+def chave_elementos(document_id, pagina_inicial):
+    return f"{PREFIXO_PAGINAS}/{document_id}/{pagina_inicial:06d}.elementos.jsonl"
+
+
+async def salvar_elementos(env, document_id, pagina_inicial, conteudo):
+    """conteudo: elementos da janela já serializados (JSON Lines)"""
+    chave = chave_elementos(document_id, pagina_inicial)
+    await env.agems_docs.put(chave, conteudo)
+    return chave
+
+
+async def carregar_elementos(env, chaves):
+    """Lê os elementos das janelas na ordem informada e devolve o JSON Lines concatenado"""
+    partes = []
+    for chave in chaves:
+        obj = await env.agems_docs.get(chave)
+        if not obj: raise Exception(f"Elementos da janela ausentes no R2: {chave}")
+        partes.append(await obj.text())
+    return ''.join(partes)
+
+
+async def remover_janelas(env, chaves):
+    for chave in chaves:
+        await env.agems_docs.delete(chave)
+
+
+# ================================================================================
+# CACHE DE PÁGINAS POR SHA-256 DO PDF
+# ================================================================================
+
+PREFIXO_CACHE = "cache/paginas"
+
+
+def chave_cache(sha256, opcoes):
+    return f"{PREFIXO_CACHE}/{sha256}/{opcoes}.jsonl"
+
+
+async def carregar_cache(env, sha256, opcoes):
+    """
+    Returns:
+        (total_paginas, {pagina: texto}) — (None, {}) se não houver cache.
+        Páginas sem texto também são registradas (texto vazio).
+    """
+    obj = await env.agems_docs.get(chave_cache(sha256, opcoes))
+    if not obj: return None, {}
+    conteudo = await obj.text()
+    cabecalho, _, corpo = conteudo.partition('\n')
+    return json.loads(cabecalho)["total"], dict(desserializar_paginas(corpo))
+
+
+async def salvar_cache(env, sha256, opcoes, total_paginas, paginas):
+    cabecalho = json.dumps({"total": total_paginas}) + '\n'
+    await env.agems_docs.put(chave_cache(sha256, opcoes),
+                             cabecalho + serializar_paginas(sorted(paginas.items())))
+
+
+# ================================================================================
+# ARTEFATO PRÉ-EXTRAÍDO (gerado fora do Worker, ex.: ingest.py --artefato)
+# ================================================================================
+#
+# documents/{id}.pages.jsonl, ao lado do PDF. A primeira linha é o cabeçalho
+# {"sha256", "backend", "extracao", "total"}; as demais seguem o formato das janelas.
+# O artefato só é usado se o sha256 bater com o do PDF registrado no D1, e
+# "extracao" (backend + opções, extraction_backends.chave_extracao) precisa ser
+# a do Worker para o documento (handlers/chunks.py:chave_extracao_worker).
+
+def chave_artefato(r2_key):
+    return f"{r2_key.rsplit('.', 1)[0]}.pages.jsonl"
+
+
+def serializar_artefato(sha256, backend, extracao, total_paginas, paginas):
+    """paginas: lista de (numero, texto), incluindo as páginas sem texto"""
+    cabecalho = json.dumps({"sha256": sha256, "backend": backend, "extracao": extracao,
+                            "total": total_paginas}) + '\n'
+    return cabecalho + serializar_paginas(paginas)
+
+
+def ler_artefato(conteudo):
+    """
+    Returns:
+        (cabecalho, paginas). Gera ValueError se o conteúdo não for um artefato válido.
+    """
+    linha, _, corpo = conteudo.partition('\n')
+    try:
+        cabecalho = json.loads(linha)
+        paginas = desserializar_paginas(corpo)
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
+        raise ValueError(f"Artefato malformado: {e}")
+    if not isinstance(cabecalho, dict) or not all(k in cabecalho for k in ("sha256", "total")):
+        raise ValueError("Cabeçalho do artefato deve conter sha256 e total")
+    if any(not 1 <= n <= cabecalho["total"] for n, _ in paginas):
+        raise ValueError("Artefato contém páginas fora do intervalo 1..total")
+    return cabecalho, paginas
+
+
+async def salvar_artefato(env, r2_key, conteudo):
+    await env.agems_docs.put(chave_artefato(r2_key), conteudo)
+
+
+async def carregar_artefato(env, r2_key, sha256):
+    """
+    Returns:
+        (total_paginas, paginas com texto, extracao) ou None se não houver
+        artefato ou se ele tiver sido gerado a partir de outro PDF.
+    """
+    obj = await env.agems_docs.get(chave_artefato(r2_key))
+    if not obj: return None
+    cabecalho, paginas = ler_artefato(await obj.text())
+    if not sha256 or cabecalho["sha256"] != sha256:
+        print(f"WARN: Artefato de {r2_key} ignorado (checksum não confere com o PDF)")
+        return None
+    return cabecalho["total"], [(n, t) for n, t in paginas if t], cabecalho.get("extracao")
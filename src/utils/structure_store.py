@@ -0,0 +1,240 @@
+"""
+Árvore estrutural dos documentos persistida no D1 (tabela document_nodes).
+
+Gerada em etapa_chunkar a partir dos chunks finais
+(ChunkerRegulatorio.arvore_estrutura): uma linha por elemento, com o id do
+nó pai, tipo, número, página e os chunk_id do elemento (o vetor de cada chunk
+no Vectorize é {document_id}-{chunk_id}). Permite navegar pela hierarquia
+(Título > Capítulo > Seção > Art. > § > inciso > alínea) sem consultar o Vectorize.
+
+Caminhos de elementos são pares tipo/numero (ex.: artigo/146/paragrafo/1),
+casados com a cadeia de ancestrais do elemento na ordem, sem precisar
+começar na raiz.
+
+As referências cruzadas (hierarchy_semantics.grafo_referencias) ficam em
+document_references: uma aresta por chunk de origem e elemento citado
+(target_node_id NULL para normas externas). Servem às consultas reversas
+("quem cita o art. 23") e à busca antecipada dos artigos citados pelos
+melhores resultados em handle_query (carregar_citados).
+"""
+
+import json
+from pyodide.ffi import to_js
+
+# D1 aceita até 100 parâmetros por consulta: 7 por nó e 5 por aresta na inserção,
+# 1 por nó nos filhos e até 2 por trecho de origem em carregar_citados
+NOS_POR_INSERT = 14
+ARESTAS_POR_INSERT = 20
+LIMITE_CANDIDATOS = 50
+LIMITE_ORIGENS = 50
+
+COLUNAS_NO = "node_id, parent_id, tipo, numero, pagina, chunk_ids"
+
+
+def ler_caminho(texto):
+    """
+    'artigo/146/paragrafo/1' -> [('artigo', '146'), ('paragrafo', '1')].
+    Gera ValueError se o caminho não for formado por pares tipo/numero.
+    """
+    partes = [p for p in texto.strip('/').split('/') if p]
+    if not partes or len(partes) % 2:
+        raise ValueError("O caminho deve ser formado por pares tipo/numero (ex.: artigo/146/paragrafo/1)")
+    return [(partes[i].lower(), partes[i + 1]) for i in range(0, len(partes), 2)]
+
+
+def caminho_corresponde(caminho, ancestrais):
+    """Os pares de caminho aparecem, nessa ordem, em ancestrais (da raiz ao pai)"""
+    restantes = iter(ancestrais)
+    return all(any(a == par for a in restantes) for par in caminho)
+
+
+def no_de_linha(linha):
+    """Nó como devolvido pela API (chunk_ids já decodificado)"""
+    return {**{k: linha[k] for k in ("node_id", "parent_id", "tipo", "numero", "pagina")},
+            "chunk_ids": json.loads(linha["chunk_ids"])}
+
+
+def _resultados(resultado):
+    return resultado.to_py().get("results", [])
+
+
+async def salvar_arvore(env, document_id, nos):
+    """Substitui a árvore do documento numa única transação (batch do D1)"""
+    db = env.agems_rag_db
+    comandos = [db.prepare("DELETE FROM document_nodes WHERE document_id = ?").bind(document_id)]
+    for i in range(0, len(nos), NOS_POR_INSERT):
+        lote = nos[i:i + NOS_POR_INSERT]
+        valores = []
+        for no in lote:
+            valores += [document_id, no["id"], no["pai"], no["tipo"], no["numero"], no["pagina"],
+                        json.dumps(no["chunks"], separators=(',', ':'))]
+        comandos.append(db.prepare(
+            f"INSERT INTO document_nodes (document_id, {COLUNAS_NO}) VALUES "
+            + ", ".join(["(?, ?, ?, ?, ?, ?, ?)"] * len(lote))
+        ).bind(*valores))
+    await db.batch(to_js(comandos))
+    print(f"DEBUG: Árvore estrutural salva ({len(nos)} nós)")
+
+
+async def carregar_arvore(env, document_id, pai=None, so_filhos=False):
+    """
+    Nós do documento na ordem do texto. Com so_filhos, só os filhos diretos
+    de pai (pai=None: as raízes).
+    """
+    db = env.agems_rag_db
+    if not so_filhos:
+        consulta = db.prepare(
+            f"SELECT {COLUNAS_NO} FROM document_nodes WHERE document_id = ? ORDER BY node_id"
+        ).bind(document_id)
+    elif pai is None:
+        consulta = db.prepare(
+            f"SELECT {COLUNAS_NO} FROM document_nodes WHERE document_id = ? AND parent_id IS NULL ORDER BY node_id"
+        ).bind(document_id)
+    else:
+        consulta = db.prepare(
+            f"SELECT {COLUNAS_NO} FROM document_nodes WHERE document_id = ? AND parent_id = ? ORDER BY node_id"
+        ).bind(document_id, pai)
+    return [no_de_linha(l) for l in _resultados(await consulta.all())]
+
+
+async def carregar_no(env, document_id, node_id):
+    """Um nó pelo id, ou None"""
+    linha = await env.agems_rag_db.prepare(
+        f"SELECT {COLUNAS_NO} FROM document_nodes WHERE document_id = ? AND node_id = ?"
+    ).bind(document_id, node_id).first()
+    return no_de_linha(linha.to_py()) if linha else None
+
+
+async def buscar_elementos(env, document_id, caminho, limite=LIMITE_CANDIDATOS):
+    """
+    Elementos cujo último par do caminho é (tipo, numero) e cujos ancestrais
+    contêm os pares anteriores (no máximo limite, na ordem do texto), cada um
+    com 'ancestors' (da raiz ao pai) e 'children' diretos.
+    Duas consultas, independentemente da profundidade.
+    """
+    db = env.agems_rag_db
+    tipo, numero = caminho[-1]
+    # Candidatos pelo índice (document_id, tipo, numero) e, pela chave primária, seus ancestrais
+    linhas = _resultados(await db.prepare(
+        "WITH RECURSIVE cadeia(origem, node_id, distancia) AS ("
+        "  SELECT node_id, node_id, 0 FROM document_nodes WHERE document_id = ? AND tipo = ? AND numero = ?"
+        "  UNION ALL"
+        "  SELECT c.origem, n.parent_id, c.distancia + 1 FROM cadeia c"
+        "  JOIN document_nodes n ON n.document_id = ? AND n.node_id = c.node_id"
+        "  WHERE n.parent_id IS NOT NULL"
+        ") "
+        f"SELECT c.origem, c.distancia, {', '.join('n.' + c for c in COLUNAS_NO.split(', '))} "
+        "FROM cadeia c JOIN document_nodes n ON n.document_id = ? AND n.node_id = c.node_id "
+        "ORDER BY c.origem, c.distancia DESC"
+    ).bind(document_id, tipo, numero, document_id, document_id).all())
+
+    cadeias = {}
+    for linha in linhas:
+        cadeias.setdefault(linha["origem"], []).append(no_de_linha(linha))
+    encontrados = []
+    for *ancestrais, elemento in cadeias.values():
+        if caminho_corresponde(caminho[:-1], [(a["tipo"], a["numero"]) for a in ancestrais]):
+            encontrados.append({**elemento, "ancestors": ancestrais, "children": []})
+            if len(encontrados) == limite:
+                break
+    if not encontrados:
+        return []
+
+    por_id = {e["node_id"]: e for e in encontrados}
+    for linha in _resultados(await db.prepare(
+        f"SELECT {COLUNAS_NO} FROM document_nodes WHERE document_id = ? "
+        f"AND parent_id IN ({', '.join('?' * len(por_id))}) ORDER BY node_id"
+    ).bind(document_id, *por_id).all()):
+        por_id[linha["parent_id"]]["children"].append(no_de_linha(linha))
+    return encontrados
+
+
+async def salvar_referencias(env, document_id, arestas):
+    """Substitui as arestas do documento numa única transação (batch do D1)"""
+    db = env.agems_rag_db
+    comandos = [db.prepare("DELETE FROM document_references WHERE document_id = ?").bind(document_id)]
+    for i in range(0, len(arestas), ARESTAS_POR_INSERT):
+        lote = arestas[i:i + ARESTAS_POR_INSERT]
+        valores = []
+        for a in lote:
+            valores += [document_id, a["origem"], a["chunk_id"], a["alvo"], a["referencia"]]
+        comandos.append(db.prepare(
+            "INSERT INTO document_references "
+            "(document_id, source_node_id, source_chunk_id, target_node_id, referencia) VALUES "
+            + ", ".join(["(?, ?, ?, ?, ?)"] * len(lote))
+        ).bind(*valores))
+    await db.batch(to_js(comandos))
+    print(f"DEBUG: Grafo de referências salvo ({len(arestas)} arestas)")
+
+
+async def carregar_referencias(env, document_id, node_id):
+    """
+    Returns:
+        (citado_por, cita): arestas que chegam ao nó e que saem dele, cada uma
+        com o nó do outro lado ('node': None para normas externas)
+    """
+    db = env.agems_rag_db
+    colunas = ", ".join(f"n.{c}" for c in COLUNAS_NO.split(", "))
+    citado_por = _resultados(await db.prepare(
+        f"SELECT r.source_chunk_id, r.referencia, {colunas} FROM document_references r "
+        "JOIN document_nodes n ON n.document_id = r.document_id AND n.node_id = r.source_node_id "
+        "WHERE r.document_id = ? AND r.target_node_id = ? ORDER BY r.source_node_id"
+    ).bind(document_id, node_id).all())
+    cita = _resultados(await db.prepare(
+        f"SELECT r.source_chunk_id, r.referencia, {colunas} FROM document_references r "
+        "LEFT JOIN document_nodes n ON n.document_id = r.document_id AND n.node_id = r.target_node_id "
+        "WHERE r.document_id = ? AND r.source_node_id = ? ORDER BY r.source_chunk_id"
+    ).bind(document_id, node_id).all())
+
+    def aresta(linha):
+        no = no_de_linha(linha) if linha["node_id"] is not None else None
+        return {"chunk_id": linha["source_chunk_id"], "referencia": linha["referencia"], "node": no}
+    return [aresta(l) for l in citado_por], [aresta(l) for l in cita]
+
+
+async def carregar_citados(env, origens, profundidade=1, por_origem=3, limite=10):
+    """
+    Trechos citados pelos trechos de origem, seguindo as referências internas
+    até profundidade saltos. Uma leitura no D1 por salto, para todas as origens.
+
+    Args:
+        origens: [(document_id, chunk_id)] (ex.: os melhores resultados da busca)
+        por_origem: máximo de elementos citados seguidos a partir de cada trecho
+        limite: máximo de trechos devolvidos no total
+    Returns:
+        [(document_id, chunk_id)] na ordem de descoberta, sem as origens nem repetições
+    """
+    db = env.agems_rag_db
+    vistos, fronteira, citados = set(origens), list(origens), []
+    for _ in range(profundidade):
+        fronteira = fronteira[:LIMITE_ORIGENS]
+        if not fronteira or len(citados) >= limite:
+            break
+        # Um termo por documento, para o D1 usar o índice (document_id, source_chunk_id)
+        por_documento = {}
+        for document_id, chunk_id in fronteira:
+            por_documento.setdefault(document_id, []).append(chunk_id)
+        filtro = " OR ".join(f"(r.document_id = ? AND r.source_chunk_id IN ({', '.join('?' * len(ids))}))"
+                             for ids in por_documento.values())
+        linhas = _resultados(await db.prepare(
+            "SELECT r.document_id, r.source_chunk_id, n.chunk_ids FROM document_references r "
+            "JOIN document_nodes n ON n.document_id = r.document_id AND n.node_id = r.target_node_id "
+            f"WHERE {filtro} ORDER BY r.rowid"
+        ).bind(*(v for d, ids in por_documento.items() for v in (d, *ids))).all())
+        # Segue a ordem das origens (a dos resultados da busca) e, em cada uma, a do texto
+        ordem = {o: i for i, o in enumerate(fronteira)}
+        linhas.sort(key=lambda l: ordem[(l["document_id"], l["source_chunk_id"])])
+        seguidos, proxima = {}, []
+        for linha in linhas:
+            origem = (linha["document_id"], linha["source_chunk_id"])
+            if seguidos.get(origem, 0) >= por_origem:
+                continue
+            seguidos[origem] = seguidos.get(origem, 0) + 1
+            for chunk_id in json.loads(linha["chunk_ids"]):
+                alvo = (linha["document_id"], chunk_id)
+                if alvo not in vistos:
+                    vistos.add(alvo)
+                    proxima.append(alvo)
+        citados.extend(proxima)
+        fronteira = proxima
+    return citados[:limite]
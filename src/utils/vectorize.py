@@ -48,21 +48,27 @@ async def generate_embeddings_for_chunks(env, chunks):
             
     return chunks
 
-async def process_and_vectorize_chunks(env, document_id, doc_metadata, chunks, start_index=0, limit=None):
+async def process_and_vectorize_chunks(env, document_id, doc_metadata, chunks, start_index=0, limit=None, indice_base=0, usar_upsert=False):
     """
     Recebe chunks, seleciona um lote, garante que tenham embeddings e insere no Vectorize.
+    indice_base: posição de chunks[0] no documento completo (quando a lista já é uma fatia do manifesto).
+    usar_upsert: sobrescreve vetores existentes (reprocessamento idempotente pela fila).
     """
     # Se limit foi passado, pega apenas a fatia solicitada
     target_chunks = chunks[start_index : start_index + limit] if limit else chunks[start_index:]
+    # Quase duplicados (near_duplicates): só o representante do grupo é vetorizado
+    representantes = [c for c in target_chunks if not c.get("representante")]
     
     # 1. Garante embeddings (se não houver, gera)
-    has_missing_embeddings = any(c.get("embedding") is None for c in target_chunks)
+    has_missing_embeddings = any(c.get("embedding") is None for c in representantes)
     if has_missing_embeddings:
-        target_chunks = await generate_embeddings_for_chunks(env, target_chunks)
+        await generate_embeddings_for_chunks(env, representantes)
 
     vectors = []
     for i, chunk in enumerate(target_chunks):
-        actual_index = start_index + i
+        if chunk.get("representante"):
+            continue
+        actual_index = indice_base + start_index + i
         
         # Sanitização do Embedding
         emb = sanitize_embedding(chunk.get("embedding"))
@@ -94,13 +100,19 @@ async def process_and_vectorize_chunks(env, document_id, doc_metadata, chunks, s
                 **{k: v for k, v in chunk.get("metadata", {}).items() if v is not None}
             }
         }
+        if chunk.get("aliases"):
+            vector_obj["metadata"]["aliases"] = ",".join(chunk["aliases"])
         vectors.append(vector_obj)
 
     if not vectors:
         return 0
 
     # 4. Inserção no Vectorize
-    await env.VECTORIZE.insert(to_js(vectors, dict_converter=Object.fromEntries))
+    vectors_js = to_js(vectors, dict_converter=Object.fromEntries)
+    if usar_upsert:
+        await env.VECTORIZE.upsert(vectors_js)
+    else:
+        await env.VECTORIZE.insert(vectors_js)
     
     print(f"DEBUG: {len(vectors)} vetores inseridos com sucesso!")
     return len(vectors)
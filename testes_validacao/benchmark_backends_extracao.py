@@ -0,0 +1,86 @@
+"""
+Benchmark dos backends de extração (src/handlers/extraction_backends.py)
+
+Para cada backend: extrai o PDF inteiro (sem cache), mede páginas/s, roda o
+ChunkerRegulatorio e compara os chunks com o relatório de referência
+(REN_1000_ANEEL_consolidado.txt, gerado com pdfplumber-layout e com o Anexo IV
+em um chunk por linha, por isso o chunker roda com agrupar_anexo_iv=False).
+
+Concordância:
+- estrutura: fração dos chunks da referência cujo par (tipo, contexto) aparece na saída
+- texto: fração dos chunks da referência com texto idêntico (espaços normalizados) na saída
+
+Uso: python testes_validacao/benchmark_backends_extracao.py [pdf] [consolidado]
+"""
+
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'handlers'))
+
+from chunker import ChunkerRegulatorio
+from extract_from_pdf import extract_text_from_pdf_local, _contar_paginas
+from extraction_backends import BACKENDS, obter_backend
+
+pdf_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(RAIZ, 'documentos_para_processar', 'REN_1000_ANEEL.pdf')
+consolidado = sys.argv[2] if len(sys.argv) > 2 else os.path.join(RAIZ, 'documentos_para_processar', 'REN_1000_ANEEL_consolidado.txt')
+
+CABECALHO = re.compile(r'^CHUNK (\S+) \| PÁG: (\S+) \| TIPO: (\S+)\nCONTEXTO: (.*)\n-{80}\n', re.M)
+
+
+def ler_consolidado(path):
+    """Lê o relatório de exportar_txt como lista de (tipo, contexto, texto)"""
+    with open(path, encoding='utf-8') as f:
+        conteudo = f.read()
+    cabecalhos = list(CABECALHO.finditer(conteudo))
+    chunks = []
+    for atual, seguinte in zip(cabecalhos, cabecalhos[1:] + [None]):
+        fim = seguinte.start() if seguinte else len(conteudo)
+        chunks.append((atual.group(3), atual.group(4), conteudo[atual.end():fim].rstrip('\n')))
+    return chunks
+
+
+def normalizar(texto):
+    return ' '.join(texto.split())
+
+
+def concordancia(referencia, obtidos):
+    estrutura_ref = Counter((t, c) for t, c, _ in referencia)
+    estrutura = Counter((t, c) for t, c, _ in obtidos)
+    textos_ref = Counter(normalizar(x) for _, _, x in referencia)
+    textos = Counter(normalizar(x) for _, _, x in obtidos)
+    total = len(referencia) or 1
+    return (sum((estrutura_ref & estrutura).values()) / total,
+            sum((textos_ref & textos).values()) / total)
+
+
+referencia = ler_consolidado(consolidado)
+
+print("=" * 80)
+print(f"BENCHMARK: backends de extração em {os.path.basename(pdf_path)}")
+print(f"Referência: {os.path.basename(consolidado)} ({len(referencia)} chunks)")
+print("=" * 80)
+
+for nome in BACKENDS:
+    backend = obter_backend(nome)
+    total_paginas = _contar_paginas(pdf_path, backend)
+
+    inicio = time.perf_counter()
+    texto = extract_text_from_pdf_local(pdf_path, verbose=False, backend=backend)
+    t_extracao = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    chunks = ChunkerRegulatorio(agrupar_anexo_iv=False).criar_chunks(texto)
+    t_chunking = time.perf_counter() - inicio
+
+    obtidos = [(c['tipo'], c['contexto_hierarquico'], c['texto']) for c in chunks]
+    estrutura, textos = concordancia(referencia, obtidos)
+
+    print(f"\n{nome}")
+    print(f"   extração: {t_extracao:7.2f}s  ({total_paginas / t_extracao:6.2f} páginas/s)")
+    print(f"   chunking: {t_chunking:7.2f}s  ({len(chunks)} chunks)")
+    print(f"   concordância com a referência: estrutura {estrutura:6.1%}  texto {textos:6.1%}")
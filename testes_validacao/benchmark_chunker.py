@@ -0,0 +1,141 @@
+"""
+Benchmark por estágio e regressão golden do ChunkerRegulatorio
+(src/handlers/chunker.py, o mesmo motor usado pelo Worker via chunks.py)
+
+Estágios medidos (tempo de parede, pico de memória via tracemalloc e vazão):
+- limpar      limpar_texto
+- normalizar  _normalizar_estrutura
+- parse       divisão em elementos (o vínculo hierárquico é feito durante o parse)
+- hierarquia  _estabelecer_hierarquia sobre os elementos já vinculados
+              (custo isolado do vínculo; o resultado não muda)
+- dedup       _deduplicar_elementos
+- format      filtragem de revogados, divisão e formatação dos chunks
+
+O tempo vem de uma execução sem tracemalloc; o pico de memória, de uma segunda
+execução com tracemalloc ligado (que deixa tudo bem mais lento).
+
+Por fim, o chunker roda com e sem EstatisticasChunking (tempos e contagens
+por etapa coletados pelo próprio chunker).
+
+A saída é comparada com o arquivo golden em testes_validacao/golden/ (uma linha JSON por chunk: chunk_id, tipo, numero,
+pagina e os 16 primeiros dígitos do SHA-256 do chunk inteiro). Qualquer
+divergência encerra com código 1.
+
+Uso: python testes_validacao/benchmark_chunker.py [texto_extraido.txt] [--atualizar]
+     --atualizar regrava os arquivos golden com a saída atual
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'handlers'))
+
+from chunker import ChunkerRegulatorio, EstatisticasChunking
+
+PASTA_GOLDEN = os.path.join(RAIZ, 'testes_validacao', 'golden')
+
+
+def estagios(chunker):
+    """Estágios na ordem de criar_chunks"""
+    return [
+        ('limpar', chunker.limpar_texto, 'caracteres'),
+        ('normalizar', chunker._normalizar_estrutura, 'caracteres'),
+        ('parse', lambda t: list(chunker.iterar_elementos(t.split('\n'))), 'elementos'),
+        ('hierarquia', lambda els: chunker._estabelecer_hierarquia(els) or els, 'elementos'),
+        ('dedup', chunker._deduplicar_elementos, 'elementos'),
+        ('format', lambda els: chunker._gerar_chunks(els)[0], 'chunks'),
+    ]
+
+
+def executar(estagios, texto, medir_memoria=False):
+    """Roda os estágios encadeados; devolve (saída final, [(nome, segundos, pico, itens, unidade)])"""
+    medidas, dado = [], texto
+    for nome, funcao, unidade in estagios:
+        if medir_memoria:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        dado = funcao(dado)
+        segundos = time.perf_counter() - inicio
+        pico = 0
+        if medir_memoria:
+            pico = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        medidas.append((nome, segundos, pico, len(dado), unidade))
+    return dado, medidas
+
+
+def resumo_chunk(chunk):
+    conteudo = json.dumps(chunk, ensure_ascii=False, sort_keys=True)
+    return {'chunk_id': chunk['chunk_id'], 'tipo': chunk['tipo'], 'numero': chunk['numero'],
+            'pagina': chunk['pagina'], 'sha256': hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:16]}
+
+
+def comparar_golden(caminho, resumos):
+    """Devolve a lista de divergências (vazia se idêntico)"""
+    with open(caminho, encoding='utf-8') as f:
+        esperados = [json.loads(l) for l in f if l.strip()]
+    divergencias = [f"{e['chunk_id']}: esperado {e['tipo']} {e['numero']} (pág. {e['pagina']}), "
+                    f"obtido {r['tipo']} {r['numero']} (pág. {r['pagina']})"
+                    for e, r in zip(esperados, resumos) if e != r]
+    if len(esperados) != len(resumos):
+        divergencias.append(f"{len(esperados)} chunks esperados, {len(resumos)} obtidos")
+    return divergencias
+
+
+args = [a for a in sys.argv[1:] if not a.startswith('--')]
+atualizar = '--atualizar' in sys.argv
+caminho = args[0] if args else os.path.join(RAIZ, 'documentos_para_processar', 'REN_1000_ANEEL_raw_text_extract.txt')
+with open(caminho, encoding='utf-8') as f:
+    texto = f.read()
+documento = os.path.splitext(os.path.basename(caminho))[0].replace('_raw_text_extract', '')
+
+print("=" * 80)
+print(f"BENCHMARK: chunker por estágio em {os.path.basename(caminho)} ({len(texto)} caracteres)")
+print("=" * 80)
+
+chunks, tempos = executar(estagios(ChunkerRegulatorio()), texto)
+_, memoria = executar(estagios(ChunkerRegulatorio()), texto, medir_memoria=True)
+
+print()
+for (estagio, segundos, _, itens, unidade), (_, _, pico, _, _) in zip(tempos, memoria):
+    print(f"   {estagio:<11} {segundos:7.3f}s   pico {pico / 2**20:7.1f} MiB   "
+          f"{itens:>8} {unidade:<10} {itens / segundos:>12,.0f} {unidade}/s")
+print(f"   {'total':<11} {sum(t[1] for t in tempos):7.3f}s")
+
+falhas = int(chunks != ChunkerRegulatorio().criar_chunks(texto))
+print(f"   estágios == criar_chunks: {'✗' if falhas else '✓'}")
+
+resumos = [resumo_chunk(c) for c in chunks]
+golden = os.path.join(PASTA_GOLDEN, f"{documento}_chunker.jsonl")
+if atualizar or not os.path.exists(golden):
+    os.makedirs(PASTA_GOLDEN, exist_ok=True)
+    with open(golden, 'w', encoding='utf-8') as f:
+        f.writelines(json.dumps(r, ensure_ascii=False) + '\n' for r in resumos)
+    print(f"   golden gravado: {os.path.relpath(golden, RAIZ)} ({len(resumos)} chunks)")
+else:
+    divergencias = comparar_golden(golden, resumos)
+    print(f"   golden {os.path.basename(golden)}: "
+          f"{'✓ idêntico' if not divergencias else f'✗ {len(divergencias)} divergências'}")
+    for d in divergencias[:5]:
+        print(f"      {d}")
+    falhas += len(divergencias)
+
+# Coletor de estatísticas: mesma saída, custo zero quando desligado
+print("\ncom EstatisticasChunking")
+tempos = {}
+for rotulo, estatisticas in (('sem coletor', None), ('com coletor', EstatisticasChunking())):
+    chunker = ChunkerRegulatorio(estatisticas=estatisticas)
+    inicio = time.perf_counter()
+    saida = chunker.criar_chunks(texto)
+    tempos[rotulo] = time.perf_counter() - inicio
+    falhas += saida != chunks
+print(f"   criar_chunks sem coletor {tempos['sem coletor']:6.3f}s   com coletor {tempos['com coletor']:6.3f}s")
+print('\n'.join(f"   {l}" for l in estatisticas.resumo().split('\n')))
+
+print(f"\nResultado: {'✓ sem regressões' if not falhas else f'✗ {falhas} divergências'}")
+sys.exit(1 if falhas else 0)
@@ -0,0 +1,45 @@
+"""
+Benchmark do chunking paralelo por partições de topo (criar_chunks_paralelo)
+
+Mede o tempo para 1, 2, 4... processos e confere que os chunks são idênticos
+aos de criar_chunks (mesmos chunk_id, páginas, contextos e textos).
+Uso: python testes_validacao/benchmark_chunking_paralelo.py [texto_extraido.txt] [max_processos]
+"""
+
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'handlers'))
+
+from chunker import ChunkerRegulatorio, _SEPARADOR_PAGINAS
+
+caminho = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+    RAIZ, 'documentos_para_processar', 'REN_1000_ANEEL_raw_text_extract.txt')
+max_processos = int(sys.argv[2]) if len(sys.argv) > 2 else max(os.cpu_count() or 1, 2)
+with open(caminho, encoding='utf-8') as f:
+    texto = f.read()
+
+chunker = ChunkerRegulatorio()
+linhas = list(chunker.linhas_documento(_SEPARADOR_PAGINAS.split(texto)))
+particoes = chunker._particionar(linhas)
+
+print("=" * 80)
+print(f"BENCHMARK: chunking paralelo de {os.path.basename(caminho)} ({os.cpu_count()} CPUs)")
+print(f"{len(particoes)} partições; maior com {max(f - i for i, f, _, _ in particoes)} de {len(linhas)} linhas")
+print("=" * 80)
+
+inicio = time.perf_counter()
+referencia = chunker.criar_chunks(texto)
+t_serial = time.perf_counter() - inicio
+print(f"\nprocessos=1  {t_serial:7.2f}s  speedup 1.00x  (referência, {len(referencia)} chunks)")
+
+processos = 2
+while processos <= max_processos:
+    inicio = time.perf_counter()
+    chunks = chunker.criar_chunks_paralelo(texto, processos)
+    t = time.perf_counter() - inicio
+    status = "✓ idêntico" if chunks == referencia else "✗ DIVERGENTE"
+    print(f"processos={processos:<2} {t:7.2f}s  speedup {t_serial / t:4.2f}x  {status}")
+    processos *= 2
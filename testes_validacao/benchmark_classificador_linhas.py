@@ -0,0 +1,68 @@
+"""
+Benchmark do classificador de linhas do ChunkerRegulatorio (antes/depois)
+
+Antes: cada linha passa por re.search em cada padrão de lixo (strings cruas) e
+pelos padrões estruturais um a um, na ordem da cadeia if/elif.
+Depois: PadroesRegulatorios.classificar_linha / eh_lixo, uma alternação de grupos
+nomeados e uma regex de lixo compiladas uma vez.
+
+Confere que os chunks gerados são idênticos.
+Uso: python testes_validacao/benchmark_classificador_linhas.py [texto_extraido.txt]
+"""
+
+import os
+import re
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'handlers'))
+
+from chunker import ChunkerRegulatorio
+from hierarchy_semantics import PadroesRegulatorios
+
+
+class PadroesSequenciais(PadroesRegulatorios):
+    """Classificação como era antes: um padrão por vez"""
+
+    def classificar_linha(self, linha):
+        for nome in self.ORDEM_ESTRUTURAL:
+            if m := self.padroes[nome].match(linha):
+                return nome, m.group(1)
+        return None
+
+    def eh_lixo(self, linha):
+        return any(re.search(p, linha) for p in self.padroes['trash'])
+
+
+caminho = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+    RAIZ, 'documentos_para_processar', 'REN_1000_ANEEL_raw_text_extract.txt')
+with open(caminho, encoding='utf-8') as f:
+    texto = f.read()
+
+antes = ChunkerRegulatorio()
+antes.padroes_obj = PadroesSequenciais()
+depois = ChunkerRegulatorio()
+
+linhas = [l.strip() for l in depois._normalizar_estrutura(depois.limpar_texto(texto)).split('\n') if l.strip()]
+
+print("=" * 80)
+print(f"BENCHMARK: classificador de linhas em {os.path.basename(caminho)} ({len(linhas)} linhas)")
+print("=" * 80)
+
+tempos = {}
+for nome, chunker in (("antes", antes), ("depois", depois)):
+    padroes = chunker.padroes_obj
+    inicio = time.perf_counter()
+    classes = [None if padroes.eh_lixo(l) else padroes.classificar_linha(l) for l in linhas]
+    t_classificacao = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    chunks = chunker.criar_chunks(texto)
+    t_total = time.perf_counter() - inicio
+    tempos[nome] = (classes, chunks)
+    print(f"\n{nome:<7} classificação {t_classificacao:6.3f}s   criar_chunks {t_total:6.3f}s   ({len(chunks)} chunks)")
+
+(classes_antes, chunks_antes), (classes_depois, chunks_depois) = tempos["antes"], tempos["depois"]
+print(f"\nClassificação por linha idêntica: {'✓' if classes_antes == classes_depois else '✗'}")
+print(f"Chunks idênticos: {'✓' if chunks_antes == chunks_depois else '✗ DIVERGENTE'}")
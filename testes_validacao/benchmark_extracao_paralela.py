@@ -0,0 +1,42 @@
+"""
+Benchmark da extração paralela por faixas de páginas (extract_text_from_pdf_local)
+
+Mede o tempo para 1, 2, 4... processos e confere que o texto é idêntico ao serial
+(sai com código 1 se alguma execução divergir).
+Uso: python testes_validacao/benchmark_extracao_paralela.py [pdf] [max_workers]
+"""
+
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'handlers'))
+
+from extract_from_pdf import extract_text_from_pdf_local
+
+pdf_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(RAIZ, 'documentos_para_processar', 'REN_1000_ANEEL.pdf')
+max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+
+print("=" * 80)
+print(f"BENCHMARK: extração paralela de {os.path.basename(pdf_path)} ({os.cpu_count()} CPUs)")
+print("=" * 80)
+
+inicio = time.perf_counter()
+referencia = extract_text_from_pdf_local(pdf_path, verbose=False)
+t_serial = time.perf_counter() - inicio
+print(f"\nworkers=1  {t_serial:7.2f}s  speedup 1.00x  (referência, {len(referencia)} caracteres)")
+
+divergencias = 0
+workers = 2
+while workers <= max_workers:
+    inicio = time.perf_counter()
+    texto = extract_text_from_pdf_local(pdf_path, verbose=False, workers=workers)
+    t = time.perf_counter() - inicio
+    status = "✓ idêntico" if texto == referencia else "✗ DIVERGENTE"
+    divergencias += texto != referencia
+    print(f"workers={workers:<2} {t:7.2f}s  speedup {t_serial / t:4.2f}x  {status}")
+    workers *= 2
+
+print(f"\nResultado: {'✓ texto idêntico ao serial' if not divergencias else f'✗ {divergencias} divergências'}")
+sys.exit(1 if divergencias else 0)
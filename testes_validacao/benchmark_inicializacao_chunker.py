@@ -0,0 +1,81 @@
+"""
+Benchmark do custo de preparação do ChunkerRegulatorio por requisição
+
+Antes: cada requisição (handle_process, fila de ingestão) criava um
+ChunkerRegulatorio novo, que compilava PadroesRegulatorios e LimpadorTexto no
+__init__. Depois: as regras são compiladas uma vez na importação de
+hierarchy_semantics (PADROES, LIMPADOR) e os handlers reaproveitam a instância
+de obter_chunker().
+
+Mede:
+- importação do motor (compilação única das regras)
+- preparação por requisição: regras por instância x ChunkerRegulatorio() x obter_chunker(),
+  com o cache do módulo re aquecido e vazio (isolate recém-criado)
+- requisições completas num documento pequeno, com e sem reaproveitamento
+
+Uso: python testes_validacao/benchmark_inicializacao_chunker.py [texto_extraido.txt] [requisicoes]
+"""
+
+import os
+import re
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'handlers'))
+
+inicio = time.perf_counter()
+from chunker import ChunkerRegulatorio, obter_chunker
+t_importacao = time.perf_counter() - inicio
+from hierarchy_semantics import LimpadorTexto, PadroesRegulatorios
+
+
+def chunker_com_regras_proprias():
+    """Como cada requisição fazia antes: regras compiladas para a instância"""
+    chunker = ChunkerRegulatorio()
+    chunker.padroes_obj = PadroesRegulatorios()
+    chunker.padroes = chunker.padroes_obj.padroes
+    chunker.limpador = LimpadorTexto()
+    return chunker
+
+
+def medir(funcao, repeticoes, limpar_cache_re=False):
+    """Tempo médio por chamada, em ms"""
+    total = 0.0
+    for _ in range(repeticoes):
+        if limpar_cache_re:
+            re.purge()
+        inicio = time.perf_counter()
+        funcao()
+        total += time.perf_counter() - inicio
+    return total / repeticoes * 1000
+
+
+caminho = sys.argv[1] if len(sys.argv) > 1 else os.path.join(RAIZ, 'raw_text_extract.txt')
+requisicoes = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+with open(caminho, encoding='utf-8') as f:
+    texto = f.read()
+
+print("=" * 80)
+print("BENCHMARK: preparação do ChunkerRegulatorio por requisição")
+print("=" * 80)
+print(f"\nimportação do motor (regras compiladas uma vez): {t_importacao * 1000:7.2f} ms")
+
+print(f"\n{'preparação por requisição':<34} {'cache re aquecido':>18} {'cache re vazio':>16}")
+for rotulo, funcao in (("antes: regras por instância", chunker_com_regras_proprias),
+                       ("ChunkerRegulatorio()", ChunkerRegulatorio),
+                       ("obter_chunker()", obter_chunker)):
+    quente = medir(funcao, 200)
+    frio = medir(funcao, 20, limpar_cache_re=True)
+    print(f"{rotulo:<34} {quente:15.3f} ms {frio:13.3f} ms")
+
+referencia = chunker_com_regras_proprias().criar_chunks(texto)
+print(f"\n{requisicoes} requisições em {os.path.basename(caminho)} ({len(referencia)} chunks)")
+for rotulo, funcao in (("antes: chunker novo por requisição", chunker_com_regras_proprias),
+                       ("obter_chunker()", obter_chunker)):
+    re.purge()
+    inicio = time.perf_counter()
+    saidas = [funcao().criar_chunks(texto) for _ in range(requisicoes)]
+    total = time.perf_counter() - inicio
+    iguais = all(s == referencia for s in saidas)
+    print(f"   {rotulo:<36} {total * 1000 / requisicoes:8.2f} ms/requisição   {'✓' if iguais else '✗'}")
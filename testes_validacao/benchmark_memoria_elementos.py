@@ -0,0 +1,134 @@
+"""
+Memória dos elementos do parser: ElementoRegulatorio compacto x dataclass anterior
+
+Antes: ElementoRegulatorio era um @dataclass (com __dict__) e cada elemento
+guardava o próprio texto ('\\n'.join das linhas acumuladas); os contextos
+hierárquicos iguais de ancestrais diferentes eram strings distintas.
+Depois: __slots__, o texto fica como um intervalo de uma FonteTexto (buffer
+UTF-8 por divisão de topo) e só é materializado na leitura; contextos internados.
+
+A versão anterior (dataclass + iterar_elementos que junta o texto) está copiada
+abaixo. Mede a memória retida pelos elementos de parse_documento e o pico de
+criar_chunks, e confere que os chunks são idênticos.
+
+Uso: python testes_validacao/benchmark_memoria_elementos.py [texto_extraido.txt]
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'handlers'))
+
+from chunker import ChunkerRegulatorio
+from hierarchy_semantics import TipoElemento
+
+
+@dataclass
+class ElementoDataclass:
+    tipo: TipoElemento
+    numero: str
+    texto: str
+    nivel: int
+    pagina: int = 1
+    revogado: bool = False
+    pai: Optional['ElementoDataclass'] = None
+    contexto_hierarquico: str = ""
+
+
+class ChunkerAnterior(ChunkerRegulatorio):
+    """Elementos como eram antes: dataclass com o texto copiado"""
+
+    def _criar_elemento(self, padrao, numero, linha, pagina, elemento_atual, sequencias):
+        e = super()._criar_elemento(padrao, numero, linha, pagina, elemento_atual, sequencias)
+        return e and ElementoDataclass(e.tipo, e.numero, linha, e.nivel, e.pagina)
+
+    def _vincular(self, pilha, e):
+        while pilha and pilha[-1][0].nivel >= e.nivel:
+            pilha.pop()
+        base = ""
+        if pilha:
+            e.pai, base = pilha[-1]
+        e.contexto_hierarquico = base
+        prefixo = self._prefixo_contexto(e)
+        pilha.append((e, f"{base} > {prefixo}" if base and prefixo else base or prefixo))
+
+    def iterar_elementos(self, linhas, pagina_inicial=1, sequencias=None):
+        pilha = []
+        elemento_atual = None
+        texto_acumulado = []
+        if sequencias is None:
+            sequencias = {}
+        for _, linha, pagina_atual, incluida in self._percorrer_linhas(linhas, pagina_inicial):
+            if incluida:
+                if texto_acumulado:
+                    texto_acumulado[-1] += " " + linha
+                else:
+                    texto_acumulado.append(linha)
+                continue
+            elemento_identificado = None
+            if classificada := self.padroes_obj.classificar_linha(linha):
+                elemento_identificado = self._criar_elemento(
+                    *classificada, linha, pagina_atual, elemento_atual, sequencias
+                )
+            if elemento_identificado:
+                if elemento_atual:
+                    elemento_atual.texto = '\n'.join(texto_acumulado)
+                    yield elemento_atual
+                else:
+                    if texto_acumulado:
+                        preambulo = ElementoDataclass(TipoElemento.PREAMBULO, "0", '\n'.join(texto_acumulado),
+                                                      0, 1, contexto_hierarquico="Preâmbulo")
+                        self._vincular(pilha, preambulo)
+                        yield preambulo
+                elemento_identificado.texto = linha
+                elemento_atual = elemento_identificado
+                texto_acumulado = [linha]
+                self._vincular(pilha, elemento_atual)
+            else:
+                texto_acumulado.append(linha)
+        if elemento_atual:
+            elemento_atual.texto = '\n'.join(texto_acumulado)
+            yield elemento_atual
+
+
+def medir(funcao):
+    """(resultado, memória retida pelo resultado, pico, segundos); o tempo vem de uma execução sem tracemalloc"""
+    inicio = time.perf_counter()
+    funcao()
+    segundos = time.perf_counter() - inicio
+    tracemalloc.start()
+    resultado = funcao()
+    retida, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, retida, pico, segundos
+
+
+caminho = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+    RAIZ, 'documentos_para_processar', 'REN_1000_ANEEL_raw_text_extract.txt')
+with open(caminho, encoding='utf-8') as f:
+    texto = f.read()
+
+print("=" * 80)
+print(f"BENCHMARK: memória dos elementos em {os.path.basename(caminho)}")
+print("=" * 80)
+
+resultados = {}
+for rotulo, chunker in (("antes", ChunkerAnterior()), ("depois", ChunkerRegulatorio())):
+    chunker.criar_chunks(texto)  # aquece caches (re, strings internadas)
+    elementos, retida, _, t_parse = medir(lambda: chunker.parse_documento(texto))
+    del elementos
+    chunks, _, pico, t_chunks = medir(lambda: chunker.criar_chunks(texto))
+    resultados[rotulo] = (retida, pico, chunks)
+    print(f"\n{rotulo}")
+    print(f"   elementos de parse_documento: {retida / 2**20:6.2f} MiB retidos   ({t_parse:.3f}s)")
+    print(f"   criar_chunks: pico {pico / 2**20:6.2f} MiB   ({t_chunks:.3f}s, {len(chunks)} chunks)")
+
+(retida_antes, pico_antes, chunks_antes), (retida_depois, pico_depois, chunks_depois) = \
+    resultados["antes"], resultados["depois"]
+print(f"\nMemória retida pelos elementos: {1 - retida_depois / retida_antes:+.1%} de economia")
+print(f"Chunks idênticos: {'✓' if chunks_antes == chunks_depois else '✗ DIVERGENTE'}")
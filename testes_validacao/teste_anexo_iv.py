@@ -0,0 +1,75 @@
+"""
+Teste do agrupamento das linhas do Anexo IV (ChunkerRegulatorio, agrupar_anexo_iv).
+
+Confere, contra a saída de uma linha por chunk (agrupar_anexo_iv=False):
+- a redução do número de chunks do Anexo IV (149 -> 6 na REN 1000);
+- que linhas_do_chunk devolve exatamente as linhas antigas, na ordem;
+- que nenhum chunk agrupado passa de tamanho_max_chunk (exceto linha única maior);
+- que chunk['metadata']['linhas'] chega aos metadados do vetor montado em
+  ingest.py (_montar_vetor), como em utils/vectorize.py no Worker.
+
+Uso: python testes_validacao/teste_anexo_iv.py [texto_extraido.txt]
+"""
+
+import os
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'handlers'))
+sys.path.insert(0, RAIZ)
+
+from chunker import ChunkerRegulatorio, linhas_do_chunk
+
+caminho = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+    RAIZ, 'documentos_para_processar', 'REN_1000_ANEEL_raw_text_extract.txt')
+with open(caminho, encoding='utf-8') as f:
+    texto = f.read()
+
+
+def do_anexo_iv(chunks):
+    return [c for c in chunks if 'ANEXO IV' in c['contexto_hierarquico'].upper()
+            or (c['tipo'] == 'anexo' and c['numero'] == 'IV')]
+
+
+agrupador = ChunkerRegulatorio()
+agrupados = agrupador.criar_chunks(texto)
+por_linha = ChunkerRegulatorio(agrupar_anexo_iv=False).criar_chunks(texto)
+anexo_agrupado, anexo_linhas = do_anexo_iv(agrupados), do_anexo_iv(por_linha)
+
+print("=" * 80)
+print(f"TESTE: agrupamento do Anexo IV ({os.path.basename(caminho)})")
+print("=" * 80)
+print(f"Chunks do Anexo IV: {len(anexo_linhas)} -> {len(anexo_agrupado)}")
+print(f"Chunks do documento: {len(por_linha)} -> {len(agrupados)}")
+
+falhas = 0
+
+
+def conferir(rotulo, ok, detalhe=""):
+    global falhas
+    falhas += not ok
+    print(f"{rotulo}: {'✓' if ok else '✗'} {detalhe}")
+
+
+if len(sys.argv) > 1:
+    conferir("menos chunks no Anexo IV", 0 < len(anexo_agrupado) < len(anexo_linhas))
+else:
+    conferir("Anexo IV da REN 1000: 149 -> 6 chunks", (len(anexo_linhas), len(anexo_agrupado)) == (149, 6))
+conferir("resto do documento inalterado",
+         len(por_linha) - len(anexo_linhas) == len(agrupados) - len(anexo_agrupado))
+linhas = [l for c in anexo_agrupado for l in linhas_do_chunk(c)]
+antigas = [l for c in anexo_linhas for l in linhas_do_chunk(c)]
+conferir("linhas_do_chunk reproduz as linhas de agrupar_anexo_iv=False", linhas == antigas,
+         f"({len(linhas)} linhas)")
+grandes = [c for c in anexo_agrupado
+           if c['tamanho'] > agrupador.tamanho_max_chunk and len(linhas_do_chunk(c)) > 1]
+conferir(f"chunks agrupados dentro de {agrupador.tamanho_max_chunk} caracteres", not grandes,
+         f"({len(grandes)} acima)")
+
+from ingest import _montar_vetor
+vetor = _montar_vetor(anexo_agrupado[0], 0, anexo_agrupado[0]['texto'], [0.0])
+conferir("metadata['linhas'] chega ao vetor de ingest.py",
+         vetor["metadata"].get("linhas") == anexo_agrupado[0]['metadata']['linhas'])
+
+print(f"\nResultado: {'✓ agrupamento reversível' if not falhas else f'✗ {falhas} falhas'}")
+sys.exit(1 if falhas else 0)
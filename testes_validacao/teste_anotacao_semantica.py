@@ -0,0 +1,88 @@
+"""
+Teste da anotação semântica em uma passada (AnalisadorRegulatorio.analisar)
+
+Compara, chunk a chunk, com a implementação anterior (um re.finditer por
+padrão, copiada abaixo) e mede:
+- criar_chunks sem anotação x com anotação na geração
+- anotar_semantica serial x em ProcessPoolExecutor
+
+Uso: python testes_validacao/teste_anotacao_semantica.py [texto_extraido.txt] [processos]
+"""
+
+import os
+import re
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'handlers'))
+
+from chunker import ChunkerRegulatorio
+from hierarchy_semantics import AnalisadorRegulatorio, anotar_semantica, texto_sem_contexto
+
+
+def analisar_por_padrao(texto):
+    """Anotação como era antes: cada padrão num re.finditer próprio"""
+    def achados(padroes, flags=re.IGNORECASE):
+        return [m.group(0) for p in padroes for m in re.finditer(p, texto, flags)]
+    return {
+        'obrigacoes': achados([r'deverá\s+[^.;]+', r'é\s+obrigat[oó]rio\s+[^.;]+',
+                               r'deve\s+[^.;]+', r'fica\s+obrigad[oa]\s+[^.;]+']),
+        'vedacoes': achados([r'não\s+poder[áa]\s+[^.;]+', r'é\s+vedado\s+[^.;]+',
+                             r'fica\s+proibid[oa]\s+[^.;]+', r'não\s+ser[áa]\s+permitido\s+[^.;]+']),
+        'referencias': list(set(achados([
+            r'art(?:igo)?\.?\s+(\d+(?:-[A-Z])?)[ºo°]?', r'§\s*(\d+(?:-[A-Z])?)[ºo°]?',
+            r'inciso\s+([IVXLCDM]+(?:-[A-Z])?)', r'Lei\s+n[ºo°]?\s*[\d.]+/\d{4}',
+            r'Decreto\s+n[ºo°]?\s*[\d.]+/\d{4}', r'Resolução\s+(?:Normativa\s+)?n[ºo°]?\s*[\d.]+/\d{4}']))),
+        'valores': {
+            'potencias_mw': achados([r'(\d+(?:[.,]\d+)?)\s*(?:MW|kW)']),
+            'porcentagens': achados([r'(\d+(?:[.,]\d+)?)\s*%'], 0),
+            'prazos_dias': achados([r'(\d+)\s*(?:dias|meses)']),
+            'valores_monetarios': achados([r'R\$\s*[\d.,]+'], 0),
+        }
+    }
+
+
+def comparavel(semantica):
+    return {**semantica, 'referencias': sorted(semantica['referencias'])}
+
+
+caminho = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+    RAIZ, 'documentos_para_processar', 'REN_1000_ANEEL_raw_text_extract.txt')
+processos = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 2
+with open(caminho, encoding='utf-8') as f:
+    texto = f.read()
+
+print("=" * 80)
+print(f"TESTE: anotação semântica em {os.path.basename(caminho)}")
+print("=" * 80)
+
+inicio = time.perf_counter()
+chunks = ChunkerRegulatorio().criar_chunks(texto)
+t_sem = time.perf_counter() - inicio
+inicio = time.perf_counter()
+anotados = ChunkerRegulatorio(anotar_semantica=True).criar_chunks(texto)
+t_com = time.perf_counter() - inicio
+print(f"\ncriar_chunks sem anotação {t_sem:6.3f}s   com anotação {t_com:6.3f}s   ({len(chunks)} chunks)")
+
+textos = [texto_sem_contexto(c) for c in chunks]
+inicio = time.perf_counter()
+antes = [analisar_por_padrao(t) for t in textos]
+t_antes = time.perf_counter() - inicio
+inicio = time.perf_counter()
+depois = [AnalisadorRegulatorio.analisar(t) for t in textos]
+t_depois = time.perf_counter() - inicio
+print(f"análise por padrão {t_antes:6.3f}s   uma passada {t_depois:6.3f}s")
+
+divergentes = [i for i, (a, d) in enumerate(zip(antes, depois)) if comparavel(a) != comparavel(d)]
+print(f"\nAnotação idêntica à anterior: {'✓' if not divergentes else f'✗ {len(divergentes)} chunks divergentes'}")
+print(f"Mesma anotação na geração e em anotar_semantica: "
+      f"{'✓' if [c['semantica'] for c in anotados] == depois else '✗'}")
+
+for n in (1, processos):
+    copia = [dict(c) for c in chunks]
+    inicio = time.perf_counter()
+    anotar_semantica(copia, processos=n)
+    t = time.perf_counter() - inicio
+    iguais = [c['semantica'] for c in copia] == depois
+    print(f"anotar_semantica processos={n:<3} {t:6.3f}s   {'✓' if iguais else '✗'}")
@@ -0,0 +1,126 @@
+"""
+Teste do artefato pré-extraído (utils/page_store.py) enviado junto com o
+upload e do casamento de backend + opções de extração (chave_extracao_worker),
+com os bindings simulados de worker_local.py.
+
+- upload com o campo "artifact": o artefato é gravado antes de enfileirar e a
+  extração segue as janelas de PAGINAS_POR_MENSAGEM páginas, sem o pdfplumber;
+- upload com artefato de outro PDF, de outro backend ou com outras tolerâncias: 409;
+- POST /documents/{id}/artifact com backend diferente do documento: 409;
+- artefato (gravado antes da conferência) com outras tolerâncias chegando no
+  meio da extração no Worker: a extração recomeça da página 1 pelo artefato,
+  sem misturar as janelas já extraídas.
+
+Uso: python testes_validacao/teste_artefato_upload.py
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import sys
+
+import pdfplumber
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from worker_local import (PDF_REN, ArquivoLocal, RequisicaoLocal, cadastrar_documento, criar_ambiente,
+                          documento, paginas_ren)
+
+env = criar_ambiente()
+from handlers.chunks import chave_extracao_worker
+from handlers.extraction_backends import chave_extracao
+from handlers.ingestion import ETAPA_EXTRAIR, PAGINAS_POR_MENSAGEM, executar_etapa, handle_queue
+from handlers.upload import handle_upload, handle_upload_artifact
+from utils.page_store import chave_janela, salvar_artefato, serializar_artefato
+
+with open(PDF_REN, 'rb') as f:
+    PDF = f.read()
+SHA256 = hashlib.sha256(PDF).hexdigest()
+PAGINAS = paginas_ren()
+
+falhas = 0
+
+# PDFs abertos pelo pdfplumber (nenhum enquanto as páginas vêm do artefato)
+pdfplumber_abertos, _abrir_pdf = [], pdfplumber.open
+
+
+def abrir_pdf(*args, **kwargs):
+    pdfplumber_abertos.append(args[0] if args else kwargs.get("path_or_fp"))
+    return _abrir_pdf(*args, **kwargs)
+
+
+pdfplumber.open = abrir_pdf
+
+
+def conferir(rotulo, ok, detalhe=""):
+    global falhas
+    falhas += not ok
+    print(f"{rotulo}: {'✓' if ok else '✗'} {detalhe}")
+
+
+def artefato(backend="pdfplumber-layout", sha256=SHA256, extracao=None):
+    return serializar_artefato(sha256, backend, extracao or chave_extracao_worker(backend), len(PAGINAS), PAGINAS)
+
+
+# Tolerâncias padrão do pdfplumber (x_tolerance=3), e não as do Worker
+OUTRAS_OPCOES = chave_extracao("pdfplumber-layout")
+
+
+async def upload(artifact, **campos):
+    formulario = {"file": ArquivoLocal(PDF), "title": "REN 1000", "type": "REN", "artifact": ArquivoLocal(artifact),
+                  **campos}
+    r = await handle_upload(RequisicaoLocal("http://local/documents/upload", formulario=formulario), env)
+    return r.status, r.json()
+
+
+def mensagens_extracao(document_id):
+    return env.agems_rag_db.consultar(
+        "SELECT COUNT(*) AS n FROM ingestion_stages WHERE document_id = ? AND stage = 'extrair'", document_id)[0]["n"]
+
+
+async def main():
+    print("=" * 80)
+    print("TESTE: artefato pré-extraído no upload e casamento de backends")
+    print("=" * 80)
+
+    status, r = await upload(artefato())
+    await env.INGEST_QUEUE.drenar(env, handle_queue)
+    doc = documento(env, r["document_id"])
+    total = doc["chunk_count"]
+    esperadas = -(-doc["total_pages"] // PAGINAS_POR_MENSAGEM)
+    conferir(f"upload com artefato -> {esperadas} mensagens de extração ({PAGINAS_POR_MENSAGEM} páginas cada)",
+             status == 201 and r["artifact"] and doc["status"] == "processed"
+             and mensagens_extracao(doc["id"]) == esperadas and not pdfplumber_abertos,
+             f"(status {doc['status']}, {total} chunks, {mensagens_extracao(doc['id'])} extrações, "
+             f"{len(pdfplumber_abertos)} PDFs abertos no pdfplumber)")
+
+    status, r = await upload(artefato(sha256="0" * 64))
+    conferir("upload com artefato de outro PDF -> 409", status == 409, r.get("error", ""))
+    status, r = await upload(artefato("pdfminer-texto"))
+    conferir("upload com artefato de outro backend -> 409", status == 409, r.get("error", ""))
+    status, r = await upload(artefato(extracao=OUTRAS_OPCOES))
+    conferir("upload com artefato de outras tolerâncias -> 409", status == 409, r.get("error", ""))
+
+    DOC = "REN_MEIO"
+    await cadastrar_documento(env, DOC)
+    r = await handle_upload_artifact(RequisicaoLocal(f"http://local/documents/{DOC}/artifact", artefato("pdfminer-texto")), env)
+    conferir("POST /artifact com outro backend -> 409", r.status == 409, r.json().get("error", ""))
+
+    await executar_etapa(env, {"document_id": DOC, "etapa": ETAPA_EXTRAIR})
+    pagina = documento(env, DOC)["last_page"]
+    env.INGEST_QUEUE.pendentes.clear()
+    await salvar_artefato(env, documento(env, DOC)["r2_key"], artefato(extracao=OUTRAS_OPCOES))
+    await executar_etapa(env, {"document_id": DOC, "etapa": ETAPA_EXTRAIR})
+    janelas = json.loads(documento(env, DOC)["parser_state"])["janelas"]
+    conferir(f"artefato de outras tolerâncias após a página {pagina} -> recomeça da página 1",
+             janelas == [chave_janela(DOC, 1)] and chave_janela(DOC, pagina + 1) not in env.agems_docs.objetos,
+             f"(janelas {janelas})")
+    await env.INGEST_QUEUE.drenar(env, handle_queue)
+    doc = documento(env, DOC)
+    conferir("ingestão pelo artefato completa", doc["status"] == "processed" and doc["chunk_count"] == total,
+             f"(status {doc['status']}, {doc['chunk_count']} chunks)")
+
+
+asyncio.run(main())
+print(f"\nResultado: {'✓ artefato e backends consistentes em todos os casos' if not falhas else f'✗ {falhas} falhas'}")
+sys.exit(1 if falhas else 0)
@@ -0,0 +1,72 @@
+"""
+Teste da árvore estrutural (ChunkerRegulatorio.arvore_estrutura), a mesma
+gravada no D1 em etapa_chunkar e servida por GET /documents/{id}/tree.
+
+Confere que:
+- cada chunk aparece em exatamente um nó, na ordem do documento;
+- o pai de cada nó vem antes dele e tem nível estrutural menor;
+- a cadeia de ancestrais reconstrói o contexto_hierarquico do chunk
+  (exceto quando um ancestral não gerou chunk, ex.: revogado).
+
+Uso: python testes_validacao/teste_arvore_estrutura.py [texto_extraido.txt]
+"""
+
+import os
+import sys
+import time
+from collections import Counter
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'handlers'))
+
+from chunker import ChunkerRegulatorio
+from hierarchy_semantics import ElementoRegulatorio, TipoElemento
+
+caminho = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+    RAIZ, 'documentos_para_processar', 'REN_1000_ANEEL_raw_text_extract.txt')
+with open(caminho, encoding='utf-8') as f:
+    texto = f.read()
+
+chunker = ChunkerRegulatorio()
+chunks = chunker.criar_chunks(texto)
+inicio = time.perf_counter()
+nos = chunker.arvore_estrutura(chunks)
+segundos = time.perf_counter() - inicio
+
+print("=" * 80)
+print(f"TESTE: árvore estrutural em {os.path.basename(caminho)} ({len(chunks)} chunks)")
+print("=" * 80)
+print(f"\n{len(nos)} nós em {segundos * 1000:.1f} ms, {sum(n['pai'] is None for n in nos)} raízes")
+
+falhas = 0
+cobertura = [c for n in nos for c in n['chunks']] == [c['chunk_id'] for c in chunks]
+falhas += not cobertura
+print(f"cada chunk em um nó, na ordem: {'✓' if cobertura else '✗'}")
+
+por_chunk = {c['chunk_id']: c for c in chunks}
+pais_invalidos = [n for n in nos if n['pai'] is not None and
+                  (n['pai'] >= n['id'] or por_chunk[nos[n['pai']]['chunks'][0]]['nivel'] >= por_chunk[n['chunks'][0]]['nivel'])]
+falhas += len(pais_invalidos)
+print(f"pai antes do nó e em nível menor: {'✓' if not pais_invalidos else f'✗ {len(pais_invalidos)} nós'}")
+
+
+def contexto_reconstruido(no):
+    prefixos = []
+    while no['pai'] is not None:
+        no = nos[no['pai']]
+        prefixo = chunker._prefixo_contexto(ElementoRegulatorio(TipoElemento(no['tipo']), no['numero'], "", 0))
+        if prefixo:
+            prefixos.append(prefixo)
+    return ' > '.join(reversed(prefixos))
+
+
+divergentes = Counter()
+for n in nos:
+    contexto = por_chunk[n['chunks'][0]]['contexto_hierarquico']
+    if contexto_reconstruido(n) != contexto:
+        divergentes[n['tipo']] += 1
+print(f"contexto reconstruído pelos ancestrais: {len(nos) - sum(divergentes.values())}/{len(nos)} nós"
+      + (f" (ancestral sem chunk: {dict(divergentes)})" if divergentes else ""))
+
+print(f"\nResultado: {'✓ árvore consistente' if not falhas else f'✗ {falhas} falhas'}")
+sys.exit(1 if falhas else 0)
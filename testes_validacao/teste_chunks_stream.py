@@ -0,0 +1,76 @@
+"""
+Teste do chunking em streaming (ChunkerRegulatorio.criar_chunks_stream), usado
+por ingest.py enquanto as páginas são extraídas.
+
+Confere que a saída é igual à de criar_chunks:
+- na REN 1000, alimentada página a página;
+- com um Anexo repetido em outra divisão (a repetição é descartada, como em
+  criar_chunks, inclusive nos elementos abaixo do marcador de topo);
+- e que uma repetição posterior com "Incluído" de um elemento já produzido
+  (o único caso que o stream não reproduz) é informada em substituicoes_tardias.
+
+Uso: python testes_validacao/teste_chunks_stream.py [texto_extraido.txt]
+"""
+
+import os
+import re
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'handlers'))
+
+from chunker import ChunkerRegulatorio
+
+caminho = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+    RAIZ, 'documentos_para_processar', 'REN_1000_ANEEL_raw_text_extract.txt')
+with open(caminho, encoding='utf-8') as f:
+    texto = f.read()
+
+ANEXO_REPETIDO = """[[PAGINA:1]]
+ANEXO I
+Art. 1º O consumidor deve ser atendido no prazo de cinco dias.
+
+[[PAGINA:2]]
+ANEXO II
+Art. 1º A distribuidora deve manter atendimento presencial.
+
+[[PAGINA:3]]
+ANEXO I
+Art. 1º O consumidor deve ser atendido no prazo de cinco dias{nota}"""
+
+chunker = ChunkerRegulatorio()
+falhas = 0
+
+
+def conferir(rotulo, ok, detalhe=""):
+    global falhas
+    falhas += not ok
+    print(f"{rotulo}: {'✓' if ok else '✗'} {detalhe}")
+
+
+def comparar(documento):
+    """(stream == criar_chunks, substituições tardias, chunks do stream)"""
+    substituicoes = []
+    paginas = re.split(r'\n\n(?=\[\[PAGINA:)', documento)
+    stream = list(chunker.criar_chunks_stream(paginas, substituicoes))
+    return stream == chunker.criar_chunks(documento), substituicoes, stream
+
+
+print("=" * 80)
+print("TESTE: criar_chunks_stream x criar_chunks")
+print("=" * 80)
+
+igual, substituicoes, stream = comparar(texto)
+conferir(f"{os.path.basename(caminho)} página a página", igual and not substituicoes,
+         f"({len(stream)} chunks, {len(substituicoes)} substituições tardias)")
+
+igual, substituicoes, stream = comparar(ANEXO_REPETIDO.format(nota="."))
+conferir("Anexo repetido -> repetição descartada", igual and not substituicoes and len(stream) == 4,
+         f"({len(stream)} chunks)")
+
+igual, substituicoes, _ = comparar(ANEXO_REPETIDO.format(nota=" (Incluído pela REN ANEEL 1.059, de 07.02.2023)"))
+conferir("nova versão num Anexo repetido -> substituição tardia informada",
+         not igual and substituicoes == ["artigo|1|Anexo I"], f"({substituicoes})")
+
+print(f"\nResultado: {'✓ stream equivalente a criar_chunks' if not falhas else f'✗ {falhas} falhas'}")
+sys.exit(1 if falhas else 0)
@@ -0,0 +1,82 @@
+"""
+Teste do consumidor da fila de ingestão (handlers/ingestion.handle_queue)
+drenado por utils/local_queue.FilaLocal, com os bindings simulados de
+worker_local.py.
+
+- drenagem completa extrair -> chunkar -> vetorizar: status 'processed',
+  chunk_count igual ao total do manifesto e um vetor por representante;
+- falha transitória no Vectorize: a mensagem é reentregue e a ingestão termina;
+- reentrega do último 'vetorizar': chunk_count não é somado de novo;
+- falha persistente: a mensagem esgota as tentativas, vai para a DLQ e o
+  documento fica 'failed' (sem afetar o outro documento).
+
+Uso: python testes_validacao/teste_fila_ingestao.py
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from worker_local import cadastrar_documento, criar_ambiente, documento, paginas_ren
+
+env = criar_ambiente()
+from handlers.chunker import obter_chunker
+from handlers.ingestion import CHUNKS_POR_MENSAGEM, ETAPA_VETORIZAR, enfileirar, handle_queue
+from utils.manifest import carregar_fatia_manifesto, obter_etag
+
+DOC, DOC_FALHA = "REN_1000", "REN_FALHA"
+
+falhas = 0
+
+
+def conferir(rotulo, ok, detalhe=""):
+    global falhas
+    falhas += not ok
+    print(f"{rotulo}: {'✓' if ok else '✗'} {detalhe}")
+
+
+async def main():
+    fila = env.INGEST_QUEUE
+    await cadastrar_documento(env, DOC)
+    await enfileirar(env, DOC)
+    env.VECTORIZE.falhas_restantes = 1
+    await fila.drenar(env, handle_queue)
+
+    doc = documento(env, DOC)
+    chunks, total = await carregar_fatia_manifesto(env, DOC, obter_chunker().versao,
+                                                   await obter_etag(env, doc["r2_key"]), 0, None)
+    representantes = sum(1 for c in chunks if not c.get("representante"))
+    print("=" * 80)
+    print(f"TESTE: fila de ingestão ({total} chunks, {fila.entregues} entregas, {fila.dlq.entregues} na DLQ)")
+    print("=" * 80)
+    conferir("drenagem completa -> 'processed' com chunk_count = total",
+             doc["status"] == "processed" and doc["chunk_count"] == total,
+             f"(status {doc['status']}, chunk_count {doc['chunk_count']})")
+    conferir("um vetor por representante", len(env.VECTORIZE.vetores) == representantes,
+             f"({len(env.VECTORIZE.vetores)} vetores, {representantes} representantes)")
+    conferir("falha transitória no Vectorize -> reentregue, nada na DLQ",
+             env.VECTORIZE.falhas_restantes == 0 and fila.dlq.entregues == 0)
+
+    ultimo = (total - 1) // CHUNKS_POR_MENSAGEM * CHUNKS_POR_MENSAGEM
+    await enfileirar(env, DOC, ETAPA_VETORIZAR, inicio=ultimo)
+    await fila.drenar(env, handle_queue)
+    doc = documento(env, DOC)
+    conferir("último 'vetorizar' reentregue -> chunk_count mantido",
+             doc["status"] == "processed" and doc["chunk_count"] == total,
+             f"(chunk_count {doc['chunk_count']})")
+
+    await cadastrar_documento(env, DOC_FALHA, paginas_ren()[:20], conteudo_pdf=b"%PDF-falha")
+    await enfileirar(env, DOC_FALHA)
+    env.VECTORIZE.falhas_restantes = 10 ** 6
+    await fila.drenar(env, handle_queue)
+    env.VECTORIZE.falhas_restantes = 0
+    conferir("falha persistente -> DLQ e documento 'failed'",
+             fila.dlq.entregues == 1 and documento(env, DOC_FALHA)["status"] == "failed"
+             and documento(env, DOC)["status"] == "processed",
+             f"({fila.dlq.entregues} na DLQ, status {documento(env, DOC_FALHA)['status']})")
+
+
+asyncio.run(main())
+print(f"\nResultado: {'✓ fila de ingestão consistente em todos os casos' if not falhas else f'✗ {falhas} falhas'}")
+sys.exit(1 if falhas else 0)
@@ -0,0 +1,79 @@
+"""
+Teste do grafo de referências cruzadas (hierarchy_semantics.grafo_referencias),
+gravado no D1 em etapa_chunkar (document_references) e usado por
+handle_query e GET /documents/{id}/references/{elemento}.
+
+Mostra as arestas por tipo de alvo e a taxa de resolução das referências
+internas, e confere alguns casos conhecidos da REN 1000:
+- "inciso II do art. 67" aponta para o inciso II do art. 67;
+- todo alvo é um nó do tipo citado e nenhuma aresta aponta para a própria origem.
+
+Uso: python testes_validacao/teste_grafo_referencias.py [texto_extraido.txt]
+"""
+
+import os
+import sys
+import time
+from collections import Counter
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'handlers'))
+
+from chunker import ChunkerRegulatorio
+from hierarchy_semantics import AnalisadorRegulatorio, grafo_referencias, texto_sem_contexto
+
+caminho = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+    RAIZ, 'documentos_para_processar', 'REN_1000_ANEEL_raw_text_extract.txt')
+with open(caminho, encoding='utf-8') as f:
+    texto = f.read()
+
+chunker = ChunkerRegulatorio()
+chunks = chunker.criar_chunks(texto)
+nos = chunker.arvore_estrutura(chunks)
+inicio = time.perf_counter()
+arestas = grafo_referencias(chunks, nos)
+segundos = time.perf_counter() - inicio
+
+print("=" * 80)
+print(f"TESTE: grafo de referências em {os.path.basename(caminho)} ({len(chunks)} chunks, {len(nos)} nós)")
+print("=" * 80)
+
+brutas = sum(len(AnalisadorRegulatorio.extrair_referencias_cruzadas(texto_sem_contexto(c))) for c in chunks)
+por_tipo = Counter(nos[a['alvo']]['tipo'] if a['alvo'] is not None else 'norma externa' for a in arestas)
+print(f"\n{len(arestas)} arestas em {segundos * 1000:.1f} ms, de {brutas} referências encontradas "
+      f"(as demais são o rótulo do próprio elemento, repetições ou não resolvidas)")
+for tipo, n in por_tipo.most_common():
+    print(f"  {tipo:<15} {n}")
+
+
+def descrever(no_id):
+    cadeia = []
+    while no_id is not None:
+        cadeia.append(f"{nos[no_id]['tipo']} {nos[no_id]['numero']}")
+        no_id = nos[no_id]['pai']
+    return ' < '.join(cadeia)
+
+
+def tipo_citado(referencia):
+    return 'paragrafo' if referencia.startswith('§') else 'inciso' if referencia.lower().startswith('inciso') else 'artigo'
+
+
+citados = Counter(a['alvo'] for a in arestas if a['alvo'] is not None)
+print("\nElementos mais citados:")
+for alvo, n in citados.most_common(5):
+    print(f"  {n:>3}x {descrever(alvo)}")
+
+falhas = 0
+incoerentes = [a for a in arestas if a['alvo'] is not None and
+               (a['alvo'] == a['origem'] or nos[a['alvo']]['tipo'] != tipo_citado(a['referencia']))]
+falhas += len(incoerentes)
+print(f"\nalvo do tipo citado e diferente da origem: {'✓' if not incoerentes else f'✗ {len(incoerentes)} arestas'}")
+
+for chunk_id, referencia, esperado in [('chunk_137', 'inciso II', 'inciso II < artigo 67')]:
+    alvo = next((a['alvo'] for a in arestas if a['chunk_id'] == chunk_id and a['referencia'] == referencia), None)
+    ok = alvo is not None and descrever(alvo).startswith(esperado)
+    falhas += not ok
+    print(f"{chunk_id} \"{referencia}\" -> {descrever(alvo) if alvo is not None else 'não resolvida'} {'✓' if ok else '✗'}")
+
+print(f"\nResultado: {'✓ grafo consistente' if not falhas else f'✗ {falhas} falhas'}")
+sys.exit(1 if falhas else 0)
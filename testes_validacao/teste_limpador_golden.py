@@ -0,0 +1,118 @@
+"""
+Teste golden do LimpadorTexto compilado (hierarchy_semantics.py)
+
+Compara limpar() e normalizar_estrutura() com a implementação encadeada
+anterior (uma re.sub / str.replace por regra, copiada abaixo sem alterações):
+- textos reais: raw_text_extract.txt e a REN 1000 (texto inteiro e por página)
+- textos sintéticos: sequências aleatórias (semente fixa) de fragmentos que
+  disparam as regras, para cobrir combinações que os documentos não têm
+
+Uso: python testes_validacao/teste_limpador_golden.py [texto_extraido.txt ...]
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'handlers'))
+
+from hierarchy_semantics import LimpadorTexto
+
+
+class LimpadorEncadeado(LimpadorTexto):
+    """limpar / normalizar_estrutura como eram antes da versão compilada"""
+
+    def limpar(self, texto):
+        for padrao in self.padroes_lixo:
+            texto = re.sub(padrao, '', texto, flags=re.MULTILINE)
+        for errado, correto in self.correcoes_encoding.items():
+            texto = texto.replace(errado, correto)
+        texto = re.sub(r'õ(\s*\d)', r'§\1', texto)
+        return texto.strip()
+
+    def normalizar_estrutura(self, texto):
+        quebras = [
+            r'([.;!?])\s*(TÍTULO\s+)',
+            r'([.;!?])\s*(CAPÍTULO\s+)',
+            r'([.;!?])\s*(SEÇÃO\s+)',
+            r'([.;!?])\s*(SUBSEÇÃO\s+)',
+            r'([.;!?])\s*(CLÁUSULA\s+)'
+        ]
+        for padrao in quebras:
+            texto = re.sub(padrao, r'\1\n\2', texto)
+        texto = re.sub(r'([.;!?])\s*(ANEXO\s+[IVXLCDM0-9A-Z]+)', r'\1\n\n\2', texto)
+        texto = re.sub(r'(?m)^ *(ANEXO\s+[IVXLCDM0-9A-Z]+)', r'\n\1', texto)
+        texto = re.sub(r'(?m)^ *(CLÁUSULA\s+)', r'\n\1', texto)
+        texto = re.sub(r'([a-z0-9áàâãéêíóôõúç);:])\s+(Art\.?\s*\d+)', r'\1\n\2', texto)
+        return texto
+
+
+FRAGMENTOS = [
+    ' ', '  ', '\n', '\n\n', '\t', 'a', 'x', 'Z', '1', '23', '.', ';', '?', ':', ')', ',',
+    'ANDRÉ PEPITONE DA NÓBREGA', 'hélvio neves guerra', 'SANDRO LAZZARI', 'ÍNDICE', 'índice',
+    'Este texto não substitui o publicado', 'retificado no D.O. de ', '(*) Republicado em razão de incorreções',
+    '12/04/24, 10:31', '1/2/3', 'Page 3 of 50', 'Page', 'of', 'Voto', 'Vo', 'to', 'Texto Compilado',
+    'TÃTULO', 'CAPÃTULO', 'Ã§Ã£o', 'Ã§Ãµes', 'Ã¡', 'Ã©', 'Ã­', 'Ã³', 'Ãº', 'Ã', 'Ãª', 'Ã´', 'Ã§',
+    '£', 'µ', 'à', 'ã', 'õ', 'õ 5', '┴', '╔', 'Ý', 'þ', 'ú', 'Ò', 'Ó', 'û',
+    'TÍTULO ', 'CAPÍTULO ', 'SEÇÃO ', 'SUBSEÇÃO ', 'CLÁUSULA ', 'CLÁUSULA', 'ANEXO', 'ANEXO ', 'ANEXO IV',
+    'Art. 5', 'Art 12', 'Art.', 'Art',
+]
+
+
+def texto_sintetico(rng, tamanho):
+    return ''.join(rng.choice(FRAGMENTOS) for _ in range(tamanho))
+
+
+def comparar(nome, textos, antes, depois):
+    """Confere limpar e limpar+normalizar_estrutura; devolve a lista de divergências"""
+    divergentes = []
+    tempos = {'antes': 0.0, 'depois': 0.0}
+    for i, texto in enumerate(textos):
+        saidas = {}
+        for rotulo, limpador in (('antes', antes), ('depois', depois)):
+            inicio = time.perf_counter()
+            limpo = limpador.limpar(texto)
+            normalizado = limpador.normalizar_estrutura(limpo)
+            tempos[rotulo] += time.perf_counter() - inicio
+            saidas[rotulo] = (limpo, normalizado)
+        if saidas['antes'] != saidas['depois']:
+            divergentes.append(i)
+    status = '✓' if not divergentes else f'✗ {len(divergentes)} divergentes (ex.: índice {divergentes[0]})'
+    print(f"{nome:<45} antes {tempos['antes']:7.3f}s   depois {tempos['depois']:7.3f}s   {status}")
+    return divergentes
+
+
+caminhos = sys.argv[1:] or [os.path.join(RAIZ, 'raw_text_extract.txt'),
+                            os.path.join(RAIZ, 'documentos_para_processar', 'REN_1000_ANEEL_raw_text_extract.txt')]
+
+antes, depois = LimpadorEncadeado(), LimpadorTexto()
+falhas = 0
+
+print("=" * 80)
+print("TESTE GOLDEN: LimpadorTexto compilado x regras encadeadas")
+print("=" * 80)
+
+for caminho in caminhos:
+    if not os.path.exists(caminho):
+        print(f"{os.path.basename(caminho):<45} (arquivo não encontrado, ignorado)")
+        continue
+    with open(caminho, encoding='utf-8') as f:
+        texto = f.read()
+    falhas += len(comparar(os.path.basename(caminho), [texto], antes, depois))
+    paginas = re.split(r'\[\[PAGINA:\d+\]\]', texto)
+    falhas += len(comparar(f"   por página ({len(paginas)})", paginas, antes, depois))
+
+rng = random.Random(39)
+sinteticos = [texto_sintetico(rng, rng.randint(1, 40)) for _ in range(20000)]
+divergentes = comparar(f"sintéticos ({len(sinteticos)})", sinteticos, antes, depois)
+falhas += len(divergentes)
+for i in divergentes[:3]:
+    print(f"\n   entrada: {sinteticos[i]!r}")
+    print(f"   antes:   {antes.normalizar_estrutura(antes.limpar(sinteticos[i]))!r}")
+    print(f"   depois:  {depois.normalizar_estrutura(depois.limpar(sinteticos[i]))!r}")
+
+print(f"\nResultado: {'✓ saídas idênticas' if not falhas else f'✗ {falhas} divergências'}")
+sys.exit(1 if falhas else 0)
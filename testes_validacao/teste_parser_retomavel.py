@@ -0,0 +1,89 @@
+"""
+Teste do parser retomável (EstadoParser + ChunkerRegulatorio.alimentar/finalizar)
+
+O documento é dividido em janelas de páginas e cada janela é analisada a
+partir do estado serializado da anterior, como no Worker (uma janela por
+invocação, estado no D1 e elementos fechados no R2). Os chunks precisam ser
+idênticos aos de criar_chunks numa passada única e ao arquivo golden.
+
+Divisões testadas: documento inteiro, uma página por janela, janelas de 40
+páginas (padrão de handle_process) e divisões aleatórias.
+
+Uso: python testes_validacao/teste_parser_retomavel.py [texto_extraido.txt] [divisoes_aleatorias]
+"""
+
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'handlers'))
+
+from chunker import (ChunkerRegulatorio, EstadoParser, _SEPARADOR_PAGINAS,
+                     desserializar_elementos, serializar_elementos)
+
+
+def analisar_em_janelas(chunker, paginas, fronteiras):
+    """Chunks da análise janela a janela; devolve (chunks, maior estado serializado em bytes)"""
+    estado, guardados, maior = EstadoParser().serializar(), [], 0
+    for inicio, fim in zip(fronteiras, fronteiras[1:]):
+        retomado = EstadoParser.desserializar(estado)
+        guardados.append(serializar_elementos(chunker.alimentar(retomado, chunker.linhas_documento(paginas[inicio:fim]))))
+        estado = retomado.serializar()
+        maior = max(maior, len(estado.encode('utf-8')))
+    elementos = desserializar_elementos(''.join(guardados))
+    elementos.extend(chunker.finalizar(EstadoParser.desserializar(estado)))
+    return chunker.criar_chunks_de_elementos(elementos), maior
+
+
+def resumo_chunk(chunk):
+    conteudo = json.dumps(chunk, ensure_ascii=False, sort_keys=True)
+    return {'chunk_id': chunk['chunk_id'], 'tipo': chunk['tipo'], 'numero': chunk['numero'],
+            'pagina': chunk['pagina'], 'sha256': hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:16]}
+
+
+caminho = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+    RAIZ, 'documentos_para_processar', 'REN_1000_ANEEL_raw_text_extract.txt')
+aleatorias = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+with open(caminho, encoding='utf-8') as f:
+    texto = f.read()
+documento = os.path.splitext(os.path.basename(caminho))[0].replace('_raw_text_extract', '')
+
+chunker = ChunkerRegulatorio()
+paginas = _SEPARADOR_PAGINAS.split(texto)
+referencia = chunker.criar_chunks(texto)
+
+print("=" * 80)
+print(f"TESTE: parser retomável em {os.path.basename(caminho)} ({len(paginas)} páginas, {len(referencia)} chunks)")
+print("=" * 80)
+
+falhas = 0
+golden = os.path.join(RAIZ, 'testes_validacao', 'golden', f"{documento}_chunker.jsonl")
+if os.path.exists(golden):
+    with open(golden, encoding='utf-8') as f:
+        iguais = [json.loads(l) for l in f if l.strip()] == [resumo_chunk(c) for c in referencia]
+    falhas += not iguais
+    print(f"\ncriar_chunks == golden {os.path.basename(golden)}: {'✓' if iguais else '✗'}")
+
+sorteio = random.Random(1000)
+divisoes = [("documento inteiro", [0, len(paginas)]),
+            ("uma página por janela", list(range(len(paginas) + 1))),
+            ("janelas de 40 páginas", list(range(0, len(paginas), 40)) + [len(paginas)])]
+for n in range(aleatorias if len(paginas) > 1 else 0):
+    cortes = sorted(sorteio.sample(range(1, len(paginas)), sorteio.randint(1, min(60, len(paginas) - 1))))
+    divisoes.append((f"aleatória {n + 1} ({len(cortes) + 1} janelas)", [0] + cortes + [len(paginas)]))
+
+print()
+for rotulo, fronteiras in divisoes:
+    inicio = time.perf_counter()
+    chunks, maior = analisar_em_janelas(chunker, paginas, fronteiras)
+    segundos = time.perf_counter() - inicio
+    iguais = chunks == referencia
+    falhas += not iguais
+    print(f"   {rotulo:<34} {segundos:6.2f}s   maior estado {maior / 1024:6.1f} KiB   {'✓' if iguais else '✗ DIVERGENTE'}")
+
+print(f"\nResultado: {'✓ todas as divisões idênticas' if not falhas else f'✗ {falhas} divergências'}")
+sys.exit(1 if falhas else 0)
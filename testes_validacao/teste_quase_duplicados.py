@@ -0,0 +1,97 @@
+"""
+Relatório dos chunks quase duplicados (near_duplicates.marcar_quase_duplicados),
+marcados em etapa_chunkar antes da vetorização quando NEAR_DUPLICATES está ligada.
+
+Mostra quantas chamadas ao bge-m3 e quantos vetores deixam de existir (uma
+chamada e um vetor por chunk em utils/vectorize.py), os maiores grupos e a
+sensibilidade ao limiar, e confere que cada alias tem o tipo e o contexto do
+seu representante, vem depois dele e tem similaridade real >= limiar.
+
+Como o documento real pode não ter repetições no mesmo contexto, também
+confere um caso sintético: o mesmo parágrafo com e sem nota de redação no
+mesmo artigo (agrupa) e o mesmo texto em outro artigo (não agrupa), e que
+trocar_por_representantes leva o alias da árvore e do grafo ao representante.
+
+Uso: python testes_validacao/teste_quase_duplicados.py [texto_extraido.txt]
+"""
+
+import os
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src', 'handlers'))
+
+from chunker import ChunkerRegulatorio
+from hierarchy_semantics import texto_sem_contexto
+from near_duplicates import (LIMIAR_SIMILARIDADE, agrupar_quase_duplicados, marcar_quase_duplicados,
+                             trigramas, trocar_por_representantes)
+
+caminho = sys.argv[1] if len(sys.argv) > 1 else os.path.join(
+    RAIZ, 'documentos_para_processar', 'REN_1000_ANEEL_raw_text_extract.txt')
+with open(caminho, encoding='utf-8') as f:
+    texto = f.read()
+
+chunks = ChunkerRegulatorio().criar_chunks(texto)
+inicio = time.perf_counter()
+aliases = marcar_quase_duplicados(chunks)
+segundos = time.perf_counter() - inicio
+vetorizados = len(chunks) - aliases
+
+print("=" * 80)
+print(f"TESTE: quase duplicados em {os.path.basename(caminho)} ({len(chunks)} chunks, limiar {LIMIAR_SIMILARIDADE})")
+print("=" * 80)
+print(f"\nDetecção em {segundos * 1000:.0f} ms")
+print(f"chamadas bge-m3: {len(chunks)} -> {vetorizados} (-{aliases}, {aliases / len(chunks):.1%})")
+print(f"vetores:         {len(chunks)} -> {vetorizados} (-{aliases})")
+
+por_id = {c['chunk_id']: c for c in chunks}
+posicao = {c['chunk_id']: i for i, c in enumerate(chunks)}
+grupos = sorted((c for c in chunks if c.get('aliases')), key=lambda c: -len(c['aliases']))
+print(f"\n{len(grupos)} grupos; maiores:")
+for c in grupos[:5]:
+    print(f"  {len(c['aliases']) + 1:>3}x {texto_sem_contexto(c)[:60]!r}")
+variantes = sum(texto_sem_contexto(c) != texto_sem_contexto(por_id[c['representante']])
+                for c in chunks if c.get('representante'))
+print(f"aliases com texto diferente do representante (ex.: nota de redação): {variantes}")
+
+print("\nSensibilidade ao limiar:")
+for limiar in (0.8, 0.95, 1.0):
+    print(f"  {limiar:<5} {len(agrupar_quase_duplicados(chunks, limiar))} aliases")
+
+invalidos = []
+for c in chunks:
+    if c.get('representante'):
+        r = por_id[c['representante']]
+        a, b = trigramas(texto_sem_contexto(c)), trigramas(texto_sem_contexto(r))
+        if (r['tipo'] != c['tipo'] or r['contexto_hierarquico'] != c['contexto_hierarquico']
+                or posicao[r['chunk_id']] > posicao[c['chunk_id']]
+                or r.get('representante') or len(a & b) < LIMIAR_SIMILARIDADE * len(a | b)):
+            invalidos.append(c['chunk_id'])
+print(f"\naliases coerentes com o representante: {'✓' if not invalidos else f'✗ {invalidos[:5]}'}")
+
+
+def chunk(chunk_id, contexto, texto):
+    return {'chunk_id': chunk_id, 'tipo': 'paragrafo', 'contexto_hierarquico': contexto,
+            'texto': f"[{contexto}] {texto}"}
+
+
+paragrafo = ("§ 1º A distribuidora deve informar ao consumidor o prazo para a conclusão das obras "
+             "de conexão e os documentos necessários para a vistoria da unidade consumidora.")
+sinteticos = [chunk('a', 'Título I > Artigo 10', paragrafo),
+              chunk('b', 'Título I > Artigo 10', paragrafo + " (Redação dada pela REN ANEEL 1.059, de 07.02.2023)"),
+              chunk('c', 'Título I > Artigo 11', paragrafo)]
+esperado = {'b': 'a'}
+obtido = agrupar_quase_duplicados(sinteticos)
+print(f"caso sintético (nota de redação agrupa, outro artigo não): {'✓' if obtido == esperado else f'✗ {obtido}'}")
+
+marcar_quase_duplicados(sinteticos)
+nos = [{'id': 0, 'pai': None, 'tipo': 'artigo', 'numero': '10', 'pagina': 1, 'chunks': ['a', 'b']},
+       {'id': 1, 'pai': None, 'tipo': 'artigo', 'numero': '11', 'pagina': 1, 'chunks': ['c']}]
+arestas = [{'chunk_id': 'b', 'origem': 0, 'alvo': 1, 'referencia': 'art. 11'}]
+trocar_por_representantes(sinteticos, nos, arestas)
+trocados = [n['chunks'] for n in nos] == [['a'], ['c']] and arestas[0]['chunk_id'] == 'a'
+print(f"árvore e grafo apontam para o representante: {'✓' if trocados else f'✗ {nos} {arestas}'}")
+falhas = len(invalidos) + (obtido != esperado) + (not trocados)
+print(f"\nResultado: {'✓' if not falhas else f'✗ {falhas} falhas'}")
+sys.exit(1 if falhas else 0)
@@ -0,0 +1,94 @@
+"""
+Teste de reingestão após mudança do chunker (handlers/chunks.py), com os
+bindings simulados de worker_local.py.
+
+Depois de uma ingestão completa pelo /process, o cursor fica na última
+página e sem janelas. Confere que, nesses casos, o documento volta a ser
+extraído e chunkado por inteiro (e não termina com um manifesto vazio):
+- VERSAO_CHUNKER muda (a chave do manifesto muda);
+- o manifesto some do R2;
+- a fila recebe um 'vetorizar' sem manifesto para a versão atual;
+- um 'chunkar' é reentregue depois da limpeza das janelas.
+
+Uso: python testes_validacao/teste_reingestao_versao.py
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from worker_local import RequisicaoLocal, cadastrar_documento, criar_ambiente, documento
+
+env = criar_ambiente()
+import handlers.chunker as chunker_mod
+from handlers.chunks import handle_process
+from handlers.ingestion import ETAPA_CHUNKAR, ETAPA_VETORIZAR, executar_etapa, handle_queue
+from utils.manifest import chave_indice
+
+DOC = "REN_1000"
+
+
+async def processar():
+    """Chama o /process até is_finished, como o cliente faz"""
+    inicio, chamadas = 0, 0
+    while True:
+        corpo = {"document_id": DOC, "start_chunk": inicio, "limit_chunks": 500}
+        r = (await handle_process(RequisicaoLocal("http://local/process", corpo), env)).json()
+        chamadas += 1
+        if "error" in r:
+            raise RuntimeError(r["trace"])
+        if r["stage"] == "vectorizing":
+            inicio = r["total_processed"]
+        if r["is_finished"]:
+            return r, chamadas
+
+
+def nos():
+    return env.agems_rag_db.consultar("SELECT COUNT(*) AS n FROM document_nodes WHERE document_id = ?", DOC)[0]["n"]
+
+
+falhas = 0
+
+
+def conferir(rotulo, ok, detalhe=""):
+    global falhas
+    falhas += not ok
+    print(f"{rotulo}: {'✓' if ok else '✗'} {detalhe}")
+
+
+async def main():
+    await cadastrar_documento(env, DOC)
+    r, chamadas = await processar()
+    total, total_nos = r["total_chunks"], nos()
+    print("=" * 80)
+    print(f"TESTE: reingestão após mudança do chunker ({total} chunks, {total_nos} nós, {chamadas} chamadas ao /process)")
+    print("=" * 80)
+
+    chunker_mod.VERSAO_CHUNKER = "teste-1"
+    r, _ = await processar()
+    conferir("VERSAO_CHUNKER alterada -> reextrai e rechunka", r["total_chunks"] == total and nos() == total_nos,
+             f"({r['total_chunks']} chunks, {nos()} nós)")
+
+    versao = chunker_mod.obter_chunker().versao
+    del env.agems_docs.objetos[chave_indice(DOC, versao)]
+    r, _ = await processar()
+    conferir("manifesto removido do R2 -> reextrai e rechunka", r["total_chunks"] == total,
+             f"({r['total_chunks']} chunks)")
+
+    await executar_etapa(env, {"document_id": DOC, "etapa": ETAPA_CHUNKAR})
+    conferir("'chunkar' reentregue após a limpeza -> manifesto mantido", nos() == total_nos,
+             f"({nos()} nós)")
+    env.INGEST_QUEUE.pendentes.clear()
+
+    chunker_mod.VERSAO_CHUNKER = "teste-2"
+    await env.INGEST_QUEUE.send({"document_id": DOC, "etapa": ETAPA_VETORIZAR, "inicio": 0})
+    await env.INGEST_QUEUE.drenar(env, handle_queue)
+    doc = documento(env, DOC)
+    conferir("'vetorizar' sem manifesto na fila -> extração recomeça", doc["status"] == "processed" and nos() == total_nos,
+             f"(status {doc['status']}, chunk_count {doc['chunk_count']}, {nos()} nós)")
+
+
+asyncio.run(main())
+print(f"\nResultado: {'✓ reingestão completa em todos os casos' if not falhas else f'✗ {falhas} falhas'}")
+sys.exit(1 if falhas else 0)
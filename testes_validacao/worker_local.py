@@ -0,0 +1,279 @@
+"""
+Bindings do Worker simulados em processo, para os testes do pipeline de
+ingestão (handlers/chunks.py e handlers/ingestion.py) sem o runtime.
+
+- js / pyodide.ffi: módulos mínimos (Response, JSON, Object, Uint8Array, to_js);
+- R2Local: get (com range), put (com customMetadata), head e delete;
+- D1Local: SQLite em memória com schema.sql (prepare/bind/run/all/first/batch);
+- VectorizeLocal e AILocal: contam vetores e chamadas ao bge-m3 e simulam falhas;
+- a fila é utils/local_queue.FilaLocal.
+
+O cache de páginas do R2 é pré-preenchido com o texto extraído da REN 1000
+(documentos_para_processar/REN_1000_ANEEL_raw_text_extract.txt), então as
+janelas de extração não rodam o pdfplumber.
+
+Uso (antes de importar os handlers):
+    from worker_local import criar_ambiente, cadastrar_documento
+    env = criar_ambiente()
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import types
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ, 'src'))
+TEXTO_REN = os.path.join(RAIZ, 'documentos_para_processar', 'REN_1000_ANEEL_raw_text_extract.txt')
+PDF_REN = os.path.join(RAIZ, 'documentos_para_processar', 'REN_1000_ANEEL.pdf')
+
+
+class Proxy:
+    """Objeto JS devolvido pelo runtime: os dados saem com to_py()"""
+    def __init__(self, dados):
+        self._dados = dados
+
+    def to_py(self):
+        return self._dados
+
+
+class Uint8ArrayLocal:
+    def __init__(self, dados):
+        self._dados = bytes(dados)
+        self.length = len(self._dados)
+
+    @classmethod
+    def new(cls, dados):
+        return dados if isinstance(dados, cls) else cls(dados)
+
+    def subarray(self, inicio, fim=None):
+        return Uint8ArrayLocal(self._dados[inicio:fim])
+
+    def to_bytes(self):
+        return self._dados
+
+
+class RespostaLocal:
+    def __init__(self, corpo, init=None):
+        init = init.to_py() if isinstance(init, Proxy) else (init or {})
+        self.corpo = corpo
+        self.status = init.get("status", 200)
+
+    @classmethod
+    def new(cls, corpo, init=None):
+        return cls(corpo, init)
+
+    def json(self):
+        return json.loads(self.corpo)
+
+
+def _instalar_modulos_js():
+    if 'js' in sys.modules and getattr(sys.modules['js'], 'LOCAL', False):
+        return
+    js = types.ModuleType('js')
+    js.LOCAL = True
+    js.Response = RespostaLocal
+    js.JSON = types.SimpleNamespace(parse=json.loads)
+    js.Object = types.SimpleNamespace(fromEntries=dict)
+    js.Uint8Array = Uint8ArrayLocal
+    js.Array = list
+    js.Headers = dict
+    js.FormData = dict
+    pyodide = types.ModuleType('pyodide')
+    ffi = types.ModuleType('pyodide.ffi')
+    ffi.to_js = lambda valor, **_: valor
+    pyodide.ffi = ffi
+    sys.modules.update({'js': js, 'pyodide': pyodide, 'pyodide.ffi': ffi})
+
+
+class ObjetoR2:
+    def __init__(self, dados, metadados=None):
+        self._dados = dados
+        self.etag = hashlib.md5(dados).hexdigest()
+        self.customMetadata = Proxy(metadados) if metadados else None
+
+    async def text(self):
+        return self._dados.decode('utf-8')
+
+    async def arrayBuffer(self):
+        return self._dados
+
+
+class R2Local:
+    def __init__(self):
+        self.objetos = {}
+
+    async def put(self, chave, valor, opcoes=None):
+        if isinstance(valor, str):
+            valor = valor.encode('utf-8')
+        elif isinstance(valor, Uint8ArrayLocal):
+            valor = valor.to_bytes()
+        self.objetos[chave] = (bytes(valor), (opcoes or {}).get("customMetadata"))
+
+    async def get(self, chave, opcoes=None):
+        if chave not in self.objetos:
+            return None
+        dados, metadados = self.objetos[chave]
+        if opcoes and "range" in opcoes:
+            faixa = opcoes["range"]
+            dados = dados[faixa["offset"]:faixa["offset"] + faixa["length"]]
+        return ObjetoR2(dados, metadados)
+
+    async def head(self, chave):
+        return await self.get(chave)
+
+    async def delete(self, chave):
+        self.objetos.pop(chave, None)
+
+
+class ComandoD1:
+    def __init__(self, db, sql):
+        self.db, self.sql, self.params = db, sql, ()
+
+    def bind(self, *params):
+        assert len(params) <= 100, f"D1 aceita até 100 parâmetros ({len(params)})"
+        self.params = params
+        return self
+
+    def _executar(self):
+        cursor = self.db.conexao.execute(self.sql, self.params)
+        colunas = [d[0] for d in cursor.description or []]
+        return [dict(zip(colunas, linha)) for linha in cursor.fetchall()]
+
+    async def run(self):
+        self._executar()
+
+    async def all(self):
+        return Proxy({"results": self._executar()})
+
+    async def first(self):
+        linhas = self._executar()
+        return Proxy(linhas[0]) if linhas else None
+
+
+class D1Local:
+    def __init__(self):
+        self.conexao = sqlite3.connect(':memory:')
+        with open(os.path.join(RAIZ, 'schema.sql'), encoding='utf-8') as f:
+            self.conexao.executescript(f.read())
+
+    def prepare(self, sql):
+        return ComandoD1(self, sql)
+
+    async def batch(self, comandos):
+        for c in comandos:
+            c._executar()
+
+    def consultar(self, sql, *params):
+        return ComandoD1(self, sql).bind(*params)._executar()
+
+
+class VectorizeLocal:
+    """falhas_restantes > 0 faz as próximas gravações falharem"""
+    def __init__(self):
+        self.vetores = {}
+        self.gravacoes = 0
+        self.falhas_restantes = 0
+
+    async def insert(self, vetores):
+        await self.upsert(vetores)
+
+    async def upsert(self, vetores):
+        if self.falhas_restantes:
+            self.falhas_restantes -= 1
+            raise RuntimeError("Vectorize indisponível (simulado)")
+        self.gravacoes += len(vetores)
+        for v in vetores:
+            self.vetores[v["id"]] = v
+
+    async def getByIds(self, ids):
+        return Proxy([self.vetores[i] for i in ids if i in self.vetores])
+
+
+class AILocal:
+    """bge-m3 determinístico; falhas_restantes > 0 faz as próximas chamadas falharem"""
+    def __init__(self):
+        self.chamadas = 0
+        self.falhas_restantes = 0
+
+    async def run(self, modelo, entrada):
+        if self.falhas_restantes:
+            self.falhas_restantes -= 1
+            raise RuntimeError("AI indisponível (simulado)")
+        self.chamadas += 1
+        digest = hashlib.sha256(entrada["text"][0].encode('utf-8')).digest()
+        return Proxy({"data": [[b / 255 for b in digest[:16]]]})
+
+
+def paginas_ren():
+    """
+    [(numero, texto)] da REN 1000, a partir do texto extraído com marcadores
+    [[PAGINA:n]] (as páginas sem texto voltam vazias, como no cache do Worker)
+    """
+    with open(TEXTO_REN, encoding='utf-8') as f:
+        partes = re.split(r'\[\[PAGINA:(\d+)\]\]\n?', f.read())
+    textos = {int(partes[i]): partes[i + 1].strip('\n') for i in range(1, len(partes), 2)}
+    return [(n, textos.get(n, "")) for n in range(1, max(textos) + 1)]
+
+
+def criar_ambiente():
+    _instalar_modulos_js()
+    from utils.local_queue import FilaLocal
+    env = types.SimpleNamespace(agems_docs=R2Local(), agems_rag_db=D1Local(), VECTORIZE=VectorizeLocal(), AI=AILocal())
+    env.INGEST_QUEUE = FilaLocal("agems-ingest", dlq=FilaLocal("agems-ingest-dlq"))
+    return env
+
+
+async def cadastrar_documento(env, document_id, paginas=None, conteudo_pdf=None):
+    """
+    Grava o "PDF" no R2 e o documento no D1, com o cache de páginas preenchido
+    (o pdfplumber não roda). conteudo_pdf distingue documentos (sha256 próprio).
+    """
+    from handlers.chunks import OPCOES_EXTRACAO_WORKER
+    from handlers.extraction_backends import obter_backend
+    from utils.page_store import salvar_cache
+    paginas = paginas if paginas is not None else paginas_ren()
+    if conteudo_pdf is None:
+        with open(PDF_REN, 'rb') as f:
+            conteudo_pdf = f.read()
+    sha256 = hashlib.sha256(conteudo_pdf).hexdigest()
+    r2_key = f"documents/{document_id}.pdf"
+    await env.agems_docs.put(r2_key, conteudo_pdf)
+    await salvar_cache(env, sha256, obter_backend(None, **OPCOES_EXTRACAO_WORKER).chave(), len(paginas), dict(paginas))
+    await env.agems_rag_db.prepare(
+        "INSERT INTO documents (id, title, type, sector, r2_key, sha256, status) VALUES (?, ?, 'REN', 'Geral', ?, ?, 'pending')"
+    ).bind(document_id, document_id, r2_key, sha256).run()
+
+
+def documento(env, document_id):
+    return env.agems_rag_db.consultar("SELECT * FROM documents WHERE id = ?", document_id)[0]
+
+
+class ArquivoLocal:
+    """File de um multipart/form-data"""
+    def __init__(self, dados):
+        self._dados = dados.encode('utf-8') if isinstance(dados, str) else dados
+
+    async def arrayBuffer(self):
+        return self._dados
+
+    async def text(self):
+        return self._dados.decode('utf-8')
+
+
+class RequisicaoLocal:
+    """corpo: dict (json), str (text) ou, com formulario, os campos do multipart"""
+    def __init__(self, url, corpo=None, metodo="POST", formulario=None):
+        self.url, self.method, self._corpo, self._formulario = url, metodo, corpo, formulario
+
+    async def json(self):
+        return Proxy(self._corpo)
+
+    async def text(self):
+        return self._corpo
+
+    async def formData(self):
+        return self._formulario